@@ -12,8 +12,11 @@ tmp_ret = collect_all('moviepy')
 datas += tmp_ret[0]; binaries += tmp_ret[1]; hiddenimports += tmp_ret[2]
 
 
+# One folder with two launchers sharing the same libraries: the windowed GUI
+# and a console CLI for scripts. Onedir starts without unpacking the bundle
+# to a temp folder on every launch, which dominated onefile startup time.
 a = Analysis(
-    ['main.py'],
+    ['main.py', 'cli.py'],
     pathex=[],
     binaries=binaries,
     datas=datas,
@@ -27,19 +30,16 @@ a = Analysis(
 )
 pyz = PYZ(a.pure)
 
-exe = EXE(
+gui_exe = EXE(
     pyz,
-    a.scripts,
-    a.binaries,
-    a.datas,
+    [script for script in a.scripts if script[0] != 'cli'],
     [],
+    exclude_binaries=True,
     name='MP4VideoConverter',
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
     upx=True,
-    upx_exclude=[],
-    runtime_tmpdir=None,
     console=False,
     disable_windowed_traceback=False,
     argv_emulation=False,
@@ -47,3 +47,30 @@ exe = EXE(
     codesign_identity=None,
     entitlements_file=None,
 )
+
+cli_exe = EXE(
+    pyz,
+    [script for script in a.scripts if script[0] != 'main'],
+    [],
+    exclude_binaries=True,
+    name='mp4convert',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=True,
+    console=True,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+)
+
+coll = COLLECT(
+    gui_exe,
+    cli_exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=True,
+    upx_exclude=[],
+    name='MP4VideoConverter',
+)
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+
+APP_NAME = "MP4VideoConverter"
+
+
+def cache_dir(kind: str) -> Path:
+    """Per-user cache folder for one kind of cached data (created on demand)."""
+    base = os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    path = Path(base) / APP_NAME / kind
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def file_key(path: str | Path) -> str:
+    """Changes whenever the file is replaced or rewritten: resolved path, size and mtime."""
+    resolved = Path(path).resolve()
+    stat = resolved.stat()
+    return hashlib.sha1(f"{resolved}\0{stat.st_size}\0{stat.st_mtime_ns}".encode("utf-8")).hexdigest()
+
+
+def load_json(kind: str, key: str) -> dict | None:
+    try:
+        with open(cache_dir(kind) / f"{key}.json", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def save_json(kind: str, key: str, data: dict) -> None:
+    # Cache writes are best effort; a read-only profile only costs speed.
+    try:
+        path = cache_dir(kind) / f"{key}.json"
+        temp = path.with_suffix(".tmp")
+        temp.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(temp, path)
+    except OSError:
+        pass
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import platform
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from app_cache import file_key, load_json, save_json
+from ffmpeg_cli import ffmpeg_exe, run_ffmpeg, video_filter
+
+
+CALIBRATION_CACHE = "calibration"
+CONTENT_CACHE = "calibration-content"
+CALIBRATION_VERSION = 2
+
+# Fastest to slowest. Slower presets only shrink the file (CRF) or improve
+# quality at the same size (bitrate), so the tuner walks this list in order.
+PRESETS = ("ultrafast", "veryfast", "faster", "medium", "slow")
+
+SAMPLE_WINDOWS = 3
+SAMPLE_SECONDS = 2.0
+
+# Keep this much of the deadline in reserve for audio, muxing and noise in the samples.
+DEADLINE_MARGIN = 0.85
+
+
+def machine_key() -> str:
+    """Identifies this machine and ffmpeg build; calibration from elsewhere does not apply."""
+    parts = (platform.node(), platform.machine(), platform.processor(), str(os.cpu_count()), ffmpeg_exe())
+    return hashlib.sha1("\0".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def thread_options() -> list[int]:
+    cpus = os.cpu_count() or 1
+    return sorted({cpus, max(1, cpus // 2)}, reverse=True)
+
+
+def sample_windows(start: float, end: float, count: int = SAMPLE_WINDOWS) -> list[tuple[float, float]]:
+    """Short windows spread evenly over the range, so one static scene does not decide everything."""
+    length = min(SAMPLE_SECONDS, (end - start) / count)
+    return [
+        (start + (end - start) * (index + 0.5) / count - length / 2, length)
+        for index in range(count)
+    ]
+
+
+def _rate_mode(settings: dict[str, object]) -> str:
+    return "abr" if settings["bitrate"] is not None else "crf"
+
+
+def measure(
+    settings: dict[str, object],
+    preset: str,
+    threads: int,
+    windows: list[tuple[float, float]],
+    should_cancel: Callable[[], bool] | None = None,
+) -> dict[str, float]:
+    """Encode the sample windows with one setting; returns pixel throughput and bits per pixel."""
+    width, height, fps = int(settings["width"]), int(settings["height"]), float(settings["fps"])
+    rate = ["-b:v", str(settings["bitrate"])] if settings["bitrate"] is not None else []
+    pixels = 0.0
+    output_bytes = 0
+    elapsed = 0.0
+    with tempfile.TemporaryDirectory() as folder:
+        for index, (window_start, window_length) in enumerate(windows):
+            output = Path(folder) / f"sample{index}.mp4"
+            started = time.perf_counter()
+            run_ffmpeg(
+                [
+                    "-ss", f"{max(window_start, 0.0):.3f}", "-i", str(settings["input_path"]),
+                    "-t", f"{window_length:.3f}",
+                    "-map", "0:v:0", "-an",
+                    "-vf", video_filter(settings),
+                    "-c:v", "libx264", "-preset", preset, *rate, "-threads", str(threads),
+                    str(output),
+                ],
+                window_length,
+                should_cancel=should_cancel,
+            )
+            elapsed += time.perf_counter() - started
+            output_bytes += output.stat().st_size
+            pixels += width * height * fps * window_length
+    return {
+        "pixels_per_second": pixels / elapsed if elapsed > 0 else 0.0,
+        "bits_per_pixel": output_bytes * 8 / pixels if pixels > 0 else 0.0,
+    }
+
+
+def content_key(settings: dict[str, object], start: float, end: float) -> str:
+    """Identifies the clip and the part of it being encoded; bits per pixel only carry over within it."""
+    parts = (
+        file_key(str(settings["input_path"])),
+        _rate_mode(settings),
+        f"{settings['width']}x{settings['height']}@{settings['fps']}",
+        f"{start:.3f}-{end:.3f}",
+    )
+    return hashlib.sha1("\0".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def _load_cached(kind: str, key: str, force: bool) -> dict[str, float]:
+    cached = None if force else load_json(kind, key)
+    if cached is not None and cached.get("version") == CALIBRATION_VERSION:
+        return cached["results"]
+    return {}
+
+
+def calibrate(
+    settings: dict[str, object],
+    source_duration: float,
+    force: bool = False,
+    on_status: Callable[[str], None] | None = None,
+    should_cancel: Callable[[], bool] | None = None,
+) -> dict[str, dict[str, float]]:
+    """
+    Speed and size per "preset/threads". Speed belongs to this machine: it is
+    kept as pixels per second, so it carries over to other clips and sizes,
+    and is measured once. Size depends on the clip's content, so in CRF mode
+    bits per pixel are measured on sample windows of each source (once per
+    preset) and cached per file. With a bitrate the size follows from it.
+    """
+    start = float(settings["trim_start"] or 0)
+    end = float(settings["trim_end"]) if settings["trim_end"] is not None else source_duration
+    speed_key = f"{machine_key()}-{_rate_mode(settings)}"
+    size_key = content_key(settings, start, end)
+    speeds = _load_cached(CALIBRATION_CACHE, speed_key, force)
+    sizes = _load_cached(CONTENT_CACHE, size_key, force) if settings["bitrate"] is None else {}
+
+    windows = sample_windows(start, end)
+    speed_measured = size_measured = False
+    for preset in PRESETS:
+        for threads in thread_options():
+            name = f"{preset}/{threads}"
+            size_needed = settings["bitrate"] is None and preset not in sizes
+            if name in speeds and not size_needed:
+                continue
+            if on_status is not None:
+                on_status(f"Calibrating encoder: {preset}, {threads} threads")
+            result = measure(settings, preset, threads, windows, should_cancel)
+            if name not in speeds:
+                speeds[name] = result["pixels_per_second"]
+                speed_measured = True
+            if size_needed:
+                sizes[preset] = result["bits_per_pixel"]
+                size_measured = True
+    if speed_measured:
+        save_json(CALIBRATION_CACHE, speed_key, {"version": CALIBRATION_VERSION, "results": speeds})
+    if size_measured:
+        save_json(CONTENT_CACHE, size_key, {"version": CALIBRATION_VERSION, "results": sizes})
+    return {
+        name: {"pixels_per_second": pixels_per_second, "bits_per_pixel": sizes.get(name.split("/")[0], 0.0)}
+        for name, pixels_per_second in speeds.items()
+    }
+
+
+def choose_setting(
+    calibration: dict[str, dict[str, float]],
+    settings: dict[str, object],
+    output_duration: float,
+    deadline_seconds: float | None = None,
+    max_bytes: float | None = None,
+) -> dict[str, object]:
+    """
+    With a deadline: the slowest preset (smallest file / best quality) that is
+    predicted to finish in time. With a size limit: the fastest preset that
+    is predicted to fit. When nothing qualifies, the fastest setting (deadline)
+    or the smallest file (size limit) is used.
+    """
+    pixels = int(settings["width"]) * int(settings["height"]) * float(settings["fps"]) * output_duration
+    candidates = []
+    for name, result in calibration.items():
+        preset, threads = name.split("/")
+        if preset not in PRESETS or result["pixels_per_second"] <= 0:
+            continue
+        if settings["bitrate"] is not None:
+            size = float(str(settings["bitrate"]).rstrip("k")) * 1000 * output_duration / 8
+        else:
+            size = result["bits_per_pixel"] * pixels / 8
+        candidates.append(
+            {
+                "preset": preset,
+                "threads": int(threads),
+                "seconds": pixels / result["pixels_per_second"],
+                "bytes": size,
+            }
+        )
+    if not candidates:
+        raise ValueError("No encoder calibration results.")
+
+    fastest = min(candidates, key=lambda candidate: candidate["seconds"])
+    if deadline_seconds is not None:
+        in_time = [candidate for candidate in candidates if candidate["seconds"] <= deadline_seconds * DEADLINE_MARGIN]
+        if not in_time:
+            return fastest
+        # The slowest preset that makes it compresses best; among its thread
+        # counts take the quickest.
+        slowest = max(PRESETS.index(candidate["preset"]) for candidate in in_time)
+        return min(
+            (candidate for candidate in in_time if PRESETS.index(candidate["preset"]) == slowest),
+            key=lambda candidate: candidate["seconds"],
+        )
+    if max_bytes is not None:
+        fitting = [candidate for candidate in candidates if candidate["bytes"] <= max_bytes]
+        if not fitting:
+            return min(candidates, key=lambda candidate: (candidate["bytes"], candidate["seconds"]))
+        return min(fitting, key=lambda candidate: candidate["seconds"])
+    return fastest
+
+
+def tune(
+    settings: dict[str, object],
+    source_duration: float,
+    deadline_seconds: float | None = None,
+    max_bytes: float | None = None,
+    on_status: Callable[[str], None] | None = None,
+    should_cancel: Callable[[], bool] | None = None,
+) -> dict[str, object]:
+    """Calibrate (or reuse the cached calibration) and pick preset and threads for this job."""
+    start = float(settings["trim_start"] or 0)
+    end = float(settings["trim_end"]) if settings["trim_end"] is not None else source_duration
+    calibration = calibrate(settings, source_duration, on_status=on_status, should_cancel=should_cancel)
+    return choose_setting(calibration, settings, end - start, deadline_seconds, max_bytes)
@@ -0,0 +1,275 @@
+from __future__ import annotations
+
+import itertools
+import multiprocessing
+import os
+import time
+import traceback
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+
+from conversion import DEFAULT_PIPELINE, run_conversion, scaled_size
+from converter import ConversionCancelled
+from mp4probe import source_metadata
+from streamcopy import is_trim_only
+
+
+# Seconds between progress messages from one worker. The UI polls the queue,
+# so there is no point in sending every frame across the process boundary.
+PROGRESS_INTERVAL = 0.25
+
+# Job states shown in the batch window.
+QUEUED = "Queued"
+RUNNING = "Running"
+DONE = "Done"
+FAILED = "Failed"
+CANCELLED = "Cancelled"
+
+
+def default_cpu_budget() -> int:
+    return os.cpu_count() or 1
+
+
+def split_cpu_budget(cpu_budget: int, max_workers: int) -> tuple[int, int]:
+    """Return (workers, x264 threads per job) so that their product stays within the budget."""
+    cpu_budget = max(1, cpu_budget)
+    workers = max(1, min(max_workers, cpu_budget))
+    return workers, max(1, cpu_budget // workers)
+
+
+def batch_output_path(input_path: Path, output_dir: Path) -> Path:
+    return output_dir / f"{input_path.stem}_converted.mp4"
+
+
+def build_job_settings(
+    input_path: str,
+    output_path: str,
+    bitrate: str | None,
+    fps: float,
+    scale: float,
+) -> dict[str, str | int | float | None]:
+    """
+    Settings for one batch file. Unlike the single-file form, batch jobs never
+    fail validation: FPS, size and bitrate are clamped to the source instead.
+    """
+    info = source_metadata(input_path)
+    source_fps = float(info["fps"])
+    source_width = int(info["width"])
+    source_height = int(info["height"])
+
+    width, height = scaled_size(source_width, source_height, scale)
+    source_kbps = float(info["bitrate_kbps"])
+    if bitrate is not None and source_kbps > 0 and float(bitrate.rstrip("k")) > source_kbps * 1.05:
+        bitrate = None
+
+    settings = {
+        "input_path": input_path,
+        "output_path": output_path,
+        "bitrate": bitrate,
+        "fps": min(fps, source_fps) if source_fps > 0 else fps,
+        "width": min(width, source_width),
+        "height": min(height, source_height),
+        "trim_start": 0.0,
+        "trim_end": None,
+        "source_duration": float(info["duration"]),
+        "pipeline": DEFAULT_PIPELINE,
+    }
+    settings["stream_copy"] = is_trim_only(settings, source_fps, source_width, source_height)
+    return settings
+
+
+def run_job(job_id: int, job: dict[str, object], threads: int, events, cancelled) -> None:
+    """Process-pool entry point. Progress goes to the shared events queue."""
+    if job_id in cancelled:
+        events.put(("cancelled", job_id, None, None))
+        return
+    events.put(("started", job_id, None, None))
+    output_path = Path(str(job["output_path"]))
+    last_sent = 0.0
+
+    def on_progress(progress: float, eta: float | None) -> None:
+        nonlocal last_sent
+        now = time.monotonic()
+        if now - last_sent >= PROGRESS_INTERVAL or progress >= 1:
+            last_sent = now
+            events.put(("progress", job_id, progress, eta))
+
+    try:
+        settings = build_job_settings(
+            str(job["input_path"]),
+            str(output_path),
+            job["bitrate"],
+            float(job["fps"]),
+            float(job["scale"]),
+        )
+        settings["threads"] = threads
+        run_conversion(settings, on_progress, should_cancel=lambda: job_id in cancelled)
+        events.put(("finished", job_id, None, None))
+    except ConversionCancelled:
+        output_path.unlink(missing_ok=True)
+        events.put(("cancelled", job_id, None, None))
+    except Exception as exc:
+        output_path.unlink(missing_ok=True)
+        events.put(("failed", job_id, f"{exc}\n\n{traceback.format_exc()}", None))
+
+
+class BatchQueue:
+    """
+    Runs conversion jobs on a process pool. The Tk side calls poll() from an
+    after() loop and gets back (kind, job_id, value, eta) events.
+    """
+
+    def __init__(self, max_workers: int = 2, cpu_budget: int | None = None) -> None:
+        self.max_workers = max_workers
+        self.cpu_budget = cpu_budget or default_cpu_budget()
+        self._ids = itertools.count(1)
+        self._executor: ProcessPoolExecutor | None = None
+        self._manager = None
+        self._events = None
+        self._cancelled = None
+        self._futures: dict[int, Future] = {}
+        self.jobs: dict[int, dict[str, object]] = {}
+
+    def configure(self, max_workers: int, cpu_budget: int) -> None:
+        """Takes effect when the pool is next started (after all current jobs finish)."""
+        self.max_workers = max(1, max_workers)
+        self.cpu_budget = max(1, cpu_budget)
+
+    def _ensure_pool(self) -> None:
+        if self._executor is not None:
+            return
+        # Spawn explicitly: forking a process that owns a Tk interpreter is unsafe,
+        # and it matches the default on Windows where the EXE is used.
+        context = multiprocessing.get_context("spawn")
+        if self._manager is None:
+            self._manager = context.Manager()
+            self._events = self._manager.Queue()
+            self._cancelled = self._manager.dict()
+        workers, self.threads_per_job = split_cpu_budget(self.cpu_budget, self.max_workers)
+        self._executor = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+
+    def submit(self, input_path: str, output_path: str, bitrate: str | None, fps: float, scale: float) -> int:
+        self._ensure_pool()
+        job_id = next(self._ids)
+        job = {
+            "input_path": input_path,
+            "output_path": output_path,
+            "bitrate": bitrate,
+            "fps": fps,
+            "scale": scale,
+            "state": QUEUED,
+            "progress": 0.0,
+            "eta": None,
+            "error": None,
+        }
+        self.jobs[job_id] = job
+        self._futures[job_id] = self._executor.submit(
+            run_job,
+            job_id,
+            {key: job[key] for key in ("input_path", "output_path", "bitrate", "fps", "scale")},
+            self.threads_per_job,
+            self._events,
+            self._cancelled,
+        )
+        return job_id
+
+    def cancel(self, job_id: int) -> None:
+        job = self.jobs.get(job_id)
+        if job is None or job["state"] not in (QUEUED, RUNNING):
+            return
+        future = self._futures.get(job_id)
+        if future is not None and future.cancel():
+            job["state"] = CANCELLED
+            return
+        # Already running: the worker checks this flag on every progress callback.
+        self._cancelled[job_id] = True
+
+    def cancel_all(self) -> None:
+        for job_id in list(self.jobs):
+            self.cancel(job_id)
+
+    def active_count(self) -> int:
+        return sum(job["state"] in (QUEUED, RUNNING) for job in self.jobs.values())
+
+    def poll(self) -> list[tuple[str, int, object, float | None]]:
+        events = []
+        if self._events is None:
+            return events
+        while not self._events.empty():
+            kind, job_id, value, eta = self._events.get_nowait()
+            job = self.jobs[job_id]
+            if kind == "started":
+                job["state"] = RUNNING
+            elif kind == "progress":
+                job["progress"] = value
+                job["eta"] = eta
+            elif kind == "finished":
+                job["state"] = DONE
+                job["progress"] = 1.0
+                job["eta"] = None
+            elif kind == "cancelled":
+                job["state"] = CANCELLED
+            elif kind == "failed":
+                job["state"] = FAILED
+                job["error"] = value
+            events.append((kind, job_id, value, eta))
+
+        # A worker that dies outright (e.g. killed) never reports back.
+        for job_id, future in self._futures.items():
+            job = self.jobs[job_id]
+            if future.done() and not future.cancelled() and job["state"] in (QUEUED, RUNNING):
+                error = future.exception()
+                if error is not None:
+                    job["state"] = FAILED
+                    job["error"] = str(error)
+                    events.append(("failed", job_id, job["error"], None))
+
+        if self._executor is not None and self.active_count() == 0:
+            # Let the next batch pick up new worker / CPU budget settings.
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        return events
+
+    def shutdown(self) -> None:
+        self.cancel_all()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+
+class FolderWatcher:
+    """
+    Polls a folder for new MP4 files. A file is reported once its size has
+    stayed the same across two polls, so recordings still being copied in are
+    not picked up half-written.
+    """
+
+    def __init__(self, folder: Path, output_dir: Path) -> None:
+        self.folder = folder
+        self.output_dir = output_dir
+        self._sizes: dict[Path, int] = {}
+        self._seen: set[Path] = set()
+
+    def poll(self) -> list[Path]:
+        ready = []
+        sizes = {}
+        # Not glob("*.mp4"): cameras often write .MP4, and glob is case-sensitive outside Windows.
+        for path in sorted(self.folder.iterdir()):
+            if path.suffix.lower() != ".mp4" or not path.is_file():
+                continue
+            if path in self._seen or path.stem.endswith("_converted"):
+                continue
+            try:
+                size = path.stat().st_size
+            except OSError:
+                continue
+            sizes[path] = size
+            if size > 0 and self._sizes.get(path) == size:
+                self._seen.add(path)
+                if not batch_output_path(path, self.output_dir).exists():
+                    ready.append(path)
+        self._sizes = sizes
+        return ready
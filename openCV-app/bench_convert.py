@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bench_frames import peak_rss_bytes
+
+
+APP_DIR = Path(__file__).resolve().parent
+
+# name -> (width, height, fps, seconds)
+CLIPS = {
+    "360p30": (640, 360, 30, 10),
+    "720p30": (1280, 720, 30, 10),
+    "1080p30": (1920, 1080, 30, 6),
+    "1080p60": (1920, 1080, 60, 4),
+}
+QUICK_CLIPS = ("360p30", "720p30")
+
+# Bitrate the synthesised sources are encoded at; cases must stay below it.
+SOURCE_BITRATE = "8000k"
+
+# name -> overrides of the conversion settings. "scale" is relative to the source,
+# "trim" is a (start, end) fraction of the duration.
+CASES = {
+    "reencode": {"bitrate": "3000k"},
+    "resize-50": {"bitrate": "1500k", "scale": 0.5},
+    "resize-50-frames": {"bitrate": "1500k", "scale": 0.5, "pipeline": "frames"},
+    "resize-50-moviepy": {"bitrate": "1500k", "scale": 0.5, "pipeline": "moviepy"},
+    "trim-only": {"bitrate": None, "trim": (0.25, 0.75)},
+    "preset-ultrafast": {"bitrate": "3000k", "preset": "ultrafast"},
+    "preset-slow": {"bitrate": "3000k", "preset": "slow"},
+}
+
+# Slower than the baseline by more than this fraction counts as a regression.
+DEFAULT_TOLERANCE = 0.15
+
+
+def synthesise(path: Path, width: int, height: int, fps: float, seconds: float) -> None:
+    """
+    A clip x264 has to work for: a colour field that drifts over time plus
+    per-pixel noise, with a sine tone as AAC audio. Seeded, so every run
+    encodes the same frames.
+    """
+    import numpy as np
+    from moviepy import AudioClip, ColorClip, VideoClip
+
+    background = ColorClip((width, height), color=(40, 90, 160), duration=seconds)
+    rng = np.random.default_rng(0)
+    noise = [rng.integers(0, 48, (height, width, 1), dtype=np.uint8) for _ in range(8)]
+    ramp = np.linspace(0, 255, width, dtype=np.float32)[None, :, None]
+
+    def frame_function(t: float):
+        base = background.get_frame(t).astype(np.float32)
+        shift = (ramp + t * 40) % 255
+        frame = base * 0.6 + shift * 0.4
+        return (frame + noise[int(t * fps) % len(noise)]).clip(0, 255).astype(np.uint8)
+
+    def sound(t):
+        return np.sin(2 * np.pi * 440 * t)
+
+    clip = VideoClip(frame_function, duration=seconds).with_audio(AudioClip(sound, duration=seconds, fps=44100))
+    clip.write_videofile(
+        str(path),
+        fps=fps,
+        codec="libx264",
+        bitrate=SOURCE_BITRATE,
+        audio_codec="aac",
+        preset="ultrafast",
+        logger=None,
+    )
+
+
+def source_clip(work_dir: Path, name: str) -> Path:
+    """Synthesised once per work folder and reused by later runs."""
+    width, height, fps, seconds = CLIPS[name]
+    path = work_dir / f"source-{name}.mp4"
+    if not path.exists():
+        synthesise(path, width, height, fps, seconds)
+    return path
+
+
+def child_peak_rss_bytes() -> int | None:
+    """
+    Peak RSS of the largest finished child process (the ffmpeg encoders). On
+    Linux this is at least the RSS of this process when it started them.
+    """
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run_case(source: Path, output: Path, case: dict[str, object]) -> dict[str, object]:
+    """One conversion, in this process. Runs in a child so peak memory is per case."""
+    from conversion import build_settings, run_conversion, scaled_size
+    from metrics import ConversionMetrics
+    from mp4probe import probe, source_metadata
+
+    info = source_metadata(source)
+    duration = float(info["duration"])
+    width, height = int(info["width"]), int(info["height"])
+    if case.get("scale", 1.0) != 1.0:
+        width, height = scaled_size(width, height, float(case["scale"]))
+    start_fraction, end_fraction = case.get("trim", (0.0, None))
+    trim_start = duration * start_fraction
+    trim_end = duration * end_fraction if end_fraction is not None else None
+    settings = build_settings(
+        source,
+        output,
+        info,
+        case["bitrate"],
+        float(info["fps"]),
+        width,
+        height,
+        trim_start,
+        trim_end,
+        pipeline=str(case.get("pipeline", "ffmpeg")),
+    )
+    if "preset" in case:
+        settings["preset"] = case["preset"]
+
+    metrics = ConversionMetrics()
+    started = time.perf_counter()
+    note = run_conversion(settings, metrics=metrics)
+    elapsed = time.perf_counter() - started
+
+    output_duration = (trim_end if trim_end is not None else duration) - trim_start
+    result = probe(output)
+    target_kbps = float(str(case["bitrate"]).rstrip("k")) if case["bitrate"] is not None else None
+    video_kbps = float(result["video_bitrate_kbps"])
+    return {
+        "seconds": round(elapsed, 3),
+        "realtime_factor": round(output_duration / elapsed, 2) if elapsed > 0 else 0.0,
+        "output_duration": round(float(result["duration"]), 3),
+        "video_kbps": round(video_kbps, 1),
+        "target_kbps": target_kbps,
+        # Achieved / requested video bitrate; 1.0 is exact.
+        "bitrate_accuracy": round(video_kbps / target_kbps, 3) if target_kbps else None,
+        "peak_rss_bytes": peak_rss_bytes(),
+        "peak_child_rss_bytes": child_peak_rss_bytes(),
+        "stages": metrics.summary()["stages"],
+        "note": note,
+    }
+
+
+def compare(results: list[dict[str, object]], baseline: dict[str, object], tolerance: float) -> list[str]:
+    """Cases that got slower than the baseline by more than the tolerance."""
+    previous = {(entry["clip"], entry["case"]): entry for entry in baseline.get("results", [])}
+    regressions = []
+    for entry in results:
+        old = previous.get((entry["clip"], entry["case"]))
+        if old is None or "seconds" not in old or "seconds" not in entry:
+            continue
+        entry["baseline_seconds"] = old["seconds"]
+        entry["change"] = round(entry["seconds"] / old["seconds"] - 1, 3) if old["seconds"] else None
+        if entry["change"] is not None and entry["change"] > tolerance:
+            regressions.append(
+                f"{entry['clip']} {entry['case']}: {entry['seconds']:.2f}s vs {old['seconds']:.2f}s "
+                f"({entry['change']:+.0%})"
+            )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Convert synthesised clips with each conversion path and record speed, "
+        "bitrate accuracy and memory. Needs no display."
+    )
+    parser.add_argument("--clips", nargs="+", choices=list(CLIPS), help="default: all (or --quick)")
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), help="default: all")
+    parser.add_argument("--quick", action="store_true", help=f"only {', '.join(QUICK_CLIPS)}")
+    parser.add_argument("--work-dir", type=Path, help="keep synthesised sources here between runs")
+    parser.add_argument("--json", type=Path, help="write the results to this file")
+    parser.add_argument("--baseline", type=Path, help="results of an earlier run to compare wall times with")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="allowed slowdown (default: 0.15)")
+    parser.add_argument("--child", nargs=3, metavar=("SOURCE", "OUTPUT", "CASE"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        source, output, case = args.child
+        print(json.dumps(run_case(Path(source), Path(output), CASES[case])))
+        return 0
+
+    clips = args.clips or (list(QUICK_CLIPS) if args.quick else list(CLIPS))
+    cases = args.cases or list(CASES)
+    results = []
+    with tempfile.TemporaryDirectory() as temp:
+        work_dir = args.work_dir or Path(temp)
+        work_dir.mkdir(parents=True, exist_ok=True)
+        for clip in clips:
+            source = source_clip(work_dir, clip)
+            for case in cases:
+                output = Path(temp) / f"{clip}-{case}.mp4"
+                completed = subprocess.run(
+                    [sys.executable, __file__, "--child", str(source), str(output), case],
+                    cwd=APP_DIR,
+                    capture_output=True,
+                    text=True,
+                )
+                entry: dict[str, object] = {"clip": clip, "case": case}
+                if completed.returncode == 0:
+                    entry.update(json.loads(completed.stdout.strip().splitlines()[-1]))
+                else:
+                    entry["error"] = completed.stderr.strip().splitlines()[-1:] or ["failed"]
+                results.append(entry)
+                output.unlink(missing_ok=True)
+                print(_describe(entry), flush=True)
+
+    regressions = []
+    if args.baseline is not None:
+        regressions = compare(results, json.loads(args.baseline.read_text(encoding="utf-8")), args.tolerance)
+    report = {
+        "python": sys.version.split()[0],
+        "clips": {name: CLIPS[name] for name in clips},
+        "results": results,
+        "regressions": regressions,
+    }
+    if args.json is not None:
+        args.json.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    for regression in regressions:
+        print(f"SLOWER: {regression}")
+    failed = any("error" in entry for entry in results)
+    return 1 if regressions or failed else 0
+
+
+def _describe(entry: dict[str, object]) -> str:
+    label = f"{entry['clip']:8} {entry['case']:18}"
+    if "error" in entry:
+        return f"{label} FAILED {' '.join(entry['error'])}"
+    accuracy = f"{entry['bitrate_accuracy']:.2f}x bitrate" if entry["bitrate_accuracy"] is not None else "source quality"
+    rss = entry["peak_rss_bytes"]
+    memory = f"{rss / 1024 / 1024:.0f} MB" if rss is not None else "n/a"
+    return f"{label} {entry['seconds']:7.2f}s  {entry['realtime_factor']:6.2f}x realtime  {accuracy}  peak {memory}"
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from ffmpeg_cli import ffmpeg_exe, video_filter
+from framepipe import BYTES_PER_PIXEL, PIXEL_FORMAT, RING_SIZE, convert_frames
+
+
+APP_DIR = Path(__file__).resolve().parent
+
+MODES = ("copying", "ring")
+
+
+def peak_rss_bytes() -> int | None:
+    """Peak resident set size of this process (ffmpeg children excluded); None where unsupported."""
+    # Linux keeps ru_maxrss across exec, so a child started by a big parent
+    # would report the parent's peak. VmHWM belongs to this process image only.
+    try:
+        with open("/proc/self/status", encoding="ascii") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def synthesise(path: Path, width: int, height: int, fps: float, seconds: float) -> None:
+    subprocess.run(
+        [
+            ffmpeg_exe(), "-hide_banner", "-v", "error", "-y",
+            "-f", "lavfi", "-i", f"testsrc2=size={width}x{height}:rate={fps}",
+            "-t", f"{seconds}", "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p",
+            str(path),
+        ],
+        check=True,
+    )
+
+
+def run_copying(settings: dict[str, object]) -> dict[str, float | int]:
+    """
+    The usual way frames pass through Python (as MoviePy's reader and writer
+    do): read() returns a new bytes object per frame, which is then written on.
+    """
+    width, height = int(settings["width"]), int(settings["height"])
+    frame_bytes = width * height * BYTES_PER_PIXEL
+    decoder = subprocess.Popen(
+        [
+            ffmpeg_exe(), "-hide_banner", "-v", "error", "-i", str(settings["input_path"]),
+            "-vf", video_filter(settings), "-f", "rawvideo", "-pix_fmt", PIXEL_FORMAT, "pipe:1",
+        ],
+        stdout=subprocess.PIPE,
+    )
+    encoder = subprocess.Popen(
+        [
+            ffmpeg_exe(), "-hide_banner", "-v", "error", "-y",
+            "-f", "rawvideo", "-pix_fmt", PIXEL_FORMAT, "-s", f"{width}x{height}", "-r", str(settings["fps"]),
+            "-i", "pipe:0", "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p",
+            str(settings["output_path"]),
+        ],
+        stdin=subprocess.PIPE,
+    )
+    frames = 0
+    while True:
+        frame = decoder.stdout.read(frame_bytes)
+        if len(frame) < frame_bytes:
+            break
+        encoder.stdin.write(frame)
+        frames += 1
+    encoder.stdin.close()
+    encoder.wait()
+    decoder.wait()
+    return {"frames": frames, "buffer_bytes": frames * frame_bytes}
+
+
+def run_ring(settings: dict[str, object]) -> dict[str, float | int]:
+    return convert_frames(dict(settings, preset="ultrafast"))
+
+
+def child(mode: str, settings: dict[str, object]) -> dict[str, object]:
+    tracemalloc.start()
+    started = time.perf_counter()
+    stats = run_copying(settings) if mode == "copying" else run_ring(settings)
+    elapsed = time.perf_counter() - started
+    _current, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "mode": mode,
+        "seconds": round(elapsed, 3),
+        "fps": round(stats["frames"] / elapsed, 1) if elapsed > 0 else 0.0,
+        "peak_rss_bytes": peak_rss_bytes(),
+        "traced_peak_bytes": traced_peak,
+        # Frame-sized buffers allocated over the run: one per frame when
+        # copying, a fixed ring otherwise. This is the allocator churn.
+        "frame_bytes_allocated": stats["buffer_bytes"],
+        "stats": stats,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Compare a copying frame loop with the preallocated ring pipeline: "
+        "speed, peak RSS and frame buffer allocations."
+    )
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--json", type=Path, help="also write the results to this file")
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--settings", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        # Each mode runs in its own process so peak RSS is not shared between them.
+        print(json.dumps(child(args.child, json.loads(args.settings))))
+        return 0
+
+    with tempfile.TemporaryDirectory() as folder:
+        source = Path(folder) / "source.mp4"
+        synthesise(source, args.width, args.height, args.fps, args.seconds)
+        settings = {
+            "input_path": str(source),
+            "output_path": str(Path(folder) / "output.mp4"),
+            "bitrate": None,
+            "fps": args.fps,
+            "width": args.width,
+            "height": args.height,
+            "trim_start": 0.0,
+            "trim_end": None,
+        }
+        results = []
+        for mode in MODES:
+            output = subprocess.run(
+                [sys.executable, __file__, "--child", mode, "--settings", json.dumps(settings)],
+                cwd=APP_DIR,
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            results.append(json.loads(output.stdout))
+
+    report = {
+        "source": {"width": args.width, "height": args.height, "fps": args.fps, "seconds": args.seconds},
+        "ring_size": RING_SIZE,
+        "results": results,
+    }
+    if args.json is not None:
+        args.json.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    for result in results:
+        rss = result["peak_rss_bytes"]
+        rss_text = f"{rss / 1024 / 1024:.0f} MB" if rss is not None else "n/a"
+        print(
+            f"{result['mode']:8} {result['fps']:7.1f} fps  peak RSS {rss_text}  "
+            f"frame buffers allocated {result['frame_bytes_allocated'] / 1024 / 1024:.0f} MB"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+
+APP_DIR = Path(__file__).resolve().parent
+
+# Modules the CLI must not load just to start: they are what makes the GUI slow to open.
+HEAVY_MODULES = ("tkinter", "PIL", "moviepy", "numpy", "imageio")
+
+DEFAULT_RUNS = 5
+DEFAULT_CLI_BUDGET = 0.5
+DEFAULT_WINDOW_BUDGET = 2.0
+
+_IMPORT_CHECK = (
+    "import sys, cli; "
+    f"print(','.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))"
+)
+
+
+def _time_process(args: list[str], env: dict[str, str] | None = None) -> tuple[float, subprocess.CompletedProcess]:
+    started = time.perf_counter()
+    result = subprocess.run(args, cwd=APP_DIR, env=env, capture_output=True, text=True)
+    return time.perf_counter() - started, result
+
+
+def time_to_cli_ready(runs: int) -> dict[str, object]:
+    """Median wall time of `cli.py --help`, plus the heavy modules importing cli pulled in."""
+    times = []
+    for _ in range(runs):
+        elapsed, result = _time_process([sys.executable, "cli.py", "--help"])
+        if result.returncode != 0:
+            raise RuntimeError(f"cli.py --help failed:\n{result.stderr}")
+        times.append(elapsed)
+
+    _elapsed, result = _time_process([sys.executable, "-c", _IMPORT_CHECK])
+    if result.returncode != 0:
+        raise RuntimeError(f"import cli failed:\n{result.stderr}")
+    loaded = [name for name in result.stdout.strip().split(",") if name]
+    return {"seconds": statistics.median(times), "runs": times, "heavy_modules": loaded}
+
+
+def time_to_first_window(runs: int) -> dict[str, object]:
+    """Median wall time from launching main.py until its first window has been drawn."""
+    env = dict(os.environ)
+    env["MP4CONVERTER_FIRST_WINDOW_PROBE"] = "1"
+    times = []
+    for _ in range(runs):
+        elapsed, result = _time_process([sys.executable, "main.py"], env)
+        if result.returncode != 0:
+            # No display (CI, SSH) is not a regression; report it instead of failing.
+            return {"seconds": None, "skipped": result.stderr.strip().splitlines()[-1:]}
+        times.append(elapsed)
+    return {"seconds": statistics.median(times), "runs": times}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Check time-to-CLI-ready and time-to-first-window against a budget.")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help=f"launches per measurement (default: {DEFAULT_RUNS})")
+    parser.add_argument("--cli-budget", type=float, default=DEFAULT_CLI_BUDGET, help="seconds (default: %(default)s)")
+    parser.add_argument("--window-budget", type=float, default=DEFAULT_WINDOW_BUDGET, help="seconds (default: %(default)s)")
+    parser.add_argument("--json", type=Path, help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    cli = time_to_cli_ready(args.runs)
+    window = time_to_first_window(args.runs)
+    failures = []
+    if cli["seconds"] > args.cli_budget:
+        failures.append(f"CLI ready in {cli['seconds']:.3f}s, budget {args.cli_budget}s")
+    if cli["heavy_modules"]:
+        failures.append(f"importing cli loads {', '.join(cli['heavy_modules'])}")
+    if window["seconds"] is not None and window["seconds"] > args.window_budget:
+        failures.append(f"first window in {window['seconds']:.3f}s, budget {args.window_budget}s")
+
+    results = {
+        "python": sys.version.split()[0],
+        "cli_ready": cli,
+        "first_window": window,
+        "budgets": {"cli_ready": args.cli_budget, "first_window": args.window_budget},
+        "failures": failures,
+    }
+    if args.json is not None:
+        args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    print(f"CLI ready:    {cli['seconds']:.3f}s (budget {args.cli_budget}s)")
+    if window["seconds"] is None:
+        print(f"First window: skipped ({' '.join(window['skipped']) or 'no display'})")
+    else:
+        print(f"First window: {window['seconds']:.3f}s (budget {args.window_budget}s)")
+    for failure in failures:
+        print(f"OVER BUDGET: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
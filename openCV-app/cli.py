@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import sys
+import time
+from pathlib import Path
+
+from batch import CANCELLED, DONE, FAILED, BatchQueue, batch_output_path, default_cpu_budget
+from conversion import DEFAULT_PIPELINE, PIPELINES, build_settings, check_paths, format_duration, run_conversion, scaled_size
+from metrics import ConversionMetrics
+from mp4probe import source_metadata
+
+
+# Command-line names for the GUI's quality choices.
+QUALITIES = {
+    "low": "800k",
+    "medium": "1500k",
+    "high": "3000k",
+    "source": None,
+}
+
+# Seconds between progress lines on stderr (run_conversion already limits the rate for UIs).
+PRINT_INTERVAL = 0.5
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="mp4convert",
+        description="Convert MP4 files without the GUI. One input converts in this process; "
+        "several inputs run as a batch on a process pool.",
+    )
+    parser.add_argument("inputs", nargs="+", type=Path, help="input MP4 files")
+    parser.add_argument("-o", "--output", type=Path, help="output file (single input only)")
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        help="folder for <name>_converted.mp4 outputs (default: next to each input)",
+    )
+    parser.add_argument("--quality", choices=list(QUALITIES), default="source", help="target bitrate (default: source)")
+    parser.add_argument("--fps", type=float, help="output FPS (default: source FPS)")
+    parser.add_argument("--scale", type=float, default=1.0, help="output size as a fraction of the source (default: 1)")
+    parser.add_argument("--start", type=float, default=0.0, help="trim start in seconds (single input only)")
+    parser.add_argument("--end", type=float, help="trim end in seconds (single input only)")
+    parser.add_argument("--frame-exact", action="store_true", help="cut stream-copied trims at the exact start frame")
+    parser.add_argument("--segments", type=int, default=1, help="encode as this many parallel segments (single input only)")
+    speed = parser.add_mutually_exclusive_group()
+    speed.add_argument("--finish-within", type=float, metavar="MIN", help="pick the encoder preset to finish in MIN minutes")
+    speed.add_argument("--max-size", type=float, metavar="MB", help="pick the fastest encoder preset that fits in MB")
+    parser.add_argument(
+        "--pipeline",
+        choices=PIPELINES,
+        default=DEFAULT_PIPELINE,
+        help="ffmpeg: one filter graph; frames: raw frames through Python buffers; moviepy: MoviePy "
+        "(default: %(default)s)",
+    )
+    parser.add_argument("--workers", type=int, default=2, help="parallel batch jobs (default: 2)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="only print errors")
+    return parser
+
+
+def _check_arguments(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    if len(args.inputs) > 1:
+        single_only = [
+            name
+            for name, used in (
+                ("--output", args.output is not None),
+                ("--start", args.start != 0),
+                ("--end", args.end is not None),
+                ("--segments", args.segments != 1),
+                ("--finish-within", args.finish_within is not None),
+                ("--max-size", args.max_size is not None),
+            )
+            if used
+        ]
+        if single_only:
+            parser.error(f"{', '.join(single_only)} can only be used with a single input.")
+    if not 0 < args.scale <= 1:
+        parser.error("--scale must be greater than 0 and at most 1.")
+    if args.fps is not None and args.fps <= 0:
+        parser.error("--fps must be greater than 0.")
+    if args.segments < 1 or args.workers < 1:
+        parser.error("--segments and --workers must be at least 1.")
+    if args.output_dir is not None and not args.output_dir.is_dir():
+        parser.error("--output-dir does not exist.")
+
+
+def _output_for(input_path: Path, args: argparse.Namespace) -> Path:
+    if args.output is not None:
+        return args.output
+    return batch_output_path(input_path, args.output_dir or input_path.parent)
+
+
+def _log(args: argparse.Namespace, message: str) -> None:
+    if not args.quiet:
+        print(message, file=sys.stderr, flush=True)
+
+
+def convert_one(args: argparse.Namespace) -> int:
+    input_path, output_path = check_paths(str(args.inputs[0]), str(_output_for(args.inputs[0], args)))
+    source = source_metadata(input_path)
+    width, height = int(source["width"]), int(source["height"])
+    if args.scale != 1:
+        width, height = scaled_size(width, height, args.scale)
+    speed_mode, speed_target = None, None
+    if args.finish_within is not None:
+        speed_mode, speed_target = "deadline", args.finish_within
+    elif args.max_size is not None:
+        speed_mode, speed_target = "size", args.max_size
+
+    settings = build_settings(
+        input_path,
+        output_path,
+        source,
+        QUALITIES[args.quality],
+        args.fps if args.fps is not None else float(source["fps"]),
+        width,
+        height,
+        args.start,
+        args.end,
+        args.frame_exact,
+        args.segments,
+        speed_mode,
+        speed_target,
+        args.pipeline,
+    )
+
+    last_printed = 0.0
+
+    def on_progress(progress: float, eta: float | None) -> None:
+        nonlocal last_printed
+        now = time.monotonic()
+        if now - last_printed < PRINT_INTERVAL and progress < 1:
+            return
+        last_printed = now
+        remaining = format_duration(eta) if eta is not None else "calculating"
+        _log(args, f"{input_path.name}: {progress * 100:.1f}% / ETA {remaining}")
+
+    metrics = ConversionMetrics()
+    try:
+        note = run_conversion(settings, on_progress, on_status=lambda text: _log(args, text), metrics=metrics)
+    except BaseException:
+        output_path.unlink(missing_ok=True)
+        raise
+    _log(args, f"Wrote {output_path}")
+    if note:
+        _log(args, note)
+    _log(args, f"Time per stage: {metrics.describe()}")
+    if metrics.report_path is not None:
+        _log(args, f"Report: {metrics.report_path}")
+    return 0
+
+
+def convert_many(args: argparse.Namespace) -> int:
+    inputs = []
+    for input_path in args.inputs:
+        try:
+            inputs.append(check_paths(str(input_path), str(_output_for(input_path, args))))
+        except ValueError as exc:
+            print(f"{input_path}: {exc}", file=sys.stderr)
+            return 1
+
+    queue = BatchQueue(max_workers=args.workers, cpu_budget=default_cpu_budget())
+    names = {}
+    try:
+        for input_path, output_path in inputs:
+            # Batch jobs clamp FPS to the source, so "no FPS given" is just no upper limit.
+            fps = args.fps if args.fps is not None else float("inf")
+            job_id = queue.submit(str(input_path), str(output_path), QUALITIES[args.quality], fps, args.scale)
+            names[job_id] = input_path.name
+
+        while queue.active_count():
+            time.sleep(PRINT_INTERVAL)
+            for kind, job_id, value, eta in queue.poll():
+                if kind == "progress":
+                    remaining = format_duration(eta) if eta is not None else "calculating"
+                    _log(args, f"{names[job_id]}: {float(value) * 100:.1f}% / ETA {remaining}")
+                elif kind == "failed":
+                    print(f"{names[job_id]}: failed\n{value}", file=sys.stderr)
+                elif kind != "started":
+                    _log(args, f"{names[job_id]}: {queue.jobs[job_id]['state'].lower()}")
+    finally:
+        queue.shutdown()
+
+    states = [job["state"] for job in queue.jobs.values()]
+    _log(args, f"{states.count(DONE)} done, {states.count(FAILED)} failed, {states.count(CANCELLED)} cancelled.")
+    return 0 if all(state == DONE for state in states) else 1
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    _check_arguments(parser, args)
+    try:
+        if len(args.inputs) == 1:
+            return convert_one(args)
+        return convert_many(args)
+    except KeyboardInterrupt:
+        print("Cancelled.", file=sys.stderr)
+        return 130
+    except Exception as exc:
+        print(f"Conversion failed: {exc}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    # Needed for the process pool when running as a frozen (PyInstaller) EXE.
+    multiprocessing.freeze_support()
+    sys.exit(main())
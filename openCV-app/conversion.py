@@ -0,0 +1,350 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from pathlib import Path
+
+from autotune import tune
+from converter import ConversionCancelled, ConversionProgressLogger, convert_video
+from ffmpeg_cli import ProgressCallback, audio_args, audio_passthrough, run_ffmpeg
+from framepipe import convert_frames
+from metrics import ConversionMetrics, ProgressThrottle, write_report
+from mp4probe import trim_source_info
+from native import convert_native
+from segments import convert_segmented
+from streamcopy import StreamCopyUnsupported, is_trim_only, stream_copy_trim
+
+
+QUALITY_BITRATES = {
+    "Low - 800k": "800k",
+    "Medium - 1500k": "1500k",
+    "High - 3000k": "3000k",
+    "Keep close to source": None,
+}
+
+SIZE_SCALES = {
+    "Original": 1.0,
+    "75%": 0.75,
+    "50%": 0.5,
+    "25%": 0.25,
+}
+
+# "ffmpeg" runs trim, FPS, scale and encode as one ffmpeg filter graph;
+# "frames" passes raw frames through preallocated buffers between a decoder
+# and an encoder process (the base for per-frame processing such as overlays);
+# "moviepy" resizes every frame in Python (slowest, kept as a fallback).
+PIPELINES = ("ffmpeg", "frames", "moviepy")
+DEFAULT_PIPELINE = "ffmpeg"
+
+DEFAULT_PRESET = "medium"
+DEFAULT_THREADS = 4
+
+Settings = dict[str, str | int | float | None]
+
+
+def format_number(value: float) -> str:
+    return f"{value:.2f}".rstrip("0").rstrip(".")
+
+
+def format_duration(seconds: float) -> str:
+    total_seconds = max(0, int(round(seconds)))
+    minutes, remaining_seconds = divmod(total_seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours:d}:{minutes:02d}:{remaining_seconds:02d}"
+    return f"{minutes:d}:{remaining_seconds:02d}"
+
+
+def parse_positive_int(value: str, label: str) -> int:
+    try:
+        number = int(value)
+    except ValueError as exc:
+        raise ValueError(f"{label} must be an integer.") from exc
+    if number <= 0:
+        raise ValueError(f"{label} must be greater than 0.")
+    return number
+
+
+def parse_positive_float(value: str, label: str) -> float:
+    try:
+        number = float(value)
+    except ValueError as exc:
+        raise ValueError(f"{label} must be a number.") from exc
+    if number <= 0:
+        raise ValueError(f"{label} must be greater than 0.")
+    return number
+
+
+def parse_non_negative_float(value: str, label: str) -> float:
+    try:
+        number = float(value or "0")
+    except ValueError as exc:
+        raise ValueError(f"{label} must be a number.") from exc
+    if number < 0:
+        raise ValueError(f"{label} must be 0 or greater.")
+    return number
+
+
+def parse_optional_positive_float(value: str, label: str) -> float | None:
+    if not value.strip():
+        return None
+    return parse_positive_float(value, label)
+
+
+def scaled_size(width: int, height: int, scale: float) -> tuple[int, int]:
+    """Scale and round to even numbers, as x264 needs for 4:2:0 output."""
+    return max(2, int(round(width * scale / 2) * 2)), max(2, int(round(height * scale / 2) * 2))
+
+
+def size_presets(width: int, height: int) -> dict[str, tuple[int, int]]:
+    if width <= 0 or height <= 0:
+        return {"Original": (0, 0)}
+
+    presets: dict[str, tuple[int, int]] = {}
+    for label, scale in SIZE_SCALES.items():
+        preset_width, preset_height = scaled_size(width, height, scale)
+        name = f"{label} - {preset_width} x {preset_height}" if label != "Original" else f"Original - {width} x {height}"
+        presets[name] = (preset_width, preset_height)
+    return presets
+
+
+def check_paths(input_text: str, output_text: str) -> tuple[Path, Path]:
+    input_path = Path(input_text)
+    output_path = Path(output_text)
+
+    if not input_text:
+        raise ValueError("Input MP4 file is required.")
+    if not input_path.exists():
+        raise ValueError("Input MP4 file does not exist.")
+    if input_path.suffix.lower() != ".mp4":
+        raise ValueError("Input file must be an MP4 file.")
+    if not output_text:
+        raise ValueError("Output MP4 path is required.")
+    if output_path.suffix.lower() != ".mp4":
+        raise ValueError("Output file must use the .mp4 extension.")
+    if output_path.resolve() == input_path.resolve():
+        raise ValueError("Output file must be different from the input file.")
+    if not output_path.parent.exists():
+        raise ValueError("Output folder does not exist.")
+    return input_path, output_path
+
+
+def check_downconvert(source: dict[str, object], bitrate: str | None, fps: float, width: int, height: int) -> None:
+    """Output may not exceed the source in FPS, size or bitrate."""
+    source_fps = float(source["fps"])
+    source_width = int(source["width"])
+    source_height = int(source["height"])
+    source_bitrate_kbps = float(source["bitrate_kbps"])
+
+    if source_fps > 0 and fps > source_fps + 0.01:
+        raise ValueError(
+            f"FPS cannot exceed the input FPS. Input: {format_number(source_fps)}, "
+            f"requested: {format_number(fps)}."
+        )
+
+    if source_width > 0 and width > source_width:
+        raise ValueError(f"Output width cannot exceed the input width. Input: {source_width}, requested: {width}.")
+    if source_height > 0 and height > source_height:
+        raise ValueError(
+            f"Output height cannot exceed the input height. Input: {source_height}, requested: {height}."
+        )
+
+    selected_bitrate = float(bitrate.rstrip("k")) if bitrate is not None else None
+    if selected_bitrate is not None and source_bitrate_kbps > 0 and selected_bitrate > source_bitrate_kbps * 1.05:
+        raise ValueError(
+            "Quality bitrate cannot exceed the input video's bitrate. "
+            f"Input: {format_number(source_bitrate_kbps)} kbps, "
+            f"requested: {format_number(selected_bitrate)} kbps."
+        )
+
+
+def check_trim(trim_start: float, trim_end: float | None, duration: float) -> None:
+    if trim_end is not None and trim_end <= trim_start:
+        raise ValueError("Trim end must be greater than trim start.")
+    if duration > 0 and trim_start >= duration:
+        raise ValueError("Trim start must be less than the video duration.")
+    if duration > 0 and trim_end is not None and trim_end > duration:
+        raise ValueError("Trim end must not exceed the video duration.")
+
+
+def build_settings(
+    input_path: Path,
+    output_path: Path,
+    source: dict[str, object],
+    bitrate: str | None,
+    fps: float,
+    width: int,
+    height: int,
+    trim_start: float = 0.0,
+    trim_end: float | None = None,
+    frame_exact: bool = False,
+    segments: int = 1,
+    speed_mode: str | None = None,
+    speed_target: float | None = None,
+    pipeline: str = DEFAULT_PIPELINE,
+) -> Settings:
+    """Validate one single-file job against its source metadata and return its settings."""
+    check_downconvert(source, bitrate, fps, width, height)
+    check_trim(trim_start, trim_end, float(source["duration"]))
+
+    settings: Settings = {
+        "input_path": str(input_path),
+        "output_path": str(output_path),
+        "bitrate": bitrate,
+        "fps": fps,
+        "width": width,
+        "height": height,
+        "trim_start": trim_start,
+        "trim_end": trim_end,
+        "frame_exact": frame_exact,
+        "segments": segments,
+        "speed_mode": speed_mode,
+        "speed_target": speed_target,
+        "pipeline": pipeline,
+        "preset": DEFAULT_PRESET,
+        "threads": DEFAULT_THREADS,
+        "source_duration": float(source["duration"]),
+    }
+    settings["stream_copy"] = is_trim_only(settings, float(source["fps"]), int(source["width"]), int(source["height"]))
+    return settings
+
+
+def tune_encoder(
+    settings: Settings,
+    on_status: Callable[[str], None] | None = None,
+    should_cancel: Callable[[], bool] | None = None,
+) -> str:
+    """Set preset and threads from the auto-tuner and describe the choice."""
+    target = float(settings["speed_target"])
+    choice = tune(
+        settings,
+        float(settings["source_duration"]),
+        deadline_seconds=target * 60 if settings["speed_mode"] == "deadline" else None,
+        max_bytes=target * 1024 * 1024 if settings["speed_mode"] == "size" else None,
+        on_status=on_status,
+        should_cancel=should_cancel,
+    )
+    settings["preset"] = choice["preset"]
+    settings["threads"] = choice["threads"]
+    return (
+        f"Encoder: preset {choice['preset']}, {choice['threads']} threads "
+        f"(predicted {format_duration(float(choice['seconds']))}, "
+        f"{format_number(float(choice['bytes']) / 1024 / 1024)} MB)."
+    )
+
+
+def stream_copy_note(settings: Settings, start: float) -> str:
+    requested = float(settings["trim_start"] or 0)
+    if start < requested:
+        return (
+            "Streams were copied without re-encoding. The start moved back to the keyframe at "
+            f"{format_number(start)}s; enable frame-exact trim to cut at {format_number(requested)}s."
+        )
+    return "Streams were copied without re-encoding."
+
+
+def run_conversion(
+    settings: Settings,
+    on_progress: ProgressCallback | None = None,
+    should_cancel: Callable[[], bool] | None = None,
+    on_status: Callable[[str], None] | None = None,
+    metrics: ConversionMetrics | None = None,
+) -> str | None:
+    """
+    Convert one file by the fastest path its settings allow: stream copy for
+    trim-only jobs, parallel segments when asked for, otherwise one ffmpeg
+    filter graph (or MoviePy, if the settings ask for that pipeline).
+    Returns a note for the user about how it was done, if there is one.
+    Progress is throttled for the UI, and stage metrics are collected into
+    metrics (if given) and saved as a JSON report either way.
+    """
+    metrics = metrics if metrics is not None else ConversionMetrics()
+    if on_progress is not None:
+        on_progress = ProgressThrottle(on_progress)
+    try:
+        note = _run_conversion(settings, on_progress, should_cancel, on_status, metrics)
+    except ConversionCancelled:
+        write_report(metrics, settings, "cancelled")
+        raise
+    except Exception as exc:
+        write_report(metrics, settings, "failed", str(exc))
+        raise
+    write_report(metrics, settings, "done")
+    return note
+
+
+def _run_conversion(
+    settings: Settings,
+    on_progress: ProgressCallback | None,
+    should_cancel: Callable[[], bool] | None,
+    on_status: Callable[[str], None] | None,
+    metrics: ConversionMetrics,
+) -> str | None:
+    if settings.get("stream_copy"):
+        # Same size, FPS and quality: remux the trimmed range instead of
+        # decoding and re-encoding every frame.
+        try:
+            with metrics.stage("copy"):
+                start = stream_copy_trim(
+                    settings, on_progress, should_cancel, frame_exact=bool(settings.get("frame_exact"))
+                )
+            return stream_copy_note(settings, start)
+        except StreamCopyUnsupported:
+            pass
+
+    note = None
+    if settings.get("speed_mode"):
+        with metrics.stage("calibrate"):
+            note = tune_encoder(settings, on_status, should_cancel)
+    if int(settings.get("segments") or 1) > 1:
+        convert_segmented(settings, int(settings["segments"]), on_progress, should_cancel, metrics)
+        return note
+    pipeline = settings.get("pipeline") or DEFAULT_PIPELINE
+    if pipeline == "ffmpeg":
+        convert_native(settings, on_progress, should_cancel, metrics)
+        return note
+    if pipeline == "frames":
+        convert_frames(settings, on_progress, should_cancel, metrics)
+        return note
+
+    _convert_moviepy(settings, on_progress, should_cancel, metrics)
+    return note
+
+
+def _convert_moviepy(
+    settings: Settings,
+    on_progress: ProgressCallback | None,
+    should_cancel: Callable[[], bool] | None,
+    metrics: ConversionMetrics,
+) -> None:
+    logger = ConversionProgressLogger(on_progress or (lambda _progress, _eta: None), should_cancel=should_cancel)
+    threads = int(settings.get("threads") or DEFAULT_THREADS)
+    audio_codec = trim_source_info(str(settings["input_path"]))["audio_codec"]
+    if not audio_passthrough(audio_codec):
+        convert_video(settings, logger=logger, threads=threads, metrics=metrics)
+        return
+
+    # MoviePy always re-encodes audio. Let it write the video alone and mux
+    # the source's audio packets in afterwards.
+    output_path = Path(str(settings["output_path"]))
+    video_only = output_path.with_name(f"{output_path.stem}.video-tmp.mp4")
+    start = float(settings["trim_start"] or 0)
+    trim = ["-ss", f"{start:.6f}"]
+    if settings["trim_end"] is not None:
+        trim += ["-t", f"{float(settings['trim_end']) - start:.6f}"]
+    try:
+        convert_video(
+            {**settings, "output_path": str(video_only)}, logger=logger, threads=threads, metrics=metrics, audio=False
+        )
+        with metrics.stage("mux"):
+            run_ffmpeg(
+                [
+                    "-i", str(video_only), *trim, "-i", str(settings["input_path"]),
+                    "-map", "0:v:0", "-c:v", "copy", *audio_args(audio_codec, 1),
+                    "-shortest", "-movflags", "+faststart",
+                    str(output_path),
+                ],
+                0.0,
+                should_cancel=should_cancel,
+            )
+    finally:
+        video_only.unlink(missing_ok=True)
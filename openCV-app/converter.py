@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from proglog import ProgressBarLogger
+
+if TYPE_CHECKING:
+    from metrics import ConversionMetrics
+
+
+class ConversionCancelled(Exception):
+    pass
+
+
+class ConversionProgressLogger(ProgressBarLogger):
+    def __init__(self, on_progress, should_cancel: Callable[[], bool] | None = None) -> None:
+        super().__init__()
+        self.on_progress = on_progress
+        self.should_cancel = should_cancel
+        self.started_at = time.monotonic()
+        # bar -> [first, last] update time. MoviePy writes the audio ("chunk")
+        # before the video ("frame_index"), so these bound each stage.
+        self.bar_times: dict[str, list[float]] = {}
+
+    def stage_seconds(self, bar: str) -> float:
+        first, last = self.bar_times.get(bar, (0.0, 0.0))
+        return last - first
+
+    def bars_callback(self, bar, attr, value, old_value=None) -> None:
+        # Raising here aborts write_videofile; MoviePy closes the ffmpeg
+        # writer on the way out, so the caller only has to remove the file.
+        if self.should_cancel is not None and self.should_cancel():
+            raise ConversionCancelled("Conversion cancelled.")
+
+        now = time.monotonic()
+        times = self.bar_times.setdefault(bar, [now, now])
+        times[1] = now
+
+        # MoviePy reports audio chunks and video frames separately. Track only
+        # the video frame bar so the GUI progress does not run twice.
+        if bar != "frame_index":
+            return
+        if attr != "index":
+            return
+
+        total = self.bars.get(bar, {}).get("total")
+        if not total:
+            return
+
+        progress = min(max(value / total, 0), 1)
+        elapsed = time.monotonic() - self.started_at
+        eta = elapsed * (1 - progress) / progress if progress > 0 else None
+        self.on_progress(progress, eta)
+
+
+def convert_video(
+    settings: dict[str, str | int | float | None],
+    logger: ProgressBarLogger | str | None = None,
+    threads: int = 4,
+    metrics: ConversionMetrics | None = None,
+    audio: bool = True,
+) -> None:
+    """
+    Re-encode with MoviePy; with audio=False the output has no audio track.
+    With metrics, per-frame decode and resize time are measured directly;
+    encode is the rest of the video stage (Python waiting on the x264 pipe)
+    and mux is what the writer needs after the last frame. Stage times need a
+    ConversionProgressLogger as the logger.
+    """
+    # MoviePy pulls in NumPy and imageio; import it only when a job needs it.
+    from moviepy import VideoFileClip
+
+    edited = None
+    # Keep MoviePy's temporary audio next to the output rather than in the
+    # working directory, so parallel jobs never collide and a cancelled job
+    # can clean it up.
+    output_path = Path(str(settings["output_path"]))
+    temp_audio = output_path.with_name(f"{output_path.stem}.audio-tmp.m4a")
+    try:
+        with VideoFileClip(str(settings["input_path"])) as clip:
+            edited = clip.subclipped(settings["trim_start"], settings["trim_end"])
+            edited = edited.resized(new_size=(settings["width"], settings["height"]))
+            if metrics is not None:
+                # The trimmed and resized clips are copies that still read
+                # through this reader, so this times decoding alone.
+                clip.reader.get_frame = metrics.timed("decode", clip.reader.get_frame)
+                edited.frame_function = metrics.timed("decode+resize", edited.frame_function)
+            edited.write_videofile(
+                str(settings["output_path"]),
+                fps=settings["fps"],
+                codec="libx264",
+                audio=audio,
+                audio_codec="aac",
+                bitrate=settings["bitrate"],
+                preset=str(settings.get("preset") or "medium"),
+                threads=threads,
+                temp_audiofile=str(temp_audio),
+                logger=logger,
+            )
+            if metrics is not None and isinstance(logger, ConversionProgressLogger):
+                _record_moviepy_stages(metrics, logger)
+    finally:
+        if edited is not None:
+            edited.close()
+        temp_audio.unlink(missing_ok=True)
+
+
+def _record_moviepy_stages(metrics: ConversionMetrics, logger: ConversionProgressLogger) -> None:
+    decode_and_resize, frames = metrics.pop("decode+resize")
+    video = logger.stage_seconds("frame_index")
+    metrics.add("resize", decode_and_resize - metrics.seconds.get("decode", 0.0))
+    metrics.add("encode", video - decode_and_resize, frames)
+    if "chunk" in logger.bar_times:
+        metrics.add("audio", logger.stage_seconds("chunk"))
+    last_frame = logger.bar_times.get("frame_index", [time.monotonic()] * 2)[1]
+    metrics.add("mux", time.monotonic() - last_frame)
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import re
+import subprocess
+import tempfile
+import time
+from collections.abc import Callable, Sequence
+from pathlib import Path
+
+import imageio_ffmpeg
+
+from converter import ConversionCancelled
+
+
+ProgressCallback = Callable[[float, float | None], None]
+
+# AAC bitrate when ffmpeg re-encodes the audio.
+AUDIO_BITRATE = "192k"
+
+# Source audio in these codecs goes into the MP4 output as it is: the job
+# never changes audio, so re-encoding would only cost time and quality.
+PASSTHROUGH_AUDIO_CODECS = {"aac"}
+
+_DURATION_RE = re.compile(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?), start: (-?\d+(?:\.\d+)?)")
+_AUDIO_RE = re.compile(r"Stream #\d+:\d+[^:]*: Audio: (\w+)")
+_VIDEO_RE = re.compile(r"Stream #\d+:\d+[^:]*: Video: (\w+)")
+_PTS_TIME_RE = re.compile(r"pts_time:\s*(-?\d+(?:\.\d+)?)")
+
+
+def ffmpeg_exe() -> str:
+    """The ffmpeg binary bundled with imageio-ffmpeg (also bundled into the EXE)."""
+    return imageio_ffmpeg.get_ffmpeg_exe()
+
+
+def probe_keyframes(path: str) -> dict[str, object]:
+    """
+    List the keyframe times of the first video stream, relative to the start of
+    the file as ffmpeg's -ss counts it. Only keyframes are decoded, so this is
+    a small fraction of a full decode.
+    """
+    command = [
+        ffmpeg_exe(),
+        "-hide_banner",
+        "-nostats",
+        "-skip_frame",
+        "nokey",
+        "-i",
+        path,
+        "-map",
+        "0:v:0",
+        "-vf",
+        "showinfo",
+        "-f",
+        "null",
+        "-",
+    ]
+    result = subprocess.run(command, capture_output=True, text=True, errors="replace")
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg could not read keyframes:\n{tail_lines(result.stderr)}")
+
+    header = _DURATION_RE.search(result.stderr)
+    if header is None:
+        raise RuntimeError(f"ffmpeg did not report a duration:\n{tail_lines(result.stderr)}")
+    hours, minutes, seconds, start_time = header.groups()
+    duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    audio = _AUDIO_RE.search(result.stderr)
+    video = _VIDEO_RE.search(result.stderr)
+
+    keyframes = sorted({round(float(value) - float(start_time), 6) for value in _PTS_TIME_RE.findall(result.stderr)})
+    return {
+        "duration": duration,
+        "keyframes": keyframes,
+        "audio_codec": audio.group(1) if audio else None,
+        "video_codec": video.group(1) if video else None,
+    }
+
+
+def run_ffmpeg(
+    args: Sequence[str],
+    duration: float,
+    on_progress: ProgressCallback | None = None,
+    should_cancel: Callable[[], bool] | None = None,
+    progress_range: tuple[float, float] = (0.0, 1.0),
+    started_at: float | None = None,
+) -> None:
+    """
+    Run ffmpeg with -progress on stdout and report (progress, eta) like
+    ConversionProgressLogger does. progress_range maps this run onto part of
+    a larger job when several ffmpeg runs make up one conversion.
+    """
+    command = [ffmpeg_exe(), "-hide_banner", "-nostats", "-y", "-progress", "pipe:1", *args]
+    started_at = time.monotonic() if started_at is None else started_at
+    low, high = progress_range
+
+    # stderr goes to a file: reading only stdout while ffmpeg fills a stderr
+    # pipe would deadlock on long jobs.
+    with tempfile.TemporaryFile(mode="w+", errors="replace") as stderr:
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=stderr, text=True)
+        try:
+            for line in process.stdout:
+                if should_cancel is not None and should_cancel():
+                    process.kill()
+                    process.wait()
+                    raise ConversionCancelled("Conversion cancelled.")
+                key, _, value = line.strip().partition("=")
+                # out_time_ms is in microseconds as well; out_time_us is the newer spelling.
+                if key not in ("out_time_us", "out_time_ms") or on_progress is None or duration <= 0:
+                    continue
+                try:
+                    seconds = int(value) / 1_000_000
+                except ValueError:
+                    continue
+                progress = low + (high - low) * min(max(seconds / duration, 0), 1)
+                elapsed = time.monotonic() - started_at
+                eta = elapsed * (1 - progress) / progress if progress > 0 else None
+                on_progress(progress, eta)
+            returncode = process.wait()
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+        if returncode != 0:
+            stderr.seek(0)
+            raise RuntimeError(f"ffmpeg failed with exit code {returncode}:\n{tail_lines(stderr.read())}")
+
+
+def audio_passthrough(audio_codec: str | None) -> bool:
+    return audio_codec in PASSTHROUGH_AUDIO_CODECS
+
+
+def audio_args(audio_codec: str | None, input_index: int = 0) -> list[str]:
+    """
+    Output options for the first audio stream of one input: copied when the
+    codec allows it, AAC otherwise, nothing when there is no audio. A copied
+    stream trimmed with an input -ss starts at the audio packet containing the
+    start and is shifted by the same offset as the video, so they stay in sync.
+    """
+    if audio_codec is None:
+        return []
+    codec = ["-c:a", "copy"] if audio_passthrough(audio_codec) else ["-c:a", "aac", "-b:a", AUDIO_BITRATE]
+    return ["-map", f"{input_index}:a:0", *codec]
+
+
+def video_filter(settings: dict[str, object]) -> str:
+    """The fps and scale filter graph for a job's output FPS and size."""
+    return f"fps={settings['fps']},scale={settings['width']}:{settings['height']}"
+
+
+def concat_list_entry(path: Path) -> str:
+    """One line of a concat demuxer list; single quotes are escaped as '\\''."""
+    return "file '{}'\n".format(path.resolve().as_posix().replace("'", "'\\''"))
+
+
+def tail_lines(text: str, lines: int = 20) -> str:
+    return "\n".join(text.strip().splitlines()[-lines:])
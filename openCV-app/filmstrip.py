@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import threading
+from collections.abc import Callable
+from typing import TYPE_CHECKING
+
+from mp4index import load_index, nearest_keyframe
+
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+
+FILMSTRIP_HEIGHT = 30
+FILMSTRIP_SLOTS = 16
+
+
+def coarse_to_fine(count: int) -> list[int]:
+    """0..count-1 ordered so each prefix is spread over the whole range (0, 8, 4, 12, 2, ...)."""
+    order = []
+    step = 1
+    while step < count:
+        step *= 2
+    while step >= 1:
+        for index in range(0, count, step):
+            if index not in order:
+                order.append(index)
+        step //= 2
+    return order
+
+
+def filmstrip_times(keyframes: list[float], duration: float, slots: int = FILMSTRIP_SLOTS) -> list[float]:
+    """One keyframe per evenly spaced slot, in coarse-to-fine order, without repeats."""
+    times = []
+    for slot in coarse_to_fine(slots):
+        time = nearest_keyframe(keyframes, duration * (slot + 0.5) / slots)
+        if time is not None and time not in times:
+            times.append(time)
+    return times
+
+
+class TimelineIndexer:
+    """
+    Loads the keyframe index for one file, then decodes filmstrip thumbnails
+    at keyframes only. Keyframes decode without their GOP, so each thumbnail
+    is one seek and one frame. Callbacks run on the worker thread.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        on_index: Callable[[dict[str, object]], None],
+        on_thumbnail: Callable[[float, Image.Image], None],
+        on_error: Callable[[str], None],
+    ) -> None:
+        self.path = path
+        self.on_index = on_index
+        self.on_thumbnail = on_thumbnail
+        self.on_error = on_error
+        self._cancelled = threading.Event()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> None:
+        self._worker.start()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def _run(self) -> None:
+        from PIL import Image
+        from moviepy import VideoFileClip
+
+        try:
+            index = load_index(self.path)
+            if self._cancelled.is_set():
+                return
+            self.on_index(index)
+
+            times = filmstrip_times(index["keyframes"], float(index["duration"]))
+            with VideoFileClip(self.path, audio=False) as clip:
+                size = (FILMSTRIP_HEIGHT * clip.w // max(clip.h, 1), FILMSTRIP_HEIGHT)
+                for time in times:
+                    if self._cancelled.is_set():
+                        return
+                    image = Image.fromarray(clip.get_frame(time))
+                    image.thumbnail(size, Image.Resampling.BILINEAR)
+                    self.on_thumbnail(time, image)
+        except Exception as exc:
+            if not self._cancelled.is_set():
+                self.on_error(str(exc))
@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import queue
+import subprocess
+import tempfile
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from converter import ConversionCancelled
+from ffmpeg_cli import ProgressCallback, audio_args, ffmpeg_exe, tail_lines, video_filter
+from metrics import ConversionMetrics
+from mp4probe import trim_source_info
+
+
+# Frames in flight between the decoder and the encoder. Enough to ride out a
+# slow frame on either side; the decoder blocks when all of them are full.
+RING_SIZE = 4
+
+# Each frame is packed RGB: width * height * 3 bytes.
+PIXEL_FORMAT = "rgb24"
+BYTES_PER_PIXEL = 3
+
+# (frame, width, height, seconds) -> None. The frame is a writable view of the
+# ring buffer; change it in place. It is reused once the hook returns, so do
+# not keep a reference to it.
+FrameHook = Callable[[memoryview, int, int, float], None]
+
+
+class FrameRing:
+    """
+    A fixed set of frame buffers handed back and forth between a producer and
+    a consumer. Buffers are allocated once; frames are read into them and
+    written out of them through memoryviews, so a frame is never copied in
+    Python. get_free() blocks while the consumer holds every buffer, which is
+    the backpressure on the producer.
+    """
+
+    def __init__(self, frame_bytes: int, size: int = RING_SIZE) -> None:
+        self.frame_bytes = frame_bytes
+        self.buffers = [memoryview(bytearray(frame_bytes)) for _ in range(size)]
+        self._free: queue.Queue[int] = queue.Queue()
+        self._filled: queue.Queue[tuple[int, float] | BaseException | None] = queue.Queue()
+        for index in range(size):
+            self._free.put(index)
+        self.producer_wait = 0.0
+        self.consumer_wait = 0.0
+
+    @property
+    def allocated_bytes(self) -> int:
+        return self.frame_bytes * len(self.buffers)
+
+    def get_free(self, timeout: float | None = None) -> int:
+        started = time.perf_counter()
+        index = self._free.get(timeout=timeout)
+        self.producer_wait += time.perf_counter() - started
+        return index
+
+    def put_filled(self, index: int, seconds: float) -> None:
+        self._filled.put((index, seconds))
+
+    def finish(self, error: BaseException | None = None) -> None:
+        """Producer is done (None) or failed (the exception)."""
+        self._filled.put(error)
+
+    def get_filled(self) -> tuple[int, float] | BaseException | None:
+        started = time.perf_counter()
+        item = self._filled.get()
+        self.consumer_wait += time.perf_counter() - started
+        return item
+
+    def release(self, index: int) -> None:
+        self._free.put(index)
+
+
+def read_frame(stream, frame: memoryview) -> bool:
+    """Fill frame from an unbuffered pipe. False at a clean end of stream."""
+    filled = 0
+    while filled < len(frame):
+        count = stream.readinto(frame[filled:])
+        if not count:
+            if filled:
+                raise RuntimeError(f"Decoder stopped in the middle of a frame ({filled} of {len(frame)} bytes).")
+            return False
+        filled += count
+    return True
+
+
+def write_frame(stream, frame: memoryview) -> None:
+    """Write all of frame to an unbuffered pipe; raw writes may be partial."""
+    written = 0
+    while written < len(frame):
+        written += stream.write(frame[written:])
+
+
+def convert_frames(
+    settings: dict[str, str | int | float | None],
+    on_progress: ProgressCallback | None = None,
+    should_cancel: Callable[[], bool] | None = None,
+    metrics: ConversionMetrics | None = None,
+    frame_hook: FrameHook | None = None,
+    ring_size: int = RING_SIZE,
+) -> dict[str, float | int]:
+    """
+    Decode with one ffmpeg process and encode with another, passing raw frames
+    through Python so frame_hook can change them (overlays, masks). A reader
+    thread fills a FrameRing from the decoder; this thread runs the hook and
+    writes each buffer to the encoder. Audio goes straight from the source to
+    the encoder, copied when the codec allows it. Returns pipeline statistics
+    (frames, buffer bytes, waits).
+    """
+    input_path = str(settings["input_path"])
+    output_path = Path(str(settings["output_path"]))
+    info = trim_source_info(input_path)
+    duration = float(info["duration"])
+    start = float(settings["trim_start"] or 0)
+    end = min(float(settings["trim_end"]), duration) if settings["trim_end"] is not None else duration
+    width, height, fps = int(settings["width"]), int(settings["height"]), float(settings["fps"])
+    expected_frames = max(1, round((end - start) * fps))
+    trim = ["-ss", f"{start:.6f}", "-t", f"{end - start:.6f}"]
+    rate = ["-b:v", str(settings["bitrate"])] if settings["bitrate"] is not None else []
+
+    decode_command = [
+        ffmpeg_exe(), "-hide_banner", "-nostats", "-v", "error",
+        *trim, "-i", input_path,
+        "-map", "0:v:0", "-vf", video_filter(settings),
+        "-f", "rawvideo", "-pix_fmt", PIXEL_FORMAT, "pipe:1",
+    ]
+    encode_command = [
+        ffmpeg_exe(), "-hide_banner", "-nostats", "-v", "error", "-y",
+        "-f", "rawvideo", "-pix_fmt", PIXEL_FORMAT, "-s", f"{width}x{height}", "-r", f"{fps}", "-i", "pipe:0",
+        *trim, "-i", input_path,
+        "-map", "0:v:0", *audio_args(info["audio_codec"], 1),
+        "-c:v", "libx264", "-preset", str(settings.get("preset") or "medium"), *rate,
+        "-threads", str(settings.get("threads") or 0),
+        "-pix_fmt", "yuv420p", "-movflags", "+faststart",
+        str(output_path),
+    ]
+
+    ring = FrameRing(width * height * BYTES_PER_PIXEL, ring_size)
+    stopped = threading.Event()
+    decode_seconds = 0.0
+
+    def read_frames(decoder: subprocess.Popen) -> None:
+        nonlocal decode_seconds
+        try:
+            frame_number = 0
+            while not stopped.is_set():
+                try:
+                    index = ring.get_free(timeout=0.5)
+                except queue.Empty:
+                    continue
+                started = time.perf_counter()
+                got_frame = read_frame(decoder.stdout, ring.buffers[index])
+                decode_seconds += time.perf_counter() - started
+                if not got_frame:
+                    ring.release(index)
+                    break
+                ring.put_filled(index, start + frame_number / fps)
+                frame_number += 1
+            ring.finish()
+        except BaseException as exc:
+            ring.finish(exc)
+
+    started_at = time.monotonic()
+    frames = 0
+    hook_seconds = 0.0
+    encode_seconds = 0.0
+    with tempfile.TemporaryFile() as decode_errors, tempfile.TemporaryFile() as encode_errors:
+        # bufsize=0: readinto and write go straight to the pipe, with no
+        # intermediate copy in a BufferedReader / BufferedWriter.
+        decoder = subprocess.Popen(decode_command, stdout=subprocess.PIPE, stderr=decode_errors, bufsize=0)
+        encoder = subprocess.Popen(encode_command, stdin=subprocess.PIPE, stderr=encode_errors, bufsize=0)
+        reader = threading.Thread(target=read_frames, args=(decoder,), daemon=True)
+        reader.start()
+        try:
+            while True:
+                item = ring.get_filled()
+                if item is None:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                if should_cancel is not None and should_cancel():
+                    raise ConversionCancelled("Conversion cancelled.")
+                index, seconds = item
+                frame = ring.buffers[index]
+                if frame_hook is not None:
+                    started = time.perf_counter()
+                    frame_hook(frame, width, height, seconds)
+                    hook_seconds += time.perf_counter() - started
+                started = time.perf_counter()
+                try:
+                    write_frame(encoder.stdin, frame)
+                except BrokenPipeError:
+                    # The encoder exited; its return code says why. Stop the
+                    # decoder too, or it blocks on a ring nobody drains.
+                    stopped.set()
+                    decoder.kill()
+                    break
+                encode_seconds += time.perf_counter() - started
+                ring.release(index)
+                frames += 1
+                if on_progress is not None:
+                    progress = min(frames / expected_frames, 1.0)
+                    elapsed = time.monotonic() - started_at
+                    on_progress(progress, elapsed * (1 - progress) / progress)
+            encoder.stdin.close()
+            encode_started = time.perf_counter()
+            encoder_code = encoder.wait()
+            # Whatever x264 still had buffered when the input ended.
+            encode_seconds += time.perf_counter() - encode_started
+            decoder_code = decoder.wait()
+        finally:
+            stopped.set()
+            for process in (decoder, encoder):
+                if process.poll() is None:
+                    process.kill()
+                    process.wait()
+            reader.join()
+
+        # Encoder first: when it fails, the decoder is stopped as a consequence.
+        for name, code, errors in (("encoder", encoder_code, encode_errors), ("decoder", decoder_code, decode_errors)):
+            if code != 0:
+                errors.seek(0)
+                text = errors.read().decode("utf-8", errors="replace")
+                raise RuntimeError(f"ffmpeg {name} failed with exit code {code}:\n{tail_lines(text)}")
+
+    if metrics is not None:
+        metrics.add("decode", decode_seconds, frames)
+        if frame_hook is not None:
+            metrics.add("process", hook_seconds, frames)
+        metrics.add("encode", encode_seconds, frames)
+    if on_progress is not None:
+        on_progress(1.0, 0.0)
+    return {
+        "frames": frames,
+        "ring_buffers": len(ring.buffers),
+        "buffer_bytes": ring.allocated_bytes,
+        "decoder_blocked_seconds": round(ring.producer_wait, 3),
+        "encoder_starved_seconds": round(ring.consumer_wait, 3),
+    }
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import itertools
+import json
+import os
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+from app_cache import cache_dir
+
+
+REPORT_CACHE = "reports"
+_report_numbers = itertools.count(1)
+
+# Progress reaches the UI at most this often. MoviePy reports every frame,
+# which on a 60 fps source is far more than the event loop needs to redraw.
+UI_UPDATES_PER_SECOND = 10
+
+# Weight of the newest rate sample in the ETA's moving average. Lower is
+# steadier but slower to follow a change in speed (e.g. a complex scene).
+ETA_SMOOTHING = 0.3
+
+# Order stages are listed in the summary; anything else follows.
+STAGE_ORDER = ("calibrate", "audio", "decode", "resize", "encode", "copy", "mux")
+
+
+class ProgressThrottle:
+    """
+    Wraps a (progress, eta) callback: passes on at most max_rate updates per
+    second, and replaces the ETA with one from an exponentially weighted
+    moving average of the progress rate. The final update (progress 1) is
+    always passed on. Safe to call from several threads.
+    """
+
+    def __init__(
+        self,
+        on_progress: Callable[[float, float | None], None],
+        max_rate: float = UI_UPDATES_PER_SECOND,
+        smoothing: float = ETA_SMOOTHING,
+    ) -> None:
+        self.on_progress = on_progress
+        self.interval = 1 / max_rate
+        self.smoothing = smoothing
+        self.rate: float | None = None
+        self._last_progress = 0.0
+        self._last_time: float | None = None
+        self._last_sent = float("-inf")
+        self._lock = threading.Lock()
+
+    def __call__(self, progress: float, _eta: float | None = None) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if progress < 1 and now - self._last_sent < self.interval:
+                return
+            if self._last_time is None:
+                # The first report only sets the baseline; time spent before it
+                # (opening files, writing audio) says nothing about the rate.
+                self._last_progress = progress
+                self._last_time = now
+            elapsed = now - self._last_time
+            if elapsed > 0 and progress > self._last_progress:
+                sample = (progress - self._last_progress) / elapsed
+                self.rate = sample if self.rate is None else self.smoothing * sample + (1 - self.smoothing) * self.rate
+                self._last_progress = progress
+                self._last_time = now
+            self._last_sent = now
+            if progress >= 1:
+                eta = 0.0
+            else:
+                eta = (1 - progress) / self.rate if self.rate else None
+        self.on_progress(progress, eta)
+
+
+class ConversionMetrics:
+    """
+    Wall time and frame counts per conversion stage (decode, resize, encode,
+    audio, mux, ...). Stages may overlap, e.g. parallel segments encode video
+    and audio at the same time, so the stage times can add up to more than
+    the total.
+    """
+
+    def __init__(self) -> None:
+        self.started_at = time.monotonic()
+        self.finished_at: float | None = None
+        self.seconds: dict[str, float] = {}
+        self.frames: dict[str, int] = {}
+        self.report_path: Path | None = None
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float, frames: int = 0) -> None:
+        with self._lock:
+            self.seconds[stage] = self.seconds.get(stage, 0.0) + max(seconds, 0.0)
+            if frames:
+                self.frames[stage] = self.frames.get(stage, 0) + frames
+
+    def pop(self, stage: str) -> tuple[float, int]:
+        """Remove a helper stage and return its (seconds, frames)."""
+        with self._lock:
+            return self.seconds.pop(stage, 0.0), self.frames.pop(stage, 0)
+
+    @contextmanager
+    def stage(self, stage: str, frames: int = 0) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - started, frames)
+
+    def timed(self, stage: str, function: Callable) -> Callable:
+        """Wrap a per-frame function so each call counts as one frame of this stage."""
+
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.add(stage, time.perf_counter() - started, 1)
+
+        return wrapper
+
+    def finish(self) -> None:
+        if self.finished_at is None:
+            self.finished_at = time.monotonic()
+
+    def summary(self) -> dict[str, object]:
+        end = self.finished_at if self.finished_at is not None else time.monotonic()
+        with self._lock:
+            stages = {}
+            for name in sorted(self.seconds, key=_stage_sort_key):
+                seconds = self.seconds[name]
+                stage: dict[str, float | int] = {"seconds": round(seconds, 3)}
+                if name in self.frames:
+                    stage["frames"] = self.frames[name]
+                    stage["fps"] = round(self.frames[name] / seconds, 1) if seconds > 0 else 0.0
+                stages[name] = stage
+        return {"total_seconds": round(end - self.started_at, 3), "stages": stages}
+
+    def describe(self) -> str:
+        """One line for the UI, e.g. "decode 240 fps, resize 1.2s, encode 58 fps, audio 0.4s, mux 0.1s"."""
+        parts = []
+        for name, stage in self.summary()["stages"].items():
+            if "fps" in stage:
+                parts.append(f"{name} {stage['fps']:g} fps")
+            else:
+                parts.append(f"{name} {stage['seconds']:.1f}s")
+        return ", ".join(parts)
+
+
+def _stage_sort_key(name: str) -> tuple[int, str]:
+    return (STAGE_ORDER.index(name) if name in STAGE_ORDER else len(STAGE_ORDER), name)
+
+
+def write_report(
+    metrics: ConversionMetrics,
+    settings: dict[str, object],
+    outcome: str,
+    error: str | None = None,
+) -> Path | None:
+    """
+    Save one job's settings, outcome and stage metrics as JSON in the user
+    cache folder (reports). Best effort, like the other caches; returns the
+    path, or None when it could not be written.
+    """
+    metrics.finish()
+    report = {
+        "finished": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "outcome": outcome,
+        "error": error,
+        "settings": {key: value for key, value in settings.items() if isinstance(value, (str, int, float, bool, type(None)))},
+        **metrics.summary(),
+    }
+    try:
+        # Jobs with the same output name can finish in the same second (batch
+        # runs, several app windows); the pid and a counter keep them apart.
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(_report_numbers)}"
+        path = cache_dir(REPORT_CACHE) / f"{name}-{Path(str(settings['output_path'])).stem}.json"
+        path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    except OSError:
+        return None
+    metrics.report_path = path
+    return path
@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import struct
+from collections.abc import Iterator
+from pathlib import Path
+
+from app_cache import file_key, load_json, save_json
+
+
+INDEX_CACHE = "keyframes"
+
+# Bump when the cached index layout changes so old entries are rebuilt.
+INDEX_VERSION = 1
+
+_HEADER = struct.Struct(">I4s")
+
+
+def iter_boxes(data: bytes | memoryview, start: int, end: int) -> Iterator[tuple[bytes, int, int]]:
+    """Yield (type, payload start, box end) for each box in data[start:end]."""
+    offset = start
+    while offset + 8 <= end:
+        size, kind = _HEADER.unpack_from(data, offset)
+        header = 8
+        if size == 1:
+            (size,) = struct.unpack_from(">Q", data, offset + 8)
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header or offset + size > end:
+            return
+        yield kind, offset + header, offset + size
+        offset += size
+
+
+def find_box(data: bytes | memoryview, start: int, end: int, kind: bytes) -> tuple[int, int] | None:
+    for box_kind, payload, box_end in iter_boxes(data, start, end):
+        if box_kind == kind:
+            return payload, box_end
+    return None
+
+
+def read_moov(path: str | Path) -> bytes:
+    """Read just the moov box, wherever it sits in the file. mdat is skipped, not read."""
+    with open(path, "rb") as file:
+        file_size = file.seek(0, 2)
+        offset = 0
+        while offset + 8 <= file_size:
+            file.seek(offset)
+            header = file.read(16)
+            size, kind = _HEADER.unpack_from(header)
+            header_size = 8
+            if size == 1:
+                (size,) = struct.unpack_from(">Q", header, 8)
+                header_size = 16
+            elif size == 0:
+                size = file_size - offset
+            if size < header_size:
+                break
+            if kind == b"moov":
+                file.seek(offset)
+                return file.read(size)
+            offset += size
+    raise ValueError("Not an MP4 file: no moov box.")
+
+
+def video_track(moov: bytes) -> tuple[int, int] | None:
+    """(payload start, end) of the first trak whose handler is 'vide'."""
+    for kind, payload, end in iter_boxes(moov, 8, len(moov)):
+        if kind != b"trak":
+            continue
+        mdia = find_box(moov, payload, end, b"mdia")
+        if mdia is None:
+            continue
+        hdlr = find_box(moov, *mdia, b"hdlr")
+        if hdlr is not None and moov[hdlr[0] + 8 : hdlr[0] + 12] == b"vide":
+            return payload, end
+    return None
+
+
+def media_timescale(moov: bytes, trak: tuple[int, int]) -> tuple[int, int]:
+    """(timescale, duration) from the track's mdhd."""
+    mdia = find_box(moov, *trak, b"mdia")
+    payload, _end = find_box(moov, *mdia, b"mdhd")
+    if moov[payload] == 1:
+        timescale, duration = struct.unpack_from(">IQ", moov, payload + 20)
+    else:
+        timescale, duration = struct.unpack_from(">II", moov, payload + 12)
+    return timescale, duration
+
+
+def movie_timescale(moov: bytes) -> int:
+    payload, _end = find_box(moov, 8, len(moov), b"mvhd")
+    offset = payload + 20 if moov[payload] == 1 else payload + 12
+    return struct.unpack_from(">I", moov, offset)[0]
+
+
+def sample_table(moov: bytes, trak: tuple[int, int]) -> tuple[int, int]:
+    mdia = find_box(moov, *trak, b"mdia")
+    minf = find_box(moov, *mdia, b"minf")
+    return find_box(moov, *minf, b"stbl")
+
+
+def read_runs(moov: bytes, stbl: tuple[int, int], kind: bytes, signed: bool = False) -> list[tuple[int, int]]:
+    """(count, value) runs from stts or ctts."""
+    box = find_box(moov, *stbl, kind)
+    if box is None:
+        return []
+    payload, _end = box
+    (count,) = struct.unpack_from(">I", moov, payload + 4)
+    runs = struct.unpack_from(f">{count * 2}{'i' if signed else 'I'}", moov, payload + 8)
+    return list(zip(runs[0::2], runs[1::2]))
+
+
+def sync_samples(moov: bytes, stbl: tuple[int, int]) -> list[int] | None:
+    """Zero-based keyframe sample numbers from stss, or None when every sample is a keyframe."""
+    box = find_box(moov, *stbl, b"stss")
+    if box is None:
+        return None
+    payload, _end = box
+    (count,) = struct.unpack_from(">I", moov, payload + 4)
+    return [number - 1 for number in struct.unpack_from(f">{count}I", moov, payload + 8)]
+
+
+def edit_offset(moov: bytes, trak: tuple[int, int], timescale: int) -> float:
+    """
+    Seconds to add to media time to get presentation time, from the first
+    edit list entries: empty edits delay the track, and the first real edit
+    says which media time is shown at that point.
+    """
+    edts = find_box(moov, *trak, b"edts")
+    elst = find_box(moov, *edts, b"elst") if edts is not None else None
+    if elst is None:
+        return 0.0
+    payload, _end = elst
+    version = moov[payload]
+    (count,) = struct.unpack_from(">I", moov, payload + 4)
+    entry = ">QqI" if version == 1 else ">IiI"
+    entry_size = struct.calcsize(entry)
+    delay = 0.0
+    for index in range(count):
+        segment_duration, media_time, _rate = struct.unpack_from(entry, moov, payload + 8 + index * entry_size)
+        if media_time == -1:
+            delay += segment_duration / movie_timescale(moov)
+            continue
+        return delay - media_time / timescale
+    return delay
+
+
+def _run_values(runs: list[tuple[int, int]], samples: list[int], accumulate: bool) -> list[int]:
+    """
+    Look up sorted sample numbers in (count, value) runs. With accumulate the
+    result is the running total (stts deltas -> decode time), otherwise the
+    run's own value (ctts offsets).
+    """
+    values = []
+    run = 0
+    run_first = 0
+    run_base = 0
+    for sample in samples:
+        while run < len(runs) and sample >= run_first + runs[run][0]:
+            run_first += runs[run][0]
+            run_base += runs[run][0] * runs[run][1]
+            run += 1
+        value = runs[run][1] if run < len(runs) else 0
+        values.append(run_base + (sample - run_first) * value if accumulate else value)
+    return values
+
+
+def build_index(path: str | Path) -> dict[str, object]:
+    """
+    Keyframe presentation times of the first video track, from stss, stts,
+    ctts and the edit list. Nothing is decoded.
+    """
+    moov = read_moov(path)
+    trak = video_track(moov)
+    if trak is None:
+        raise ValueError("MP4 file has no video track.")
+    timescale, media_duration = media_timescale(moov, trak)
+    stbl = sample_table(moov, trak)
+    stts = read_runs(moov, stbl, b"stts")
+    frame_count = sum(count for count, _delta in stts)
+    if not timescale or not frame_count:
+        # Fragmented MP4 keeps its samples in moof boxes instead.
+        raise ValueError("MP4 file has no sample table.")
+
+    keyframes = sync_samples(moov, stbl)
+    if keyframes is None:
+        keyframes = list(range(frame_count))
+    decode_times = _run_values(stts, keyframes, accumulate=True)
+    offsets = _run_values(read_runs(moov, stbl, b"ctts", signed=True), keyframes, accumulate=False)
+    shift = edit_offset(moov, trak, timescale)
+    duration = media_duration / timescale
+    return {
+        "version": INDEX_VERSION,
+        "duration": duration,
+        "frame_count": frame_count,
+        "fps": frame_count / duration if duration > 0 else 0.0,
+        "keyframes": sorted(
+            round(max((dts + offset) / timescale + shift, 0.0), 6) for dts, offset in zip(decode_times, offsets)
+        ),
+    }
+
+
+def load_index(path: str | Path) -> dict[str, object]:
+    """The keyframe index for path, from the cache when the file has not changed since it was built."""
+    key = file_key(path)
+    cached = load_json(INDEX_CACHE, key)
+    if cached is not None and cached.get("version") == INDEX_VERSION:
+        return cached
+    try:
+        index = build_index(path)
+    except (ValueError, struct.error):
+        # Fragmented or unusual files: let ffmpeg find the keyframes instead.
+        from ffmpeg_cli import probe_keyframes
+
+        probe = probe_keyframes(str(path))
+        index = {
+            "version": INDEX_VERSION,
+            "duration": probe["duration"],
+            "frame_count": 0,
+            "fps": 0.0,
+            "keyframes": probe["keyframes"],
+        }
+    save_json(INDEX_CACHE, key, index)
+    return index
+
+
+def nearest_keyframe(keyframes: list[float], seconds: float) -> float | None:
+    if not keyframes:
+        return None
+    return min(keyframes, key=lambda time: abs(time - seconds))
@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import functools
+import struct
+from collections import Counter
+from pathlib import Path
+
+from mp4index import find_box, iter_boxes, load_index, media_timescale, movie_timescale, read_moov, read_runs, sample_table
+
+
+# MPEG-4 object type indications in esds that mean AAC (MPEG-4, MPEG-2 main/LC/SSR).
+_AAC_OBJECT_TYPES = {0x40, 0x66, 0x67, 0x68}
+_MP3_OBJECT_TYPES = {0x69, 0x6B}
+
+# What a truncated or unexpected box layout raises while parsing.
+_PARSE_ERRORS = (struct.error, TypeError, IndexError, StopIteration)
+
+
+def probe(path: str | Path) -> dict[str, object]:
+    """
+    Stream metadata from the moov box alone: duration, size, FPS, codecs and
+    real per-stream bitrates from the sample sizes. Memoised per path, size
+    and mtime, so a rewritten file is probed again. Raises ValueError for
+    files it cannot parse.
+    """
+    resolved = Path(path).resolve()
+    stat = resolved.stat()
+    try:
+        return dict(_probe(str(resolved), stat.st_size, stat.st_mtime_ns))
+    except _PARSE_ERRORS as exc:
+        raise ValueError(f"Unreadable MP4 structure: {exc!r}") from exc
+
+
+@functools.lru_cache(maxsize=2048)
+def _probe(path: str, size: int, _mtime_ns: int) -> dict[str, object]:
+    moov = read_moov(path)
+    scale = movie_timescale(moov)
+    mvhd, _end = find_box(moov, 8, len(moov), b"mvhd")
+    if moov[mvhd] == 1:
+        (movie_duration,) = struct.unpack_from(">Q", moov, mvhd + 24)
+    else:
+        (movie_duration,) = struct.unpack_from(">I", moov, mvhd + 16)
+    duration = movie_duration / scale if scale else 0.0
+
+    info: dict[str, object] = {
+        "duration": duration,
+        "bitrate_kbps": size * 8 / duration / 1000 if duration > 0 else 0.0,
+        "video_codec": None,
+        "audio_codec": None,
+    }
+    for kind, payload, end in iter_boxes(moov, 8, len(moov)):
+        if kind != b"trak":
+            continue
+        trak = (payload, end)
+        handler = _handler(moov, trak)
+        if handler == b"vide" and info["video_codec"] is None:
+            info.update(_video_stream(moov, trak))
+        elif handler == b"soun" and info["audio_codec"] is None:
+            info.update(_audio_stream(moov, trak))
+
+    if info["video_codec"] is None:
+        raise ValueError("MP4 file has no video track.")
+    if not info["frame_count"]:
+        raise ValueError("MP4 file has no sample table.")
+    if duration <= 0:
+        info["duration"] = info["video_duration"]
+    return info
+
+
+def _handler(moov: bytes, trak: tuple[int, int]) -> bytes | None:
+    mdia = find_box(moov, *trak, b"mdia")
+    hdlr = find_box(moov, *mdia, b"hdlr") if mdia is not None else None
+    return moov[hdlr[0] + 8 : hdlr[0] + 12] if hdlr is not None else None
+
+
+def _sample_entry(moov: bytes, stbl: tuple[int, int]) -> tuple[bytes, int, int]:
+    """(format, payload start, end) of the first stsd entry."""
+    payload, end = find_box(moov, *stbl, b"stsd")
+    return next(iter_boxes(moov, payload + 8, end))
+
+
+def _total_sample_bytes(moov: bytes, stbl: tuple[int, int]) -> int:
+    box = find_box(moov, *stbl, b"stsz")
+    if box is None:
+        return 0
+    payload, _end = box
+    uniform, count = struct.unpack_from(">II", moov, payload + 4)
+    if uniform:
+        return uniform * count
+    return sum(struct.unpack_from(f">{count}I", moov, payload + 12))
+
+
+def _kbps(total_bytes: int, seconds: float) -> float:
+    return total_bytes * 8 / seconds / 1000 if seconds > 0 else 0.0
+
+
+def _video_stream(moov: bytes, trak: tuple[int, int]) -> dict[str, object]:
+    timescale, media_duration = media_timescale(moov, trak)
+    stbl = sample_table(moov, trak)
+    codec, entry, _end = _sample_entry(moov, stbl)
+    width, height = struct.unpack_from(">HH", moov, entry + 24)
+
+    # tkhd's matrix says whether the picture is shown rotated by 90/270 degrees.
+    tkhd, _tkhd_end = find_box(moov, *trak, b"tkhd")
+    matrix = tkhd + (52 if moov[tkhd] == 1 else 40)
+    a, b = struct.unpack_from(">ii", moov, matrix)
+    if a == 0 and b != 0:
+        width, height = height, width
+
+    stts = read_runs(moov, stbl, b"stts")
+    frame_count = sum(count for count, _delta in stts)
+    seconds = media_duration / timescale if timescale else 0.0
+    # Use the dominant frame duration so one odd last frame does not skew it.
+    deltas = Counter()
+    for count, delta in stts:
+        deltas[delta] += count
+    common_delta = deltas.most_common(1)[0][0] if deltas else 0
+    if common_delta:
+        fps = timescale / common_delta
+    else:
+        fps = frame_count / seconds if seconds > 0 else 0.0
+
+    return {
+        "video_codec": codec.decode("latin-1"),
+        "width": width,
+        "height": height,
+        "fps": fps,
+        "frame_count": frame_count,
+        "video_duration": seconds,
+        "video_bitrate_kbps": _kbps(_total_sample_bytes(moov, stbl), seconds),
+    }
+
+
+def _audio_stream(moov: bytes, trak: tuple[int, int]) -> dict[str, object]:
+    timescale, media_duration = media_timescale(moov, trak)
+    stbl = sample_table(moov, trak)
+    codec, entry, end = _sample_entry(moov, stbl)
+    channels, _sample_size = struct.unpack_from(">HH", moov, entry + 16)
+    (sample_rate,) = struct.unpack_from(">I", moov, entry + 24)
+
+    name = codec.decode("latin-1").strip()
+    if codec == b"mp4a":
+        esds = find_box(moov, entry + 28, end, b"esds")
+        object_type = _esds_object_type(moov, *esds) if esds is not None else None
+        name = "mp3" if object_type in _MP3_OBJECT_TYPES else "aac" if object_type in _AAC_OBJECT_TYPES else "mp4a"
+    seconds = media_duration / timescale if timescale else 0.0
+    return {
+        "audio_codec": name,
+        "audio_channels": channels,
+        "audio_sample_rate": sample_rate >> 16,
+        "audio_bitrate_kbps": _kbps(_total_sample_bytes(moov, stbl), seconds),
+    }
+
+
+def _esds_object_type(data: bytes, start: int, end: int) -> int | None:
+    """objectTypeIndication from the DecoderConfigDescriptor inside an esds box."""
+    position = start + 4
+    while position < end:
+        tag = data[position]
+        length, position = _descriptor_length(data, position + 1)
+        if tag == 0x03:
+            flags = data[position + 2]
+            position += 3
+            if flags & 0x80:
+                position += 2
+            if flags & 0x40:
+                position += 1 + data[position]
+            if flags & 0x20:
+                position += 2
+            continue
+        if tag == 0x04:
+            return data[position]
+        position += length
+    return None
+
+
+def _descriptor_length(data: bytes, position: int) -> tuple[int, int]:
+    length = 0
+    for _ in range(4):
+        byte = data[position]
+        position += 1
+        length = (length << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            break
+    return length, position
+
+
+def source_metadata(path: str | Path) -> dict[str, object]:
+    """
+    fps, width, height, duration and video bitrate for the converter. Files
+    the atom parser cannot read fall back to opening the clip with MoviePy and
+    estimating the bitrate from the file size.
+    """
+    try:
+        info = probe(path)
+        return {
+            "fps": info["fps"],
+            "width": info["width"],
+            "height": info["height"],
+            "duration": info["duration"],
+            "bitrate_kbps": info["video_bitrate_kbps"] or info["bitrate_kbps"],
+            "audio_codec": info["audio_codec"],
+            "audio_bitrate_kbps": info.get("audio_bitrate_kbps", 0.0),
+        }
+    except ValueError:
+        pass
+
+    from moviepy import VideoFileClip
+
+    with VideoFileClip(str(path)) as clip:
+        duration = float(clip.duration or 0)
+        return {
+            "fps": float(clip.fps or 0),
+            "width": int(clip.w),
+            "height": int(clip.h),
+            "duration": duration,
+            "bitrate_kbps": Path(path).stat().st_size * 8 / duration / 1000 if duration > 0 else 0.0,
+            "audio_codec": None,
+            "audio_bitrate_kbps": 0.0,
+        }
+
+
+def trim_source_info(path: str | Path) -> dict[str, object]:
+    """Duration, keyframe times and codecs for the ffmpeg trim paths, without decoding when possible."""
+    try:
+        info = probe(path)
+    except ValueError:
+        from ffmpeg_cli import probe_keyframes
+
+        return probe_keyframes(str(path))
+    return {
+        "duration": info["duration"],
+        "keyframes": load_index(path)["keyframes"],
+        "audio_codec": info["audio_codec"],
+        "video_codec": info["video_codec"],
+    }
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from ffmpeg_cli import ProgressCallback, audio_args, run_ffmpeg, video_filter
+from metrics import ConversionMetrics
+from mp4probe import trim_source_info
+
+
+def convert_native(
+    settings: dict[str, str | int | float | None],
+    on_progress: ProgressCallback | None = None,
+    should_cancel: Callable[[], bool] | None = None,
+    metrics: ConversionMetrics | None = None,
+) -> None:
+    """
+    Trim, change FPS, scale and encode in one ffmpeg run: decoding, the
+    fps/scale filter graph and x264 all stay inside ffmpeg, so no frame is
+    copied into Python. Progress comes from ffmpeg's -progress output.
+    """
+    input_path = str(settings["input_path"])
+    output_path = Path(str(settings["output_path"]))
+    info = trim_source_info(input_path)
+    duration = float(info["duration"])
+    start = float(settings["trim_start"] or 0)
+    end = min(float(settings["trim_end"]), duration) if settings["trim_end"] is not None else duration
+    rate = ["-b:v", str(settings["bitrate"])] if settings["bitrate"] is not None else []
+
+    started = time.perf_counter()
+    run_ffmpeg(
+        [
+            # -ss before -i seeks on the input; when re-encoding ffmpeg still
+            # decodes from the previous keyframe and drops up to the exact start.
+            "-ss", f"{start:.6f}", "-i", input_path, "-t", f"{end - start:.6f}",
+            "-map", "0:v:0",
+            "-vf", video_filter(settings),
+            "-c:v", "libx264", "-preset", str(settings.get("preset") or "medium"), *rate,
+            "-threads", str(settings.get("threads") or 0),
+            "-pix_fmt", "yuv420p",
+            *audio_args(info["audio_codec"]),
+            "-movflags", "+faststart",
+            str(output_path),
+        ],
+        end - start,
+        on_progress,
+        should_cancel,
+    )
+    if metrics is not None:
+        # Decode, filter and encode overlap inside ffmpeg; they count as one stage.
+        metrics.add("encode", time.perf_counter() - started, int((end - start) * float(settings["fps"])))
+    if on_progress is not None:
+        on_progress(1.0, 0.0)
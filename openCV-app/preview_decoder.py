@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+
+PREVIEW_SIZE = (320, 180)
+
+# Thumbnails are about 170 KB each at the preview size, so this keeps a few
+# hundred scrub positions.
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+
+
+class FrameCache:
+    """LRU cache of preview thumbnails, bounded by their pixel data size. Thread-safe."""
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._images: OrderedDict[Hashable, Image.Image] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Image.Image | None:
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+            return image
+
+    def put(self, key: Hashable, image: Image.Image) -> None:
+        size = _image_bytes(image)
+        with self._lock:
+            previous = self._images.pop(key, None)
+            if previous is not None:
+                self.bytes -= _image_bytes(previous)
+            self._images[key] = image
+            self.bytes += size
+            while self.bytes > self.max_bytes and len(self._images) > 1:
+                _key, evicted = self._images.popitem(last=False)
+                self.bytes -= _image_bytes(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._images.clear()
+            self.bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._images)
+
+
+class PreviewDecoder:
+    """
+    Keeps one VideoFileClip open on a worker thread and decodes preview frames
+    from it. Only the newest request is decoded: a request made while another
+    is waiting replaces it, so a fast scrub does not queue up every position
+    it passed through. Results go to deliver(token, seconds, image, error) on
+    the worker thread; callers compare the token with the one request() gave
+    them.
+    """
+
+    def __init__(
+        self,
+        deliver: Callable[[int, float, Image.Image | None, str | None], None],
+        max_cache_bytes: int = DEFAULT_CACHE_BYTES,
+    ) -> None:
+        self.deliver = deliver
+        self.cache = FrameCache(max_cache_bytes)
+        self._token = 0
+        self._pending: tuple[int, str, float, Hashable] | None = None
+        self._closed = False
+        self._condition = threading.Condition()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def request(self, path: str, seconds: float, fps: float) -> tuple[int, Image.Image | None]:
+        """
+        Return (token, cached image). On a cache miss the image is None and the
+        frame is decoded in the background.
+        """
+        key = _frame_key(path, seconds, fps)
+        with self._condition:
+            self._token += 1
+            token = self._token
+            cached = self.cache.get(key)
+            if cached is not None:
+                # A hit also supersedes whatever is still waiting to decode.
+                self._pending = None
+                return token, cached
+            self._pending = (token, path, seconds, key)
+            self._condition.notify()
+        return token, None
+
+    def close(self) -> None:
+        with self._condition:
+            self._closed = True
+            self._pending = None
+            self._condition.notify()
+
+    def _run(self) -> None:
+        clip = None
+        clip_path = ""
+        try:
+            while True:
+                with self._condition:
+                    while self._pending is None and not self._closed:
+                        self._condition.wait()
+                    if self._closed:
+                        return
+                    token, path, seconds, key = self._pending
+                    self._pending = None
+
+                try:
+                    # Imported on first use so starting the app does not wait for PIL and MoviePy.
+                    from PIL import Image
+                    from moviepy import VideoFileClip
+
+                    if path != clip_path:
+                        if clip is not None:
+                            clip.close()
+                            clip = None
+                        self.cache.clear()
+                        clip = VideoFileClip(path, audio=False)
+                        clip_path = path
+                    image = Image.fromarray(clip.get_frame(seconds))
+                    image.thumbnail(PREVIEW_SIZE, Image.Resampling.LANCZOS)
+                    self.cache.put(key, image)
+                    error = None
+                except Exception as exc:
+                    image = None
+                    error = str(exc)
+                    # Reopen next time; the reader may be in a bad state.
+                    if clip is not None:
+                        clip.close()
+                    clip = None
+                    clip_path = ""
+
+                with self._condition:
+                    stale = token != self._token
+                if not stale:
+                    self.deliver(token, seconds, image, error)
+        finally:
+            if clip is not None:
+                clip.close()
+
+
+def _frame_key(path: str, seconds: float, fps: float) -> Hashable:
+    # Positions inside the same source frame share an entry.
+    if fps > 0:
+        return path, int(seconds * fps)
+    return path, round(seconds, 3)
+
+
+def _image_bytes(image: Image.Image) -> int:
+    return image.width * image.height * len(image.getbands())
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from converter import ConversionCancelled
+from ffmpeg_cli import ProgressCallback, audio_args, concat_list_entry, run_ffmpeg, video_filter
+from metrics import ConversionMetrics
+from mp4probe import trim_source_info
+
+
+# Segments shorter than this are not worth a process of their own.
+MIN_SEGMENT_SECONDS = 4.0
+
+
+def default_segment_count() -> int:
+    return max(1, (os.cpu_count() or 1) // 2)
+
+
+def plan_segments(start: float, end: float, keyframes: list[float], count: int) -> list[tuple[float, float]]:
+    """
+    Split [start, end) into at most count ranges. Inner boundaries sit on the
+    keyframe nearest each even split point, so every segment but the first
+    starts decoding without throwing frames away.
+    """
+    count = max(1, min(count, int((end - start) // MIN_SEGMENT_SECONDS) or 1))
+    inner = [time for time in keyframes if start + MIN_SEGMENT_SECONDS / 2 < time < end - MIN_SEGMENT_SECONDS / 2]
+    boundaries = [start]
+    for index in range(1, count):
+        target = start + (end - start) * index / count
+        if not inner:
+            break
+        nearest = min(inner, key=lambda time: abs(time - target))
+        if nearest > boundaries[-1]:
+            boundaries.append(nearest)
+    boundaries.append(end)
+    return list(zip(boundaries, boundaries[1:]))
+
+
+class SegmentProgress:
+    """
+    Combines per-segment progress into one (progress, eta) stream, weighting
+    each segment by its length. Called from several runner threads.
+    """
+
+    def __init__(self, lengths: list[float], on_progress: ProgressCallback | None) -> None:
+        self.lengths = lengths
+        self.total = sum(lengths) or 1.0
+        self.done = [0.0] * len(lengths)
+        self.on_progress = on_progress
+        self.started_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def callback(self, index: int) -> ProgressCallback:
+        def update(progress: float, _eta: float | None) -> None:
+            with self._lock:
+                self.done[index] = progress
+                combined = sum(done * length for done, length in zip(self.done, self.lengths)) / self.total
+            if self.on_progress is None:
+                return
+            elapsed = time.monotonic() - self.started_at
+            eta = elapsed * (1 - combined) / combined if combined > 0 else None
+            self.on_progress(combined, eta)
+
+        return update
+
+
+def convert_segmented(
+    settings: dict[str, str | int | float | None],
+    segment_count: int,
+    on_progress: ProgressCallback | None = None,
+    should_cancel: Callable[[], bool] | None = None,
+    metrics: ConversionMetrics | None = None,
+) -> None:
+    """
+    Encode the trimmed range as segment_count independent x264 processes and
+    join them with the concat demuxer (stream copy, no second encode). Audio
+    is encoded (or copied, for AAC sources) once over the whole range so there
+    are no AAC priming gaps at the segment joins.
+    """
+    input_path = str(settings["input_path"])
+    output_path = Path(str(settings["output_path"]))
+    info = trim_source_info(input_path)
+    duration = float(info["duration"])
+    start = float(settings["trim_start"] or 0)
+    end = min(float(settings["trim_end"]), duration) if settings["trim_end"] is not None else duration
+
+    segments = plan_segments(start, end, info["keyframes"], segment_count)
+    # The job's thread budget (the auto-tuner's choice, when it ran) is shared
+    # out between the segment encoders rather than given to each of them.
+    total_threads = int(settings.get("threads") or os.cpu_count() or 1)
+    threads = max(1, total_threads // len(segments))
+    rate = ["-b:v", str(settings["bitrate"])] if settings["bitrate"] is not None else []
+    has_audio = info["audio_codec"] is not None
+
+    parts = [output_path.with_name(f"{output_path.stem}.part{index:03d}-tmp.ts") for index in range(len(segments))]
+    audio = output_path.with_name(f"{output_path.stem}.audio-tmp.m4a")
+    concat_list = output_path.with_name(f"{output_path.stem}.concat-tmp.txt")
+    lengths = [segment_end - segment_start for segment_start, segment_end in segments]
+    # Audio is cheap next to video; give it a nominal share of the progress bar.
+    progress = SegmentProgress(lengths + ([sum(lengths) * 0.02] if has_audio else []), on_progress)
+    failed = threading.Event()
+
+    def cancelled() -> bool:
+        return failed.is_set() or (should_cancel is not None and should_cancel())
+
+    def encode_part(index: int) -> None:
+        segment_start, segment_end = segments[index]
+        run_ffmpeg(
+            [
+                "-ss", f"{segment_start:.6f}", "-i", input_path, "-t", f"{segment_end - segment_start:.6f}",
+                "-map", "0:v:0", "-an",
+                "-vf", video_filter(settings),
+                "-c:v", "libx264", "-preset", str(settings.get("preset") or "medium"), *rate, "-threads", str(threads),
+                "-f", "mpegts", str(parts[index]),
+            ],
+            segment_end - segment_start,
+            progress.callback(index),
+            cancelled,
+        )
+
+    def encode_audio() -> None:
+        started = time.perf_counter()
+        run_ffmpeg(
+            [
+                "-ss", f"{start:.6f}", "-i", input_path, "-t", f"{end - start:.6f}",
+                "-vn", *audio_args(info["audio_codec"]),
+                str(audio),
+            ],
+            end - start,
+            progress.callback(len(segments)),
+            cancelled,
+        )
+        if metrics is not None:
+            metrics.add("audio", time.perf_counter() - started)
+
+    def guarded(task: Callable[[], None]) -> None:
+        try:
+            task()
+        except BaseException:
+            # Stop the sibling processes instead of letting them finish for nothing.
+            failed.set()
+            raise
+
+    try:
+        tasks = [lambda index=index: encode_part(index) for index in range(len(segments))]
+        if has_audio:
+            tasks.append(encode_audio)
+        # Each task is an ffmpeg process; the threads only wait on them.
+        encode_started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(tasks)) as pool:
+            futures = [pool.submit(guarded, task) for task in tasks]
+        errors = [future.exception() for future in futures if future.exception() is not None]
+        if errors:
+            # Report the root cause rather than a sibling that was stopped because of it.
+            raise next((error for error in errors if not isinstance(error, ConversionCancelled)), errors[0])
+        if metrics is not None:
+            # The parts run side by side, so the video stage is the pool's wall time.
+            metrics.add("encode", time.perf_counter() - encode_started, int((end - start) * float(settings["fps"])))
+
+        concat_list.write_text("".join(concat_list_entry(part) for part in parts), encoding="utf-8")
+        mux = ["-f", "concat", "-safe", "0", "-i", str(concat_list)]
+        if has_audio:
+            mux += ["-i", str(audio), "-map", "0:v:0", "-map", "1:a:0"]
+        mux += ["-c", "copy", "-movflags", "+faststart", str(output_path)]
+        mux_started = time.perf_counter()
+        run_ffmpeg(mux, end - start, None, should_cancel)
+        if metrics is not None:
+            metrics.add("mux", time.perf_counter() - mux_started)
+        if on_progress is not None:
+            on_progress(1.0, 0.0)
+    finally:
+        for path in (*parts, audio, concat_list):
+            path.unlink(missing_ok=True)
+
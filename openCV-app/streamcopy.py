@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from ffmpeg_cli import ProgressCallback, concat_list_entry, run_ffmpeg
+from mp4probe import trim_source_info
+
+
+# Requested FPS within this of the source counts as "unchanged".
+FPS_TOLERANCE = 0.01
+
+# A trim start closer than this to a keyframe is treated as on the keyframe.
+KEYFRAME_EPSILON = 0.002
+
+# Quality of the re-encoded head GOP in frame-exact mode. Visually lossless,
+# so the seam with the copied remainder is not noticeable.
+HEAD_CRF = 18
+
+# The head is re-encoded with x264, so the copied remainder must be H.264 too:
+# sample entry names from the MP4 parser, ffmpeg's name from its fallback.
+H264_CODECS = {"avc1", "avc3", "h264"}
+
+
+class StreamCopyUnsupported(Exception):
+    pass
+
+
+def is_trim_only(
+    settings: dict[str, str | int | float | None],
+    source_fps: float,
+    source_width: int,
+    source_height: int,
+) -> bool:
+    """True when the job keeps size, FPS and source quality, so only the trim changes."""
+    return (
+        settings["bitrate"] is None
+        and int(settings["width"]) == source_width
+        and int(settings["height"]) == source_height
+        and abs(float(settings["fps"]) - source_fps) <= FPS_TOLERANCE
+    )
+
+
+def keyframe_at_or_before(keyframes: list[float], seconds: float) -> float:
+    earlier = [time for time in keyframes if time <= seconds + KEYFRAME_EPSILON]
+    return earlier[-1] if earlier else 0.0
+
+
+def keyframe_after(keyframes: list[float], seconds: float) -> float | None:
+    later = [time for time in keyframes if time > seconds + KEYFRAME_EPSILON]
+    return later[0] if later else None
+
+
+def stream_copy_trim(
+    settings: dict[str, str | int | float | None],
+    on_progress: ProgressCallback | None = None,
+    should_cancel: Callable[[], bool] | None = None,
+    frame_exact: bool = False,
+) -> float:
+    """
+    Trim without re-encoding. The start snaps back to the previous keyframe,
+    unless frame_exact is set, in which case only the partial GOP up to the
+    next keyframe is re-encoded and the rest is copied. Returns the start time
+    actually used.
+    """
+    input_path = str(settings["input_path"])
+    output_path = Path(str(settings["output_path"]))
+    info = trim_source_info(input_path)
+    keyframes: list[float] = info["keyframes"]
+    duration = float(info["duration"])
+    start = float(settings["trim_start"] or 0)
+    end = float(settings["trim_end"]) if settings["trim_end"] is not None else duration
+    end = min(end, duration)
+    started_at = time.monotonic()
+
+    snapped = keyframe_at_or_before(keyframes, start)
+    if not frame_exact or start - snapped <= KEYFRAME_EPSILON:
+        _copy_range(input_path, output_path, snapped, end, on_progress, should_cancel, (0.0, 1.0), started_at)
+        return snapped
+
+    if info["video_codec"] not in H264_CODECS:
+        # An x264 head joined to, say, an HEVC remainder would not play.
+        raise StreamCopyUnsupported(f"Frame-exact trim needs H.264 video, source has {info['video_codec']}.")
+    if info["audio_codec"] not in (None, "aac"):
+        # The re-encoded head carries AAC audio; joining it to a copied
+        # remainder in another codec would not play.
+        raise StreamCopyUnsupported(f"Frame-exact trim needs AAC audio, source has {info['audio_codec']}.")
+
+    split = keyframe_after(keyframes, start)
+    if split is None or split >= end:
+        raise StreamCopyUnsupported("The trimmed range has no keyframe to copy from.")
+
+    # Both parts go through MPEG-TS so every keyframe carries its own SPS/PPS.
+    # The x264 head and the source encoder's remainder use different parameter
+    # sets, and an MP4-to-MP4 concat would keep only the head's.
+    head = output_path.with_name(f"{output_path.stem}.head-tmp.ts")
+    tail = output_path.with_name(f"{output_path.stem}.tail-tmp.ts")
+    concat_list = output_path.with_name(f"{output_path.stem}.concat-tmp.txt")
+    head_share = (split - start) / (end - start)
+    try:
+        run_ffmpeg(
+            [
+                "-ss", _seconds(start), "-i", input_path, "-t", _seconds(split - start),
+                "-map", "0:v:0", "-map", "0:a:0?",
+                "-c:v", "libx264", "-preset", str(settings.get("preset") or "medium"), "-crf", str(HEAD_CRF),
+                "-c:a", "aac",
+                "-f", "mpegts", str(head),
+            ],
+            split - start,
+            on_progress,
+            should_cancel,
+            (0.0, head_share),
+            started_at,
+        )
+        run_ffmpeg(
+            [
+                "-ss", _seconds(split), "-i", input_path, "-t", _seconds(end - split),
+                "-map", "0:v:0", "-map", "0:a:0?",
+                "-c", "copy",
+                "-f", "mpegts", str(tail),
+            ],
+            end - split,
+            on_progress,
+            should_cancel,
+            (head_share, 0.98),
+            started_at,
+        )
+        concat_list.write_text(concat_list_entry(head) + concat_list_entry(tail), encoding="utf-8")
+        run_ffmpeg(
+            [
+                "-f", "concat", "-safe", "0", "-i", str(concat_list),
+                "-c", "copy", "-bsf:a", "aac_adtstoasc",
+                "-movflags", "+faststart",
+                str(output_path),
+            ],
+            end - start,
+            on_progress,
+            should_cancel,
+            (0.98, 1.0),
+            started_at,
+        )
+    finally:
+        for path in (head, tail, concat_list):
+            path.unlink(missing_ok=True)
+    return start
+
+
+def _copy_range(
+    input_path: str,
+    output_path: Path,
+    start: float,
+    end: float,
+    on_progress: ProgressCallback | None,
+    should_cancel: Callable[[], bool] | None,
+    progress_range: tuple[float, float],
+    started_at: float,
+) -> None:
+    # -ss before -i seeks the demuxer; at a keyframe time that is exactly the
+    # first packet copied.
+    run_ffmpeg(
+        [
+            "-ss", _seconds(start), "-i", input_path, "-t", _seconds(end - start),
+            "-map", "0:v:0", "-map", "0:a:0?",
+            "-c", "copy",
+            "-avoid_negative_ts", "make_zero",
+            "-movflags", "+faststart",
+            str(output_path),
+        ],
+        end - start,
+        on_progress,
+        should_cancel,
+        progress_range,
+        started_at,
+    )
+
+
+def _seconds(value: float) -> str:
+    return f"{max(value, 0.0):.6f}"
+
@@ -0,0 +1,332 @@
+"""
+A* 経路探索ベンチマーク。
+
+generate_grid と同じ設定（サイズ・障害物確率・コスト範囲）でシード付きのグリッドを生成し、
+各探索戦略を描画なし（ヘッドレス）で実行して次の値を計測します。
+  - expansions/sec: 1秒あたりの展開ノード数
+  - optimality: 経路コスト ÷ Dijkstra 法（4方向）による最短コスト（1.0 が最適。
+                8方向／Theta* は斜め移動できるぶん 1.0 を下回る）
+  - peak memory: 探索1回あたりのピークメモリ（tracemalloc）
+  - latency: 探索1回のレイテンシのパーセンタイル (p50 / p90 / p99)
+  - preprocess: 前処理が必要な戦略（ALT など）の前処理時間（クエリ時間には含めない）。
+                ゴールごとに必要な計算（ALT のヒューリスティック表）はクエリ時間に含める
+
+使い方:
+  uv run python benchmark.py                                 # quick プロファイルを実行
+  uv run python benchmark.py --profile full --output result.json
+  uv run python benchmark.py --check bench_baseline.json     # コミット済みベースラインと比較
+  uv run python benchmark.py --update-baseline bench_baseline.json
+  uv run python benchmark.py --generator solvable              # 解けるマップだけで計測（mapgen.py）
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from landmarks import LandmarkTable  # noqa: E402
+from main import astar_visualize, generate_grid  # noqa: E402
+from mapgen import generate_solvable_grid  # noqa: E402
+from pathfinding import astar_search, zero_heuristic  # noqa: E402
+
+PROFILES = {
+    "quick": {
+        "sizes": [7, 32, 128],
+        "obstacle_probabilities": [0.1, 0.3],
+        "cost_ranges": [(1, 1), (1, 5)],
+        "seeds": [0, 1, 2],
+        "repeat": 3,
+    },
+    "full": {
+        "sizes": [7, 32, 128, 512, 1024, 4096],
+        "obstacle_probabilities": [0.0, 0.1, 0.2, 0.3],
+        "cost_ranges": [(1, 1), (1, 5), (1, 20)],
+        "seeds": [0, 1],
+        "repeat": 3,
+    },
+}
+
+
+def run_astar_visualize(grid, start, goal):
+    """main.py のジェネレーター版 A* を描画なしで最後まで回す"""
+    expanded = 0
+    cost = None
+    for _, _, _, current, finished_flag, gscore, _ in astar_visualize(grid, start, goal):
+        if finished_flag:
+            cost = gscore[current]
+            break
+        expanded += 1
+    return cost, expanded
+
+
+def run_astar(grid, start, goal):
+    _, cost, expanded = astar_search(grid, start, goal)
+    return cost, expanded
+
+
+def run_astar8(grid, start, goal):
+    _, cost, expanded = astar_search(grid, start, goal, mode="8")
+    return cost, expanded
+
+
+def run_theta(grid, start, goal):
+    _, cost, expanded = astar_search(grid, start, goal, mode="theta")
+    return cost, expanded
+
+
+def run_dijkstra(grid, start, goal):
+    _, cost, expanded = astar_search(grid, start, goal, heuristic=zero_heuristic)
+    return cost, expanded
+
+
+# ALT のランドマーク数
+ALT_LANDMARKS = 8
+
+
+def prepare_alt(grid):
+    """ランドマーク表を作り（前処理）、ALT ヒューリスティックで A* を回す関数を返す"""
+    table = LandmarkTable.build(grid, k=ALT_LANDMARKS, seed=0)
+
+    def run_alt(grid, start, goal):
+        # ゴールごとのヒューリスティック表（O(K·N)）はクエリのたびに必要なのでクエリ時間に含める
+        heuristic = table.heuristic_for(goal)
+        _, cost, expanded = astar_search(grid, start, goal, heuristic=heuristic)
+        return cost, expanded
+
+    return run_alt
+
+
+# 戦略名 -> (grid, start, goal) を受け取り (cost, expanded) を返す関数
+STRATEGIES = {
+    "astar_visualize": run_astar_visualize,
+    "astar": run_astar,
+    "dijkstra": run_dijkstra,
+    "astar8": run_astar8,
+    "theta": run_theta,
+}
+
+# 前処理が必要な戦略: 戦略名 -> grid を受け取り上と同じ形式の関数を返す関数
+PREPARED_STRATEGIES = {
+    "alt": prepare_alt,
+}
+
+
+def percentile(values, q):
+    """線形補間によるパーセンタイル（q は 0～100）"""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    pos = (len(ordered) - 1) * q / 100
+    lower = int(pos)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (pos - lower)
+
+
+def case_key(strategy, size, probability, cost_range):
+    return f"{strategy}/{size}x{size}/p{probability}/c{cost_range[0]}-{cost_range[1]}"
+
+
+# マップの生成方法（--generator）
+GENERATORS = ["generate_grid", "solvable"]
+
+
+def seeded_grid(size, probability, cost_range, seed, generator="generate_grid"):
+    """
+    再現可能なグリッドを作る。
+    - generate_grid: random をシードしてから main.generate_grid を呼ぶ（解けないマップも含む）
+    - solvable: mapgen.generate_solvable_grid で、スタートとゴールが連結なマップだけを作る
+    """
+    if generator == "solvable":
+        return generate_solvable_grid(
+            size, size, obstacle_probability=probability, cost_min=cost_range[0], cost_max=cost_range[1], seed=seed
+        ).tolist()
+    random.seed(seed)
+    return generate_grid(size, size, obstacle_probability=probability, cost_min=cost_range[0], cost_max=cost_range[1])
+
+
+def measure_peak_memory(func, grid, start, goal):
+    tracemalloc.start()
+    try:
+        func(grid, start, goal)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def run_case(size, probability, cost_range, seeds, repeat, strategies, generator="generate_grid"):
+    """1つのグリッド設定について全戦略を計測し、戦略ごとの結果辞書を返す"""
+    samples = {
+        name: {"latencies": [], "expanded": 0, "elapsed": 0.0, "peak": 0, "costs": [], "preprocess": 0.0}
+        for name in strategies
+    }
+    optimal_costs = []
+
+    for seed in seeds:
+        grid = seeded_grid(size, probability, cost_range, seed, generator)
+        start = (0, 0)
+        goal = (size - 1, size - 1)
+        optimal_cost, _ = run_dijkstra(grid, start, goal)
+        optimal_costs.append(optimal_cost)
+
+        for name in strategies:
+            sample = samples[name]
+            if name in PREPARED_STRATEGIES:
+                began = time.perf_counter()
+                func = PREPARED_STRATEGIES[name](grid)
+                sample["preprocess"] += time.perf_counter() - began
+            else:
+                func = STRATEGIES[name]
+            for _ in range(repeat):
+                began = time.perf_counter()
+                cost, expanded = func(grid, start, goal)
+                elapsed = time.perf_counter() - began
+                sample["latencies"].append(elapsed)
+                sample["elapsed"] += elapsed
+                sample["expanded"] += expanded
+            sample["costs"].append(cost)
+            sample["peak"] = max(sample["peak"], measure_peak_memory(func, grid, start, goal))
+
+    results = {}
+    for name, sample in samples.items():
+        ratios = [
+            cost / optimal
+            for cost, optimal in zip(sample["costs"], optimal_costs)
+            if cost is not None and optimal
+        ]
+        latencies = sample["latencies"]
+        results[case_key(name, size, probability, cost_range)] = {
+            "strategy": name,
+            "size": size,
+            "obstacle_probability": probability,
+            "cost_range": list(cost_range),
+            "solved": sum(cost is not None for cost in sample["costs"]),
+            "maps": len(seeds),
+            "expanded_per_query": sample["expanded"] / len(latencies),
+            "expansions_per_sec": sample["expanded"] / sample["elapsed"] if sample["elapsed"] > 0 else 0.0,
+            "optimality": max(ratios) if ratios else None,
+            "peak_memory_bytes": sample["peak"],
+            "latency_p50_ms": percentile(latencies, 50) * 1000,
+            "latency_p90_ms": percentile(latencies, 90) * 1000,
+            "latency_p99_ms": percentile(latencies, 99) * 1000,
+            "preprocess_ms": sample["preprocess"] / len(seeds) * 1000,
+            "costs": sample["costs"],
+        }
+    return results
+
+
+def run_benchmark(profile, strategies, repeat=None, generator="generate_grid"):
+    results = {}
+    for size in profile["sizes"]:
+        for probability in profile["obstacle_probabilities"]:
+            for cost_range in profile["cost_ranges"]:
+                case = run_case(
+                    size,
+                    probability,
+                    tuple(cost_range),
+                    profile["seeds"],
+                    repeat or profile["repeat"],
+                    strategies,
+                    generator,
+                )
+                for key, result in case.items():
+                    print(format_result(key, result), flush=True)
+                results.update(case)
+    return results
+
+
+def format_result(key, result):
+    optimality = result["optimality"]
+    optimality_text = f"{optimality:.3f}" if optimality is not None else "-"
+    return (
+        f"{key:<40} solved {result['solved']}/{result['maps']}  "
+        f"{result['expansions_per_sec']:>12,.0f} exp/s  "
+        f"opt {optimality_text:>6}  "
+        f"peak {result['peak_memory_bytes'] / 1024:>10,.1f} KiB  "
+        f"p50 {result['latency_p50_ms']:>9.3f} ms  "
+        f"p90 {result['latency_p90_ms']:>9.3f} ms  "
+        f"p99 {result['latency_p99_ms']:>9.3f} ms  "
+        f"prep {result['preprocess_ms']:>9.1f} ms"
+    )
+
+
+def check_regressions(results, baseline, tolerance, generator="generate_grid"):
+    """
+    ベースラインと比較して回帰の一覧を返す。
+    - 経路コストと展開ノード数はシード固定なので完全一致を要求する
+    - expansions/sec は実行環境で揺れるため tolerance の割合までの低下を許容する
+    """
+    problems = []
+    recorded = baseline.get("generator", "generate_grid")
+    if recorded != generator:
+        return [f"baseline was recorded with generator {recorded!r}, not {generator!r}"]
+    for key, expected in baseline["results"].items():
+        actual = results.get(key)
+        if actual is None:
+            continue
+        if actual["costs"] != expected["costs"]:
+            problems.append(f"{key}: path costs changed {expected['costs']} -> {actual['costs']}")
+        if actual["expanded_per_query"] > expected["expanded_per_query"]:
+            problems.append(
+                f"{key}: expanded nodes increased "
+                f"{expected['expanded_per_query']:.1f} -> {actual['expanded_per_query']:.1f}"
+            )
+        floor = expected["expansions_per_sec"] * (1 - tolerance)
+        if actual["expansions_per_sec"] < floor:
+            problems.append(
+                f"{key}: expansions/sec {actual['expansions_per_sec']:,.0f} "
+                f"below {floor:,.0f} (baseline {expected['expansions_per_sec']:,.0f})"
+            )
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="A* 経路探索ベンチマーク")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="quick")
+    parser.add_argument(
+        "--strategy",
+        action="append",
+        choices=sorted([*STRATEGIES, *PREPARED_STRATEGIES]),
+        help="計測する戦略（複数指定可）",
+    )
+    parser.add_argument("--generator", choices=GENERATORS, default="generate_grid", help="マップの生成方法")
+    parser.add_argument("--repeat", type=int, help="1マップあたりの繰り返し回数")
+    parser.add_argument("--output", help="結果を書き出す JSON ファイル")
+    parser.add_argument("--check", metavar="BASELINE", help="ベースライン JSON と比較し、回帰があれば終了コード1")
+    parser.add_argument("--update-baseline", metavar="BASELINE", help="結果をベースラインとして保存する")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="expansions/sec の許容低下率（既定 0.5）")
+    args = parser.parse_args(argv)
+
+    strategies = args.strategy or [*STRATEGIES, *PREPARED_STRATEGIES]
+    results = run_benchmark(PROFILES[args.profile], strategies, args.repeat, args.generator)
+    report = {
+        "profile": args.profile,
+        "generator": args.generator,
+        "python": sys.version.split()[0],
+        "results": results,
+    }
+
+    for path in (args.output, args.update_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+
+    if args.check:
+        with open(args.check, encoding="utf-8") as f:
+            baseline = json.load(f)
+        problems = check_regressions(results, baseline, args.tolerance, args.generator)
+        if problems:
+            print("\nRegressions:")
+            for problem in problems:
+                print(f"  {problem}")
+            return 1
+        print("\nNo regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
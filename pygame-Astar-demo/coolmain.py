@@ -1,15 +1,26 @@
 import pygame
 import random
 import heapq
+import math
 import sys
 
+from mapgen import generate_solvable_grid
+from pathfinding import DEFAULT_HEURISTICS, LineOfSight, MODES, move_cost, neighbor_offsets, smooth_path
+
+# 探索モードの表示名（M キーで切り替え）
+MODE_LABELS = {"4": "4-dir", "8": "8-dir", "theta": "Theta*"}
+
 def heuristic(a, b):
     """マンハッタン距離をヒューリスティックとして利用（最低移動コストが1の場合）"""
     return abs(a[0] - b[0]) + abs(a[1] - b[1])
 
-def astar_visualize(grid, start, goal):
+def astar_visualize(grid, start, goal, mode="4"):
     """
     A* アルゴリズム本体（ジェネレーター版）
+    mode:
+      - "4": 上下左右のみ（マンハッタン距離）
+      - "8": 斜め移動あり（オクタイル距離、斜めはコスト×√2）
+      - "theta": Theta*。親ノードから見通せれば直線で繋ぐ任意角度の経路（ユークリッド距離）
     各イテレーションで以下の状態を yield します:
       - open_heap: 探索候補の優先キュー
       - closed_set: 評価済みノードのセット
@@ -19,14 +30,16 @@ def astar_visualize(grid, start, goal):
       - gscore: 開始から各ノードまでの累積コスト辞書
       - fscore: 推定総コスト辞書
     """
+    h = heuristic if mode == "4" else DEFAULT_HEURISTICS[mode]
     open_heap = []
-    heapq.heappush(open_heap, (heuristic(start, goal), start))
+    heapq.heappush(open_heap, (h(start, goal), start))
     closed_set = set()
     came_from = {}
     gscore = {start: 0}
-    fscore = {start: heuristic(start, goal)}
-    # 4方向移動（上下左右）
-    neighbors = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+    fscore = {start: h(start, goal)}
+    neighbors = neighbor_offsets(mode)
+    # Theta* の見通し判定（この探索の間だけセル対ごとにキャッシュ）
+    los = LineOfSight(grid) if mode == "theta" else None
     
     while open_heap:
         current = heapq.heappop(open_heap)[1]
@@ -38,23 +51,29 @@ def astar_visualize(grid, start, goal):
 
         closed_set.add(current)
 
+        parent = came_from.get(current)
         for dx, dy in neighbors:
-            neighbor = (current[0] + dx, current[1] + dy)
-            # グリッド範囲外ならスキップ
-            if neighbor[0] < 0 or neighbor[0] >= len(grid) or neighbor[1] < 0 or neighbor[1] >= len(grid[0]):
-                continue
-            # 障害物（-1）の場合はスキップ
-            if grid[neighbor[0]][neighbor[1]] == -1:
+            # グリッド範囲外・障害物・障害物の角のすり抜けはスキップ
+            step_cost = move_cost(grid, current[0], current[1], dx, dy)
+            if step_cost is None:
                 continue
+            neighbor = (current[0] + dx, current[1] + dy)
 
-            tentative_gscore = gscore[current] + grid[neighbor[0]][neighbor[1]]
+            tentative_gscore = gscore[current] + step_cost
+            via = current
+            # Theta*: 親から直接見通せて、その方が安ければ親と直線で繋ぐ
+            if los is not None and parent is not None:
+                line_cost = los.cost(parent, neighbor)
+                if line_cost is not None and gscore[parent] + line_cost < tentative_gscore:
+                    tentative_gscore = gscore[parent] + line_cost
+                    via = parent
             if neighbor in closed_set and tentative_gscore >= gscore.get(neighbor, float('inf')):
                 continue
 
             if tentative_gscore < gscore.get(neighbor, float('inf')):
-                came_from[neighbor] = current
+                came_from[neighbor] = via
                 gscore[neighbor] = tentative_gscore
-                fscore[neighbor] = tentative_gscore + heuristic(neighbor, goal)
+                fscore[neighbor] = tentative_gscore + h(neighbor, goal)
                 heapq.heappush(open_heap, (fscore[neighbor], neighbor))
     
     yield open_heap, closed_set, came_from, current, False, gscore, fscore
@@ -143,11 +162,15 @@ def draw_grid(screen, grid, cell_size, open_heap, closed_set, came_from, current
         pygame.draw.rect(screen, (255, 105, 180), rect, border_radius=8)
     
     # 経路（確定した最短経路）は明るい緑で描画
+    # 斜め・任意角度の経路は経由点だけが並ぶので、セル中心を結ぶ線も描く
     if path:
         for cell in path:
             i, j = cell
             rect = pygame.Rect(j * cell_size + 2, i * cell_size + 2, cell_size - 4, cell_size - 4)
             pygame.draw.rect(screen, (50, 205, 50), rect, border_radius=8)
+        if len(path) > 1:
+            points = [(j * cell_size + cell_size // 2, i * cell_size + cell_size // 2) for i, j in path]
+            pygame.draw.lines(screen, (50, 205, 50), False, points, 4)
     
     # スタート（濃い緑）とゴール（濃い赤）の描画
     i, j = start
@@ -164,7 +187,9 @@ def draw_grid(screen, grid, cell_size, open_heap, closed_set, came_from, current
             cell = (i, j)
             if cell in gscore:
                 cost_val = gscore[cell]
-                g_text = g_font.render(str(cost_val), True, (220, 220, 220))
+                # 斜め移動ではコストが小数になるので小数1桁で表示
+                cost_str = str(cost_val) if isinstance(cost_val, int) else f"{cost_val:.1f}"
+                g_text = g_font.render(cost_str, True, (220, 220, 220))
                 text_rect = g_text.get_rect(center=(j * cell_size + cell_size // 2, i * cell_size + cell_size // 2))
                 screen.blit(g_text, text_rect)
 
@@ -200,6 +225,19 @@ def draw_car(screen, pos, cell_size):
     car_rect.center = pos
     pygame.draw.rect(screen, (255, 0, 0), car_rect, border_radius=5)
 
+def segment_frames(start_cell, end_cell, movement_delay):
+    """
+    区間 start_cell → end_cell の移動に使うフレーム数。
+    斜め・任意角度の経路では区間の長さがまちまちなので、長さに比例させて速度を一定に保つ。
+    """
+    return max(1, int(round(movement_delay * math.dist(start_cell, end_cell))))
+
+def draw_mode_label(screen, mode, pos):
+    """現在の探索モードを表示"""
+    font = pygame.font.SysFont("Calibri", 20, bold=True)
+    text = font.render(f"Mode: {MODE_LABELS[mode]}  [M]", True, (230, 230, 250))
+    screen.blit(text, pos)
+
 def main():
     pygame.init()
     cell_size = 40
@@ -213,11 +251,12 @@ def main():
     pygame.display.set_caption("A* 経路探索 可視化 (石と車付き)")
     
     # 初回グリッド生成（障害物とランダム移動コスト付き）
-    grid = generate_grid(rows, cols, obstacle_probability=0.3, cost_min=1, cost_max=5)
+    grid = generate_solvable_grid(rows, cols, obstacle_probability=0.3, cost_min=1, cost_max=5).tolist()
     start = (0, 0)
     goal = (rows - 1, cols - 1)
     
-    generator = astar_visualize(grid, start, goal)
+    mode = "4"
+    generator = astar_visualize(grid, start, goal, mode)
     clock = pygame.time.Clock()
     path = []
     finished = False
@@ -225,7 +264,7 @@ def main():
     # 車のアニメーション用の変数（経路上を移動）
     car_index = 0    # 現在の経路インデックス
     car_timer = 0    # セル間の補間用カウンター
-    movement_delay = 20  # 1セル分の移動に必要なフレーム数（速度調整）
+    movement_delay = 20  # 1セル分（長さ1）の移動に必要なフレーム数（速度調整）
     
     # 下部に「Retry」ボタンを配置
     button_rect = pygame.Rect(10, grid_height + 10, 100, 30)
@@ -237,19 +276,31 @@ def main():
                 sys.exit()
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 if button_rect.collidepoint(event.pos):
-                    grid = generate_grid(rows, cols, obstacle_probability=0.3, cost_min=1, cost_max=5)
-                    generator = astar_visualize(grid, start, goal)
+                    grid = generate_solvable_grid(rows, cols, obstacle_probability=0.3, cost_min=1, cost_max=5).tolist()
+                    generator = astar_visualize(grid, start, goal, mode)
                     finished = False
                     path = []
                     # 車の位置リセット
                     car_index = 0
                     car_timer = 0
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_m:
+                # 探索モードを切り替えて、同じグリッドで探索し直す
+                mode = MODES[(MODES.index(mode) + 1) % len(MODES)]
+                generator = astar_visualize(grid, start, goal, mode)
+                finished = False
+                path = []
+                car_index = 0
+                car_timer = 0
         
         if not finished:
             try:
                 open_heap, closed_set, came_from, current, finished_flag, gscore, fscore = next(generator)
                 if finished_flag:
                     path = reconstruct_path(came_from, goal)
+                    if mode != "4":
+                        # 見通せる区間を直線で繋ぎ、車が短くまっすぐ走れる経路にする。
+                        # 4方向モードでは探索が許していない斜め移動になるので平滑化しない
+                        path = smooth_path(grid, path)
                     finished = True
             except StopIteration:
                 finished = True
@@ -261,13 +312,13 @@ def main():
         if finished and path:
             if car_index < len(path) - 1:
                 car_timer += 1
-                if car_timer >= movement_delay:
+                if car_timer >= segment_frames(path[car_index], path[car_index + 1], movement_delay):
                     car_timer = 0
                     car_index += 1
                 
                 # 現在のセルと次のセルの中心間で線形補間
                 if car_index < len(path) - 1:
-                    t = car_timer / movement_delay
+                    t = car_timer / segment_frames(path[car_index], path[car_index + 1], movement_delay)
                     car_pos = interpolate_cell_position(path[car_index], path[car_index + 1], t, cell_size)
                 else:
                     car_pos = (path[-1][1] * cell_size + cell_size // 2, path[-1][0] * cell_size + cell_size // 2)
@@ -276,8 +327,9 @@ def main():
                 car_pos = (path[-1][1] * cell_size + cell_size // 2, path[-1][0] * cell_size + cell_size // 2)
             draw_car(screen, car_pos, cell_size)
         
-        # 下部に Retry ボタンの描画
+        # 下部に Retry ボタンと探索モードの描画
         draw_button(screen, button_rect, "Retry")
+        draw_mode_label(screen, mode, (button_rect.right + 12, button_rect.top + 6))
         
         pygame.display.update()
         # 経路探索中は低速（例：5fps）、アニメーション時は多少滑らかに
@@ -3,6 +3,8 @@ import random
 import heapq
 import sys
 
+from mapgen import generate_solvable_grid
+
 # A* のヒューリスティック（マンハッタン距離）
 def heuristic(a, b):
     return abs(a[0] - b[0]) + abs(a[1] - b[1])
@@ -194,7 +196,7 @@ def main():
     cam_offset = (screen_width // 2, 100)
     
     # グリッド生成とスタート/ゴールの設定
-    grid = generate_grid(rows, cols, obstacle_probability=0.3, cost_min=1, cost_max=5)
+    grid = generate_solvable_grid(rows, cols, obstacle_probability=0.3, cost_min=1, cost_max=5).tolist()
     start = (0, 0)
     goal = (rows - 1, cols - 1)
     
@@ -218,7 +220,7 @@ def main():
             # スペースキーでグリッド再生成
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_SPACE:
-                    grid = generate_grid(rows, cols, obstacle_probability=0.3, cost_min=1, cost_max=5)
+                    grid = generate_solvable_grid(rows, cols, obstacle_probability=0.3, cost_min=1, cost_max=5).tolist()
                     generator = astar_visualize(grid, start, goal)
                     finished = False
                     path = []
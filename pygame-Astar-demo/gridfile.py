@@ -0,0 +1,241 @@
+"""
+巨大グリッド用のコンパクトなファイル形式（memmap で読み込む）。
+
+20k×20k のようなフロアマップは list-of-lists では扱えないため、
+セルあたり1バイト（int8、-1 が障害物）の生データにヘッダを付けたファイルとして保存し、
+numpy.memmap でそのまま参照します。探索は pathfinding.astar_search_chunked を使い、
+コストはマップしたバッファから直接読み、管理用配列は触れたチャンクにだけ確保します。
+
+ファイル形式（リトルエンディアン）:
+  0   8 bytes  マジック b"ASTRGRID"
+  8   uint16   バージョン（1）
+  10  uint16   予約（0）
+  12  uint32   予約（0）
+  16  uint64   行数
+  24  uint64   列数
+  32～63       予約（0 埋め）
+  64～         int8 のコスト（行優先、rows * cols バイト）
+
+使い方:
+  uv run python gridfile.py generate floor.grid --rows 20000 --cols 20000 --seed 0
+  uv run python gridfile.py convert map.npz floor.grid      # .npy / .npz / .csv / .txt -> .grid
+  uv run python gridfile.py convert floor.grid floor.npy    # .grid -> .npy
+  uv run python gridfile.py info floor.grid
+  uv run python gridfile.py search floor.grid --start 0,0 --goal 1999,1999
+"""
+import argparse
+import struct
+import time
+from pathlib import Path
+
+import numpy as np
+
+from pathfinding import ChunkedSearchState, astar_search_chunked
+
+MAGIC = b"ASTRGRID"
+VERSION = 1
+HEADER = struct.Struct("<8sHHIQQ")
+HEADER_SIZE = 64
+DTYPE = np.int8
+
+
+def write_header(f, rows, cols):
+    f.write(HEADER.pack(MAGIC, VERSION, 0, 0, rows, cols).ljust(HEADER_SIZE, b"\0"))
+
+
+def read_header(path):
+    """(rows, cols) を返す。形式が違えば ValueError"""
+    with open(path, "rb") as f:
+        data = f.read(HEADER_SIZE)
+    if len(data) < HEADER_SIZE:
+        raise ValueError(f"{path}: file is too short for a grid header")
+    magic, version, _, _, rows, cols = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{path}: not a grid file")
+    if version != VERSION:
+        raise ValueError(f"{path}: unsupported grid file version {version}")
+    return rows, cols
+
+
+def create_grid_file(path, rows, cols):
+    """ヘッダを書き、書き込み可能な (rows, cols) の memmap を返す（中身は 0）"""
+    with open(path, "wb") as f:
+        write_header(f, rows, cols)
+        f.truncate(HEADER_SIZE + rows * cols)
+    return np.memmap(path, dtype=DTYPE, mode="r+", offset=HEADER_SIZE, shape=(rows, cols))
+
+
+def open_grid_file(path, mode="r"):
+    """グリッドファイルを (rows, cols) の int8 memmap として開く（データは読み込まない）"""
+    rows, cols = read_header(path)
+    return np.memmap(path, dtype=DTYPE, mode=mode, offset=HEADER_SIZE, shape=(rows, cols))
+
+
+def check_cost_range(block):
+    """
+    -1（障害物）か 1..127 以外のコストが含まれていれば ValueError。
+    octile / manhattan ヒューリスティックは1歩のコストが1以上でないと許容的にならないので、0 も受け付けない
+    （0/1 の占有グリッドはそのままでは使えない）。
+    """
+    invalid = (block != -1) & ((block < 1) | (block > np.iinfo(DTYPE).max))
+    if invalid.any():
+        bad = np.asarray(block)[invalid].flat[0]
+        raise ValueError(
+            f"invalid cost {bad}: costs must be -1 (obstacle) or 1..{np.iinfo(DTYPE).max}; "
+            "convert 0/1 occupancy grids to -1/1 first"
+        )
+
+
+def generate_grid_file(
+    path,
+    rows,
+    cols,
+    obstacle_probability=0.3,
+    cost_min=1,
+    cost_max=5,
+    seed=0,
+    chunk_rows=256,
+):
+    """
+    chunk_rows 行ずつ生成して書き込む。メモリ使用量は1ブロック分だけで済む。
+    ブロックごとに SeedSequence.spawn した乱数を使うので、同じ seed と chunk_rows なら同じファイルになる。
+    左上と右下は必ず通行可能（コスト1）にする。
+    """
+    if cost_min < 1 or cost_min > cost_max:
+        raise ValueError(f"cost range must satisfy 1 <= cost_min <= cost_max (got {cost_min}..{cost_max})")
+    check_cost_range(np.array([cost_min, cost_max]))
+    grid = create_grid_file(path, rows, cols)
+    blocks = range(0, rows, chunk_rows)
+    for top, child in zip(blocks, np.random.SeedSequence(seed).spawn(len(blocks))):
+        height = min(chunk_rows, rows - top)
+        rng = np.random.default_rng(child)
+        block = rng.integers(cost_min, cost_max + 1, size=(height, cols), dtype=DTYPE)
+        block[rng.random((height, cols)) < obstacle_probability] = -1
+        grid[top:top + height] = block
+    grid[0, 0] = 1
+    grid[rows - 1, cols - 1] = 1
+    grid.flush()
+    return grid
+
+
+def load_source(path):
+    """変換元（.npy / .npz / .csv / .txt / .grid）を2次元配列として開く。.npy と .grid は memmap"""
+    suffix = Path(path).suffix.lower()
+    if suffix == ".grid":
+        return open_grid_file(path)
+    if suffix == ".npy":
+        return np.load(path, mmap_mode="r")
+    if suffix == ".npz":
+        with np.load(path) as data:
+            return data["grid"]
+    if suffix == ".csv":
+        return np.loadtxt(path, dtype=np.int16, delimiter=",", ndmin=2)
+    if suffix == ".txt":
+        return np.loadtxt(path, dtype=np.int16, ndmin=2)
+    raise ValueError(f"unsupported grid source: {path}")
+
+
+def convert_grid(src, dst, chunk_rows=256):
+    """
+    グリッドを別形式へ変換する。dst が .grid なら int8 形式、.npy なら NumPy 形式で書き出す。
+    .npy / .grid からの変換は chunk_rows 行ずつコピーするので、元データ全体をメモリに載せない。
+    """
+    source = load_source(src)
+    if source.ndim != 2:
+        raise ValueError(f"{src}: grid must be 2-dimensional")
+    rows, cols = source.shape
+    if Path(dst).suffix.lower() == ".npy":
+        target = np.lib.format.open_memmap(dst, mode="w+", dtype=source.dtype, shape=(rows, cols))
+    else:
+        target = create_grid_file(dst, rows, cols)
+    try:
+        for top in range(0, rows, chunk_rows):
+            block = np.asarray(source[top:top + chunk_rows])
+            check_cost_range(block)
+            target[top:top + len(block)] = block
+    except ValueError:
+        # 途中まで書いたファイルは残さない
+        del target
+        Path(dst).unlink()
+        raise
+    target.flush()
+    return target
+
+
+def parse_cell(text):
+    r, c = text.split(",")
+    return int(r), int(c)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="巨大グリッドファイルの生成・変換・探索")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    generate = sub.add_parser("generate", help="ランダムなグリッドファイルをブロックごとに生成する")
+    generate.add_argument("path")
+    generate.add_argument("--rows", type=int, required=True)
+    generate.add_argument("--cols", type=int, required=True)
+    generate.add_argument("--obstacle-probability", type=float, default=0.3)
+    generate.add_argument("--cost-min", type=int, default=1)
+    generate.add_argument("--cost-max", type=int, default=5)
+    generate.add_argument("--seed", type=int, default=0)
+    generate.add_argument("--chunk-rows", type=int, default=256)
+
+    convert = sub.add_parser("convert", help="形式を変換する（拡張子で判定）")
+    convert.add_argument("src")
+    convert.add_argument("dst")
+    convert.add_argument("--chunk-rows", type=int, default=256)
+
+    info = sub.add_parser("info", help="ヘッダを表示する")
+    info.add_argument("path")
+
+    search = sub.add_parser("search", help="memmap したまま A* を実行する")
+    search.add_argument("path")
+    search.add_argument("--start", type=parse_cell, default=(0, 0), help="row,col")
+    search.add_argument("--goal", type=parse_cell, help="row,col（既定は右下）")
+    search.add_argument("--chunk-size", type=int, default=256)
+    args = parser.parse_args(argv)
+
+    began = time.perf_counter()
+    if args.command == "generate":
+        try:
+            generate_grid_file(
+                args.path,
+                args.rows,
+                args.cols,
+                obstacle_probability=args.obstacle_probability,
+                cost_min=args.cost_min,
+                cost_max=args.cost_max,
+                seed=args.seed,
+                chunk_rows=args.chunk_rows,
+            )
+        except ValueError as exc:
+            generate.error(str(exc))
+        print(f"generated {args.rows}x{args.cols} in {time.perf_counter() - began:.1f}s -> {args.path}")
+    elif args.command == "convert":
+        try:
+            grid = convert_grid(args.src, args.dst, chunk_rows=args.chunk_rows)
+        except ValueError as exc:
+            convert.error(str(exc))
+        print(f"converted {grid.shape[0]}x{grid.shape[1]} in {time.perf_counter() - began:.1f}s -> {args.dst}")
+    elif args.command == "info":
+        rows, cols = read_header(args.path)
+        print(f"{args.path}: {rows} x {cols} cells, {rows * cols / 1024 ** 2:,.1f} MiB of costs")
+    else:
+        grid = open_grid_file(args.path)
+        goal = args.goal or (grid.shape[0] - 1, grid.shape[1] - 1)
+        state = ChunkedSearchState(grid.shape[0], grid.shape[1], args.chunk_size)
+        try:
+            path, cost, expanded = astar_search_chunked(grid, args.start, goal, state=state)
+        except ValueError as exc:
+            search.error(str(exc))
+        elapsed = time.perf_counter() - began
+        result = f"cost {cost}, {len(path)} cells" if path else "no path"
+        print(
+            f"{result}; expanded {expanded:,} in {elapsed:.2f}s; "
+            f"{len(state.chunks)} chunks touched, {state.nbytes() / 1024 ** 2:,.1f} MiB bookkeeping"
+        )
+
+
+if __name__ == "__main__":
+    main()
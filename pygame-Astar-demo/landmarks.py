@@ -0,0 +1,227 @@
+"""
+ALT（A*, Landmarks, Triangle inequality）ヒューリスティック。
+
+マンハッタン距離は最低移動コスト1を前提にしているため、コスト1～5のグリッドでは
+実コストを大きく過小評価し、A* が Dijkstra 法に近い探索になってしまいます。
+ALT では事前に K 個のランドマークを選び、各ランドマークからの／への最短距離表を
+Dijkstra 法で作っておき、三角不等式から許容的な下界を求めます。
+
+  h(v) = max_L max( d(L, t) - d(L, v),  d(v, L) - d(t, L) )
+
+移動コストは「入るセルのコスト」なので有向グラフとして扱い、
+ランドマークからの距離（forward）とランドマークへの距離（backward）を両方保持します。
+距離表はグリッドと一緒に .npz へ保存でき、クエリ時は読み込むだけで使えます。
+
+使い方:
+  uv run python landmarks.py build map.npz --size 256 --landmarks 8 --seed 0
+  uv run python landmarks.py query map.npz
+"""
+import argparse
+import heapq
+import os
+import random
+import time
+
+import numpy as np
+
+from pathfinding import NEIGHBORS_4, astar_search, manhattan
+
+# 到達不能を表す距離（int32 の最大値）
+UNREACHABLE = np.iinfo(np.int32).max
+
+
+def grid_to_array(grid):
+    """list-of-lists のグリッドを int32 の2次元配列に変換する"""
+    return np.asarray(grid, dtype=np.int32)
+
+
+def dijkstra_distances(costs, source, reverse=False):
+    """
+    source からの最短距離表（reverse=True なら source への最短距離表）を返す。
+    costs は2次元配列（-1 が障害物）。到達不能なセルは UNREACHABLE。
+    """
+    rows, cols = costs.shape
+    flat_costs = costs.ravel().tolist()
+    dist = [UNREACHABLE] * (rows * cols)
+    src = source[0] * cols + source[1]
+    if flat_costs[src] == -1:
+        return np.asarray(dist, dtype=np.int32).reshape(rows, cols)
+
+    dist[src] = 0
+    heap = [(0, src)]
+    while heap:
+        d, index = heapq.heappop(heap)
+        if d > dist[index]:
+            continue
+        r, c = divmod(index, cols)
+        # 逆向き探索では「自分に入るコスト」を辺の重みとして隣へ伝える
+        step_cost = flat_costs[index] if reverse else 0
+        for dr, dc in NEIGHBORS_4:
+            nr = r + dr
+            nc = c + dc
+            if nr < 0 or nr >= rows or nc < 0 or nc >= cols:
+                continue
+            neighbor = nr * cols + nc
+            cost = flat_costs[neighbor]
+            if cost == -1:
+                continue
+            nd = d + (step_cost if reverse else cost)
+            if nd < dist[neighbor]:
+                dist[neighbor] = nd
+                heapq.heappush(heap, (nd, neighbor))
+    return np.asarray(dist, dtype=np.int32).reshape(rows, cols)
+
+
+class LandmarkTable:
+    """
+    ランドマーク座標と距離表の組。
+      - landmarks: (K, 2) のランドマーク座標
+      - forward:   (K, rows, cols) ランドマークから各セルへの距離
+      - backward:  (K, rows, cols) 各セルからランドマークへの距離
+    """
+
+    def __init__(self, landmarks, forward, backward, min_cost=1):
+        self.landmarks = np.asarray(landmarks, dtype=np.int32).reshape(-1, 2)
+        self.forward = forward
+        self.backward = backward
+        self.min_cost = min_cost
+
+    @classmethod
+    def build(cls, grid, k=8, seed=None):
+        """
+        最遠点選択で K 個のランドマークを選び、距離表を作る。
+        1個目はランダムな通行可能セル、以降は既存ランドマークから最も遠いセルを選ぶ。
+        """
+        costs = grid_to_array(grid)
+        passable = np.argwhere(costs != -1)
+        if len(passable) == 0:
+            raise ValueError("grid has no passable cells")
+        rng = random.Random(seed)
+        first = tuple(int(v) for v in passable[rng.randrange(len(passable))])
+
+        landmarks = []
+        forward = []
+        backward = []
+        nearest = np.full(costs.shape, UNREACHABLE, dtype=np.int64)
+        candidate = first
+        for _ in range(min(k, len(passable))):
+            landmarks.append(candidate)
+            fwd = dijkstra_distances(costs, candidate)
+            forward.append(fwd)
+            backward.append(dijkstra_distances(costs, candidate, reverse=True))
+
+            # 到達可能なセルのうち、最寄りランドマークからの距離が最大のものを次の候補にする
+            nearest = np.minimum(nearest, fwd)
+            reachable = np.where(nearest < UNREACHABLE, nearest, -1)
+            index = int(np.argmax(reachable))
+            if reachable.flat[index] <= 0:
+                break
+            candidate = divmod(index, costs.shape[1])
+
+        min_cost = int(costs[costs != -1].min())
+        return cls(landmarks, np.stack(forward), np.stack(backward), min_cost=max(min_cost, 0))
+
+    def heuristic_table(self, goal):
+        """
+        goal に対する全セルのヒューリスティック値をまとめて計算する（ベクトル化）。
+        ゴールへ到達できないことが距離表から分かるセルは inf になる。
+        """
+        gr, gc = goal
+        forward = self.forward.astype(np.int64)
+        backward = self.backward.astype(np.int64)
+        fwd_goal = forward[:, gr, gc][:, None, None]
+        bwd_goal = backward[:, gr, gc][:, None, None]
+        fwd_known = forward != UNREACHABLE
+        bwd_known = backward != UNREACHABLE
+
+        # d(L, t) - d(L, v)：v には L から行けるが t には行けない → v から t へも行けない
+        lower = np.where(fwd_known & (fwd_goal != UNREACHABLE), fwd_goal - forward, 0)
+        unreachable = fwd_known & (fwd_goal == UNREACHABLE)
+        # d(v, L) - d(t, L)：t から L へは行けるが v からは行けない → v から t へも行けない
+        lower = np.maximum(lower, np.where(bwd_known & (bwd_goal != UNREACHABLE), backward - bwd_goal, 0))
+        unreachable |= ~bwd_known & (bwd_goal != UNREACHABLE)
+
+        rows, cols = forward.shape[1:]
+        ii, jj = np.indices((rows, cols))
+        table = np.maximum(lower.max(axis=0), (np.abs(ii - gr) + np.abs(jj - gc)) * self.min_cost)
+        table = table.astype(np.float64)
+        table[unreachable.any(axis=0)] = np.inf
+        return table
+
+    def heuristic_for(self, goal):
+        """astar_search に渡せる h(node, goal) 形式のヒューリスティックを返す"""
+        table = self.heuristic_table(goal).tolist()
+
+        def heuristic(node, _goal):
+            return table[node[0]][node[1]]
+
+        return heuristic
+
+
+def save_map(path, grid, table):
+    """グリッドとランドマーク距離表を1つの .npz に保存する"""
+    np.savez(
+        path,
+        grid=grid_to_array(grid),
+        landmarks=table.landmarks,
+        forward=table.forward,
+        backward=table.backward,
+        min_cost=np.int32(table.min_cost),
+    )
+
+
+def load_map(path):
+    """save_map で保存したファイルを読み込み、(grid, LandmarkTable) を返す"""
+    with np.load(path) as data:
+        grid = data["grid"].tolist()
+        table = LandmarkTable(data["landmarks"], data["forward"], data["backward"], int(data["min_cost"]))
+    return grid, table
+
+
+def main(argv=None):
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    from main import generate_grid
+
+    parser = argparse.ArgumentParser(description="ALT ランドマーク表の作成とクエリ")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="グリッドを生成してランドマーク表と一緒に保存する")
+    build.add_argument("path")
+    build.add_argument("--size", type=int, default=128)
+    build.add_argument("--obstacle-probability", type=float, default=0.3)
+    build.add_argument("--cost-min", type=int, default=1)
+    build.add_argument("--cost-max", type=int, default=5)
+    build.add_argument("--landmarks", type=int, default=8)
+    build.add_argument("--seed", type=int, default=0)
+    query = sub.add_parser("query", help="保存済みマップで左上→右下を探索し、Manhattan と比較する")
+    query.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        random.seed(args.seed)
+        grid = generate_grid(
+            args.size,
+            args.size,
+            obstacle_probability=args.obstacle_probability,
+            cost_min=args.cost_min,
+            cost_max=args.cost_max,
+        )
+        began = time.perf_counter()
+        table = LandmarkTable.build(grid, k=args.landmarks, seed=args.seed)
+        save_map(args.path, grid, table)
+        print(f"{len(table.landmarks)} landmarks built in {time.perf_counter() - began:.2f}s -> {args.path}")
+        return
+
+    began = time.perf_counter()
+    grid, table = load_map(args.path)
+    print(f"loaded in {(time.perf_counter() - began) * 1000:.1f} ms")
+    start = (0, 0)
+    goal = (len(grid) - 1, len(grid[0]) - 1)
+    for name, heuristic in (("manhattan", manhattan), ("alt", table.heuristic_for(goal))):
+        began = time.perf_counter()
+        _, cost, expanded = astar_search(grid, start, goal, heuristic=heuristic)
+        elapsed = (time.perf_counter() - began) * 1000
+        print(f"{name:<10} cost {cost}  expanded {expanded}  {elapsed:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,8 @@ import random
 import heapq
 import sys
 
+from mapgen import generate_solvable_grid
+
 def heuristic(a, b):
     """マンハッタン距離をヒューリスティックとして利用（最低移動コストが1の場合）"""
     return abs(a[0] - b[0]) + abs(a[1] - b[1])
@@ -189,7 +191,7 @@ def main():
     pygame.display.set_caption("A* 経路探索 可視化 (セル毎のコスト付き・再生成ボタン付き)")
     
     # 初回グリッド生成：障害物とランダムな移動コスト付き
-    grid = generate_grid(rows, cols, obstacle_probability=0.3, cost_min=1, cost_max=5)
+    grid = generate_solvable_grid(rows, cols, obstacle_probability=0.3, cost_min=1, cost_max=5).tolist()
     start = (0, 0)
     goal = (rows - 1, cols - 1)
     
@@ -209,7 +211,7 @@ def main():
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 # 再生成ボタンがクリックされた場合
                 if button_rect.collidepoint(event.pos):
-                    grid = generate_grid(rows, cols, obstacle_probability=0.3, cost_min=1, cost_max=5)
+                    grid = generate_solvable_grid(rows, cols, obstacle_probability=0.3, cost_min=1, cost_max=5).tolist()
                     generator = astar_visualize(grid, start, goal)
                     finished = False
                     path = []
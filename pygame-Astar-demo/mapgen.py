@@ -0,0 +1,160 @@
+"""
+解けることが保証されたマップの生成（NumPy によるベクトル化版）。
+
+generate_grid は障害物をランダムに置くだけなので、スタートとゴールが繋がっている保証がなく、
+デモでは探索を最後まで回してから「到達不能」になることがよくあります。
+このモジュールでは NumPy の乱数生成器でグリッドを一括生成し、配列上の Union-Find で
+連結成分をラベル付けして、探索を始める前に解けないマップを棄却または修復します。
+
+  - generate_grid_array: generate_grid と同じ設定で int16 配列のグリッドを作る
+  - label_components: 通行可能セルの4近傍連結成分ラベル（障害物は -1）
+  - generate_solvable_grid: スタートとゴールが連結なグリッドを返す（reject / repair）
+  - generate_batch: 1つのシードから再現可能なマップ列を作る（ベンチマーク用）
+"""
+import numpy as np
+
+OBSTACLE = -1
+
+
+def make_rng(seed=None):
+    """seed が Generator ならそのまま、それ以外（int / SeedSequence / None）なら新しく作る"""
+    if isinstance(seed, np.random.Generator):
+        return seed
+    return np.random.default_rng(seed)
+
+
+def generate_grid_array(rows, cols, obstacle_probability=0.3, cost_min=1, cost_max=5, rng=None):
+    """
+    generate_grid のベクトル化版。
+    - 各セルは、障害物なら -1、それ以外なら cost_min～cost_max のランダムな整数値を持つ
+    - 左上と右下は必ず通行可能に（コストは1に固定）
+    """
+    rng = make_rng(rng)
+    grid = rng.integers(cost_min, cost_max + 1, size=(rows, cols), dtype=np.int16)
+    grid[rng.random((rows, cols)) < obstacle_probability] = OBSTACLE
+    grid[0, 0] = 1
+    grid[rows - 1, cols - 1] = 1
+    return grid
+
+
+def label_components(grid):
+    """
+    通行可能セルの4近傍連結成分をラベル付けする。
+    戻り値は grid と同じ形の int64 配列で、同じ成分のセルは同じラベル（成分内の最小の平坦インデックス）、
+    障害物は -1 になる。
+
+    辺の両端の根をまとめて小さい方へ付け替え（hooking）、ポインタジャンプで根まで圧縮する、
+    という処理を全辺に対して配列演算で繰り返す Union-Find です。
+    """
+    grid = np.asarray(grid)
+    passable = grid != OBSTACLE
+    rows, cols = passable.shape
+    index = np.arange(rows * cols).reshape(rows, cols)
+
+    horizontal = passable[:, :-1] & passable[:, 1:]
+    vertical = passable[:-1, :] & passable[1:, :]
+    src = np.concatenate([index[:, :-1][horizontal], index[:-1, :][vertical]])
+    dst = np.concatenate([index[:, 1:][horizontal], index[1:, :][vertical]])
+
+    parent = np.arange(rows * cols)
+    while src.size:
+        root_a = parent[src]
+        root_b = parent[dst]
+        pending = root_a != root_b
+        if not pending.any():
+            break
+        src = src[pending]
+        dst = dst[pending]
+        root_a = root_a[pending]
+        root_b = root_b[pending]
+        # 同じ根への書き込みが重なってもどれか1つが残ればよい（常に小さい根へ向くので循環しない）
+        parent[np.maximum(root_a, root_b)] = np.minimum(root_a, root_b)
+        # ポインタジャンプで全ノードの親を根に揃える
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+
+    labels = parent.reshape(rows, cols)
+    return np.where(passable, labels, OBSTACLE)
+
+
+def is_connected(grid, start, goal, labels=None):
+    """start と goal が同じ連結成分にあるか"""
+    if labels is None:
+        labels = label_components(grid)
+    start_label = labels[start]
+    return start_label != OBSTACLE and start_label == labels[goal]
+
+
+def repair_grid(grid, start, goal, rng=None, cost_min=1, cost_max=5):
+    """
+    start から goal へ向かうランダムな単調経路（上下左右のみ）に沿って障害物を掘り、
+    goal の連結成分に合流した時点で止める。grid はその場で書き換え、掘ったセル数を返す。
+    """
+    rng = make_rng(rng)
+    labels = label_components(grid)
+    goal_label = labels[goal]
+    r, c = start
+    carved = 0
+    while labels[r, c] != goal_label or goal_label == OBSTACLE:
+        remaining_r = goal[0] - r
+        remaining_c = goal[1] - c
+        if remaining_r == 0 and remaining_c == 0:
+            break
+        # 残り距離に比例した確率で縦横どちらへ進むかを選ぶ
+        if rng.random() * (abs(remaining_r) + abs(remaining_c)) < abs(remaining_r):
+            r += 1 if remaining_r > 0 else -1
+        else:
+            c += 1 if remaining_c > 0 else -1
+        if grid[r, c] == OBSTACLE:
+            grid[r, c] = rng.integers(cost_min, cost_max + 1)
+            carved += 1
+    return carved
+
+
+def generate_solvable_grid(
+    rows,
+    cols,
+    obstacle_probability=0.3,
+    cost_min=1,
+    cost_max=5,
+    start=None,
+    goal=None,
+    seed=None,
+    mode="repair",
+    max_attempts=100,
+):
+    """
+    スタートとゴールが連結なグリッドを返す。
+    - mode="reject": 解けないマップは捨てて作り直す（max_attempts 回で諦めて ValueError）
+    - mode="repair": 解けないマップは repair_grid で通路を掘って繋ぐ
+    seed が同じなら同じマップが得られる。
+    """
+    if mode not in ("reject", "repair"):
+        raise ValueError(f"unknown mode: {mode}")
+    rng = make_rng(seed)
+    start = start or (0, 0)
+    goal = goal or (rows - 1, cols - 1)
+
+    for _ in range(max_attempts):
+        grid = generate_grid_array(rows, cols, obstacle_probability, cost_min, cost_max, rng)
+        grid[start] = 1
+        grid[goal] = 1
+        if is_connected(grid, start, goal):
+            return grid
+        if mode == "repair":
+            repair_grid(grid, start, goal, rng, cost_min, cost_max)
+            return grid
+    raise ValueError(f"no solvable {rows}x{cols} grid found in {max_attempts} attempts")
+
+
+def generate_batch(count, rows, cols, seed=0, **kwargs):
+    """
+    1つのシードから count 枚の再現可能なマップを作る。
+    SeedSequence.spawn で各マップに独立した乱数列を割り当てるので、
+    i 枚目のマップは count に関係なく同じになる。
+    """
+    children = np.random.SeedSequence(seed).spawn(count)
+    return [generate_solvable_grid(rows, cols, seed=child, **kwargs) for child in children]
@@ -0,0 +1,379 @@
+"""
+ヘッドレス経路探索エンジン。
+
+pygame に依存せず、ベンチマークやバッチ処理から探索を実行するための関数群です。
+グリッドの表現は main.py と同じく、-1 が障害物、それ以外の値は
+「そのセルに入るときの移動コスト」を表します。
+
+  - astar_search: list-of-lists のグリッド向け（4方向 / 8方向 / Theta*）
+  - smooth_path: 経路の後処理（見通せる区間を直線で繋ぐ）
+  - astar_search_chunked: NumPy 配列／memmap のグリッド向け。コストはバッファから直接読み、
+    g値などの管理用配列は探索が触れたチャンクにだけ確保する（gridfile.py 参照）
+"""
+import heapq
+import math
+from array import array
+
+# 4方向移動（上下左右）
+NEIGHBORS_4 = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+# 8方向移動（上下左右＋斜め）
+NEIGHBORS_8 = NEIGHBORS_4 + [(1, 1), (1, -1), (-1, 1), (-1, -1)]
+
+SQRT2 = math.sqrt(2)
+
+# 探索モード
+#   "4":     上下左右のみ（従来の動き）
+#   "8":     斜め移動あり（斜めはコスト×√2、障害物の角はすり抜けない）
+#   "theta": Theta*。8方向を基本に、親ノードから見通せれば直線で繋ぐ任意角度の経路
+MODES = ("4", "8", "theta")
+
+
+def manhattan(a, b):
+    """マンハッタン距離（最低移動コストが1の場合に許容的）"""
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+
+def octile(a, b):
+    """オクタイル距離（8方向移動・最低移動コストが1の場合に許容的）"""
+    dr = abs(a[0] - b[0])
+    dc = abs(a[1] - b[1])
+    return max(dr, dc) + (SQRT2 - 1) * min(dr, dc)
+
+
+def euclidean(a, b):
+    """ユークリッド距離（任意角度の移動・最低移動コストが1の場合に許容的）"""
+    return math.hypot(a[0] - b[0], a[1] - b[1])
+
+
+def zero_heuristic(a, b):
+    """常に0を返すヒューリスティック（A* が Dijkstra 法になる）"""
+    return 0
+
+
+# モードごとの既定ヒューリスティック
+DEFAULT_HEURISTICS = {"4": manhattan, "8": octile, "theta": euclidean}
+
+
+def neighbor_offsets(mode):
+    return NEIGHBORS_4 if mode == "4" else NEIGHBORS_8
+
+
+def move_cost(grid, r, c, dr, dc):
+    """
+    (r, c) から (r + dr, c + dc) へ1歩進むコスト。進めなければ None。
+    斜め移動は入るセルのコスト×√2 で、角を挟む2セルのどちらかが障害物なら進めない。
+    """
+    nr = r + dr
+    nc = c + dc
+    if nr < 0 or nr >= len(grid) or nc < 0 or nc >= len(grid[0]):
+        return None
+    cost = grid[nr][nc]
+    if cost == -1:
+        return None
+    if dr and dc:
+        if grid[r][nc] == -1 or grid[nr][c] == -1:
+            return None
+        return cost * SQRT2
+    return cost
+
+
+class LineOfSight:
+    """
+    Bresenham の直線でセル間の見通しを判定し、直線移動のコストを求める。
+    結果は (from, to) の組ごとにキャッシュする。1回の探索の間だけ使う想定。
+
+    直線移動のコストは、通過する各セル（始点を除く）のコストに
+    「直線の長さ ÷ ステップ数」を掛けた合計。全セルのコストが1ならユークリッド距離になる。
+    """
+
+    def __init__(self, grid):
+        self.grid = grid
+        self.cache = {}
+        self.hits = 0
+
+    def cost(self, a, b):
+        """a から b へ直線で進むコスト。障害物に当たる（角をすり抜ける場合を含む）なら None"""
+        key = (a, b)
+        if key in self.cache:
+            self.hits += 1
+            return self.cache[key]
+        result = self._trace(a, b)
+        self.cache[key] = result
+        return result
+
+    def visible(self, a, b):
+        return self.cost(a, b) is not None
+
+    def _trace(self, a, b):
+        grid = self.grid
+        r, c = a
+        r1, c1 = b
+        dr = abs(r1 - r)
+        dc = abs(c1 - c)
+        steps = max(dr, dc)
+        if steps == 0:
+            return 0
+        sr = 1 if r1 > r else -1
+        sc = 1 if c1 > c else -1
+        err = dr - dc
+        total = 0
+        while (r, c) != (r1, c1):
+            e2 = 2 * err
+            nr, nc = r, c
+            if e2 > -dc:
+                err -= dc
+                nr += sr
+            if e2 < dr:
+                err += dr
+                nc += sc
+            cost = grid[nr][nc]
+            if cost == -1:
+                return None
+            if nr != r and nc != c and (grid[r][nc] == -1 or grid[nr][c] == -1):
+                return None
+            total += cost
+            r, c = nr, nc
+        return total * math.hypot(dr, dc) / steps
+
+
+def astar_search(grid, start, goal, heuristic=None, mode="4"):
+    """
+    A* アルゴリズム（ヘッドレス版）。
+    描画用の途中状態を yield しない代わりに、古くなったヒープ要素を読み飛ばして
+    各ノードを一度だけ展開します。
+    mode は MODES のいずれか。heuristic を省略するとモードに合った既定値を使う。
+
+    戻り値: (path, cost, expanded)
+      - path: スタートからゴールまでのセル列（到達できない場合は空リスト）。
+              theta モードでは直線で結ぶ経由点の列
+      - cost: 経路の累積コスト（到達できない場合は None）
+      - expanded: 展開したノード数
+    """
+    if mode not in MODES:
+        raise ValueError(f"unknown mode: {mode}")
+    heuristic = heuristic or DEFAULT_HEURISTICS[mode]
+    if grid[start[0]][start[1]] == -1 or grid[goal[0]][goal[1]] == -1:
+        return [], None, 0
+
+    rows = len(grid)
+    cols = len(grid[0])
+    offsets = neighbor_offsets(mode)
+    los = LineOfSight(grid) if mode == "theta" else None
+    # ヒープ要素は (f, -g, node)。f が同じならゴールに近い（g が大きい）ノードを先に展開する。
+    # (f, g, node) だと浅いノードが優先され、一様コストのグリッドではほぼダイクストラ法になる
+    open_heap = [(heuristic(start, goal), 0, start)]
+    came_from = {}
+    gscore = {start: 0}
+    closed_set = set()
+    expanded = 0
+
+    while open_heap:
+        _, neg_g, current = heapq.heappop(open_heap)
+        g = -neg_g
+        if current in closed_set or g > gscore[current]:
+            continue  # 古くなったヒープ要素
+        if current == goal:
+            return reconstruct_path(came_from, goal), g, expanded
+
+        closed_set.add(current)
+        expanded += 1
+        r, c = current
+        parent = came_from.get(current)
+        for dr, dc in offsets:
+            # move_cost と同じ判定をループ内に展開（4方向モードの速度を落とさないため）
+            nr = r + dr
+            nc = c + dc
+            if nr < 0 or nr >= rows or nc < 0 or nc >= cols:
+                continue
+            cost = grid[nr][nc]
+            if cost == -1:
+                continue
+            if dr and dc:
+                if grid[r][nc] == -1 or grid[nr][c] == -1:
+                    continue
+                cost *= SQRT2
+            neighbor = (nr, nc)
+            if neighbor in closed_set:
+                continue
+            tentative = g + cost
+            via = current
+            # Theta*: 親から直接見通せて、その方が安ければ親と直線で繋ぐ
+            if los is not None and parent is not None:
+                line = los.cost(parent, neighbor)
+                if line is not None and gscore[parent] + line < tentative:
+                    tentative = gscore[parent] + line
+                    via = parent
+            if tentative < gscore.get(neighbor, float("inf")):
+                came_from[neighbor] = via
+                gscore[neighbor] = tentative
+                heapq.heappush(open_heap, (tentative + heuristic(neighbor, goal), -tentative, neighbor))
+
+    return [], None, expanded
+
+
+def smooth_path(grid, path, los=None):
+    """
+    経路の後処理（文字列引き）。経由点から見通せる限り先の点へ直線で繋ぎ、
+    直線の方が元の経路より高くならない場合だけ途中の点を省く。
+    車両が走る経路を短く・まっすぐにするために使う。
+    """
+    if len(path) < 3:
+        return list(path)
+    los = los or LineOfSight(grid)
+    # 元の経路に沿った累積コスト
+    along = [0]
+    for a, b in zip(path, path[1:]):
+        along.append(along[-1] + los.cost(a, b))
+
+    smoothed = [path[0]]
+    anchor = 0
+    for k in range(2, len(path)):
+        line = los.cost(path[anchor], path[k])
+        if line is None or line > along[k] - along[anchor] + 1e-9:
+            smoothed.append(path[k - 1])
+            anchor = k - 1
+    smoothed.append(path[-1])
+    return smoothed
+
+
+def polyline_cost(grid, path, los=None):
+    """経由点を直線で結んだ経路のコスト（見通せない区間があれば None）"""
+    los = los or LineOfSight(grid)
+    total = 0
+    for a, b in zip(path, path[1:]):
+        cost = los.cost(a, b)
+        if cost is None:
+            return None
+        total += cost
+    return total
+
+
+def reconstruct_path(came_from, current):
+    """ゴールから逆に辿って経路を再構築する"""
+    path = []
+    while current in came_from:
+        path.append(current)
+        current = came_from[current]
+    path.append(current)
+    path.reverse()
+    return path
+
+
+def path_cost(grid, path):
+    """経路の累積コスト（スタートセル自身のコストは含めない）"""
+    return sum(grid[r][c] for r, c in path[1:])
+
+
+class ChunkedSearchState:
+    """
+    探索の管理用配列（g値・親の方向・クローズ済みフラグ）をチャンク単位で遅延確保する。
+    巨大なグリッドでも、メモリ使用量は探索が触れた範囲に比例する。
+    """
+
+    def __init__(self, rows, cols, chunk_size=256):
+        self.rows = rows
+        self.cols = cols
+        self.chunk_size = chunk_size
+        # (チャンク行, チャンク列) -> (gscore, parent, closed)
+        self.chunks = {}
+
+    def chunk(self, r, c):
+        """(r, c) を含むチャンクの配列を返す。未確保なら確保する"""
+        size = self.chunk_size
+        key = (r // size, c // size)
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            cells = size * size
+            chunk = (
+                array("d", [float("inf")]) * cells,  # g値
+                array("b", [-1]) * cells,  # 親への方向（NEIGHBORS_4 の添字、-1 はなし）
+                bytearray(cells),  # クローズ済みなら1
+            )
+            self.chunks[key] = chunk
+        return chunk
+
+    def offset(self, r, c):
+        size = self.chunk_size
+        return (r % size) * size + c % size
+
+    def nbytes(self):
+        """確保済みの管理用配列の合計バイト数"""
+        cells = self.chunk_size * self.chunk_size
+        return len(self.chunks) * cells * (8 + 1 + 1)
+
+
+def astar_search_chunked(costs, start, goal, heuristic=manhattan, chunk_size=256, state=None):
+    """
+    NumPy 配列（np.memmap を含む）のグリッドに対する A*。
+    コストは配列のバッファを memoryview で直接読むのでコピーしない。
+    g値・親・クローズ済みフラグは ChunkedSearchState がチャンク単位で遅延確保する。
+    state を渡すと探索後に確保チャンク数などを調べられる。
+
+    戻り値は astar_search と同じ (path, cost, expanded)。
+    start / goal がグリッド外なら ValueError。
+    """
+    rows, cols = costs.shape
+    # 平坦化したインデックスでは範囲外の座標が別のセルを指してしまうので先に弾く
+    for name, (r, c) in (("start", start), ("goal", goal)):
+        if not (0 <= r < rows and 0 <= c < cols):
+            raise ValueError(f"{name} {(r, c)} is outside the {rows}x{cols} grid")
+    flat = memoryview(costs.reshape(-1))
+    if state is None:
+        state = ChunkedSearchState(rows, cols, chunk_size)
+    if flat[start[0] * cols + start[1]] == -1 or flat[goal[0] * cols + goal[1]] == -1:
+        return [], None, 0
+
+    gscore, _, _ = state.chunk(*start)
+    gscore[state.offset(*start)] = 0
+    # (f, -g, node): 同じ f なら深いノードを優先（astar_search と同じ）
+    open_heap = [(heuristic(start, goal), 0, start)]
+    expanded = 0
+
+    while open_heap:
+        _, neg_g, current = heapq.heappop(open_heap)
+        g = -neg_g
+        r, c = current
+        gscore, _, closed = state.chunk(r, c)
+        offset = state.offset(r, c)
+        if closed[offset] or g > gscore[offset]:
+            continue  # 古くなったヒープ要素
+        if current == goal:
+            return _reconstruct_chunked_path(state, goal), g, expanded
+
+        closed[offset] = 1
+        expanded += 1
+        for direction, (dr, dc) in enumerate(NEIGHBORS_4):
+            nr = r + dr
+            nc = c + dc
+            if nr < 0 or nr >= rows or nc < 0 or nc >= cols:
+                continue
+            cost = flat[nr * cols + nc]
+            if cost == -1:
+                continue
+            tentative = g + cost
+            n_gscore, n_parent, _ = state.chunk(nr, nc)
+            n_offset = state.offset(nr, nc)
+            if tentative < n_gscore[n_offset]:
+                n_gscore[n_offset] = tentative
+                n_parent[n_offset] = direction
+                neighbor = (nr, nc)
+                heapq.heappush(open_heap, (tentative + heuristic(neighbor, goal), -tentative, neighbor))
+
+    return [], None, expanded
+
+
+def _reconstruct_chunked_path(state, goal):
+    """親の方向を逆向きに辿って経路を再構築する"""
+    path = [goal]
+    r, c = goal
+    while True:
+        _, parent, _ = state.chunk(r, c)
+        direction = parent[state.offset(r, c)]
+        if direction == -1:
+            break
+        dr, dc = NEIGHBORS_4[direction]
+        r -= dr
+        c -= dc
+        path.append((r, c))
+    path.reverse()
+    return path
@@ -0,0 +1,235 @@
+"""
+コーパスから出題文を選ぶための難易度インデックス。
+
+1行1エントリ（単語・フレーズ）のテキストから、エントリごとの難易度を事前計算して
+難易度順に並べたコンパクトなインデックスファイルを作る。ゲームはこのファイルを mmap して
+ヘッダとバケット表だけを読み、出題時は必要なエントリだけをその場で取り出す（1回 O(1)）。
+
+難易度は次の3つの積:
+  - 長さ（文字数）
+  - バイグラムの珍しさ: コーパス全体での出現頻度の対数から求めた 0～1 の値の平均
+  - 左右の手の交互打鍵率: QWERTY で隣り合う文字が別の手なら打ちやすい（同じ手が続くほど難しい）
+
+ファイル形式（リトルエンディアン）:
+  0   8 bytes  マジック b"TYPCORP1"
+  8   uint16   バージョン（1）
+  10  uint16   バケット数 B
+  12  uint32   エントリ数 N
+  16  uint32[B + 1]  バケットの開始位置（難易度順のエントリ番号）
+  ..  uint32[N + 1]  各エントリの文字列の開始位置（文字列領域の先頭からのバイト数）
+  ..  float32[N]     各エントリの難易度（昇順）
+  ..  文字列領域（UTF-8、区切りなし）
+
+使い方:
+  uv run python corpus.py build words.txt words.corpus --buckets 10
+  uv run python corpus.py info words.corpus
+  uv run python corpus.py sample words.corpus --level 3 -n 5
+"""
+import argparse
+import math
+import mmap
+import random
+import string
+import struct
+from array import array
+from collections import Counter
+
+MAGIC = b"TYPCORP1"
+VERSION = 1
+HEADER = struct.Struct("<8sHHI")
+
+LEFT_HAND = set("qwertasdfgzxcvb12345`~!@#$%")
+TYPABLE = set(string.printable) - set("\t\n\r\x0b\x0c")
+
+
+def bigrams(text):
+    return [text[i:i + 2] for i in range(len(text) - 1)]
+
+
+def alternation(text):
+    """隣り合う文字が左右別の手で打たれる割合（0～1、1文字なら 1）"""
+    letters = [ch.lower() for ch in text if not ch.isspace()]
+    if len(letters) < 2:
+        return 1.0
+    hands = [ch in LEFT_HAND for ch in letters]
+    return sum(a != b for a, b in zip(hands, hands[1:])) / (len(hands) - 1)
+
+
+def difficulty(text, bigram_counts, log_max):
+    """長さ × (0.5 + バイグラムの珍しさ) × (1.5 - 交互打鍵率)"""
+    pairs = bigrams(text.lower())
+    if pairs and log_max > 0:
+        rarity = sum(1 - math.log(bigram_counts[p]) / log_max for p in pairs) / len(pairs)
+    else:
+        rarity = 0.0
+    return len(text) * (0.5 + rarity) * (1.5 - alternation(text))
+
+
+def read_entries(path, max_length=30):
+    """入力できる文字（ASCII の印字可能文字）だけからなる、max_length 文字以下の重複のないエントリを読む"""
+    seen = set()
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            text = " ".join(line.split())
+            if text and len(text) <= max_length and text not in seen and set(text) <= TYPABLE:
+                seen.add(text)
+                entries.append(text)
+    return entries
+
+
+def build_index(src, dst, buckets=10, max_length=30):
+    """src（1行1エントリ）から難易度インデックス dst を作り、エントリ数を返す"""
+    entries = read_entries(src, max_length)
+    if len(entries) < buckets:
+        raise ValueError(f"{src}: need at least {buckets} entries, found {len(entries)}")
+
+    bigram_counts = Counter(p for text in entries for p in bigrams(text.lower()))
+    log_max = math.log(max(bigram_counts.values(), default=1))
+    scored = sorted((difficulty(text, bigram_counts, log_max), text) for text in entries)
+
+    # エントリ数が等しくなるようにバケットに分ける（難易度の分位点）
+    count = len(scored)
+    bucket_starts = array("I", (count * i // buckets for i in range(buckets + 1)))
+    offsets = array("I", [0])
+    scores = array("f")
+    blob = bytearray()
+    for score, text in scored:
+        blob += text.encode("utf-8")
+        offsets.append(len(blob))
+        scores.append(score)
+
+    with open(dst, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, buckets, count))
+        f.write(bucket_starts.tobytes())
+        f.write(offsets.tobytes())
+        f.write(scores.tobytes())
+        f.write(blob)
+    return count
+
+
+class CorpusIndex:
+    """
+    build_index で作ったファイルを mmap して読む。
+    開くときに読むのはヘッダだけで、エントリは sample / entry で参照したものだけがページインされる。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < HEADER.size:
+            raise ValueError(f"{path}: file is too short for a corpus header")
+        magic, version, self.buckets, self.count = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not a corpus index")
+        if version != VERSION:
+            raise ValueError(f"{path}: unsupported corpus index version {version}")
+
+        view = memoryview(self._map)
+        position = HEADER.size
+        self.bucket_starts = view[position:position + 4 * (self.buckets + 1)].cast("I")
+        position += 4 * (self.buckets + 1)
+        self.offsets = view[position:position + 4 * (self.count + 1)].cast("I")
+        position += 4 * (self.count + 1)
+        self.scores = view[position:position + 4 * self.count].cast("f")
+        position += 4 * self.count
+        self.blob = view[position:]
+
+    def __len__(self):
+        return self.count
+
+    def entry(self, i):
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def bucket_range(self, level):
+        """難易度 level（0～buckets-1、範囲外は丸める）のエントリ番号の範囲"""
+        level = min(max(int(level), 0), self.buckets - 1)
+        return self.bucket_starts[level], self.bucket_starts[level + 1]
+
+    def sample(self, level, rng=random, key_weights=None, candidates=8):
+        """
+        level のバケットから1つ選ぶ。
+        key_weights（文字 -> 重み）を渡すと candidates 個の候補を引き、苦手な文字を多く含むものを選ぶ。
+        """
+        low, high = self.bucket_range(level)
+        if not key_weights:
+            return self.entry(rng.randrange(low, high))
+        best, best_score = None, -1.0
+        for _ in range(candidates):
+            text = self.entry(rng.randrange(low, high))
+            score = sum(key_weights.get(ch, 0.0) for ch in text) / len(text)
+            if score > best_score:
+                best, best_score = text, score
+        return best
+
+    def close(self):
+        for view in (self.bucket_starts, self.offsets, self.scores, self.blob):
+            view.release()
+        self._map.close()
+
+
+class KeyErrorStats:
+    """
+    文字ごとの打鍵数と誤打数。adaptive 出題で苦手な文字を重み付けするのに使う。
+    重みは (誤打数 + 1) / (打鍵数 + 2)（まだ打っていない文字は重みなし）。
+    """
+
+    def __init__(self):
+        self.counts = Counter()
+        self.errors = Counter()
+
+    def record(self, expected, correct):
+        self.counts[expected] += 1
+        if not correct:
+            self.errors[expected] += 1
+
+    def weights(self):
+        return {ch: (self.errors[ch] + 1) / (n + 2) for ch, n in self.counts.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="出題用コーパスの難易度インデックス")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="テキスト（1行1エントリ）からインデックスを作る")
+    build.add_argument("src")
+    build.add_argument("dst")
+    build.add_argument("--buckets", type=int, default=10, help="難易度の段階数（ステージ数に合わせる）")
+    build.add_argument("--max-length", type=int, default=30, help="画面に収まる最大文字数")
+
+    info = sub.add_parser("info", help="バケットごとのエントリ数と難易度を表示する")
+    info.add_argument("path")
+
+    sample = sub.add_parser("sample", help="指定した難易度から出題文を引く")
+    sample.add_argument("path")
+    sample.add_argument("--level", type=int, default=0)
+    sample.add_argument("-n", type=int, default=5)
+    sample.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        count = build_index(args.src, args.dst, buckets=args.buckets, max_length=args.max_length)
+        print(f"indexed {count:,} entries -> {args.dst}")
+        return
+
+    index = CorpusIndex(args.path)
+    try:
+        if args.command == "info":
+            print(f"{args.path}: {len(index):,} entries, {index.buckets} buckets")
+            for level in range(index.buckets):
+                low, high = index.bucket_range(level)
+                print(
+                    f"  level {level}: {high - low:,} entries, "
+                    f"difficulty {index.scores[low]:.1f}-{index.scores[high - 1]:.1f}"
+                )
+        else:
+            rng = random.Random(args.seed)
+            for _ in range(args.n):
+                print(index.sample(args.level, rng))
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+フレーム時間と入力遅延の計測。
+
+1フレームを「イベント処理 → 描画 → display.update → clock.tick」に分け、
+それぞれの所要時間を perf_counter_ns で測って固定長のリングバッファ（array）に記録する。
+KEYDOWN を処理した時刻から、その文字を描いたフレームの display.update が返るまでを
+入力遅延（input-to-photon の近似。実際の表示はさらにディスプレイ側の遅延が乗る）として記録する。
+
+pygame 2 の KEYDOWN には発生時刻が付かないため、キー入力の時刻はイベントを取り出した時刻になる。
+押されてから取り出されるまでの遅れは直前のフレーム間隔を超えないので、
+その最大値（queue_max_ms）がスコアに使う打鍵時刻の誤差の上限になる。
+"""
+import csv
+import time
+from array import array
+from pathlib import Path
+
+COLUMNS = ("start_ns", "frame_ns", "events_ns", "render_ns", "present_ns", "keys", "latency_ns")
+
+
+def percentile(values, q):
+    """ソート済みでない values の q パーセンタイル（最近傍）"""
+    if not values:
+        return 0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))]
+
+
+class FrameStats:
+    """
+    直近 capacity フレーム分の計測値を保持するリングバッファ。
+    使い方は1フレームごとに begin_frame → (key_event) → events_done → render_done → presented。
+    """
+
+    def __init__(self, capacity=600, clock=time.perf_counter_ns):
+        self.capacity = capacity
+        self.clock = clock
+        self.columns = {name: array("q", [0]) * capacity for name in COLUMNS}
+        self.index = 0
+        self.count = 0
+        self.frames = 0
+
+        self._start = None
+        self._previous_start = None
+        self._events_end = None
+        self._render_end = None
+        self._pending_keys = array("q")
+
+    def begin_frame(self):
+        self._previous_start = self._start
+        self._start = self.clock()
+
+    def key_event(self):
+        """KEYDOWN を処理した時刻を覚えておく（このフレームの presented で遅延を確定する）"""
+        self._pending_keys.append(self.clock())
+
+    def events_done(self):
+        self._events_end = self.clock()
+
+    def render_done(self):
+        self._render_end = self.clock()
+
+    def presented(self):
+        """display.update の直後に呼ぶ。このフレームの計測値を1行記録する"""
+        end = self.clock()
+        start = self._start
+        events_end = self._events_end or start
+        render_end = self._render_end or events_end
+        # フレーム時間は前フレームの開始からの間隔（clock.tick の待ち時間も含む）
+        frame = start - self._previous_start if self._previous_start is not None else 0
+        latency = max((end - t for t in self._pending_keys), default=-1)
+
+        row = (start, frame, events_end - start, render_end - events_end, end - render_end,
+               len(self._pending_keys), latency)
+        for name, value in zip(COLUMNS, row):
+            self.columns[name][self.index] = value
+        self.index = (self.index + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        self.frames += 1
+
+        del self._pending_keys[:]
+        self._events_end = None
+        self._render_end = None
+
+    def column(self, name):
+        """name 列の値を古い順に返す"""
+        values = self.columns[name]
+        if self.count < self.capacity:
+            return values[:self.count]
+        return values[self.index:] + values[:self.index]
+
+    def summary(self):
+        """記録中のフレームについての集計（ms）"""
+        frames = [v for v in self.column("frame_ns") if v > 0]
+        render = self.column("render_ns")
+        latency = [v for v in self.column("latency_ns") if v >= 0]
+        ms = 1e-6
+        return {
+            "frames": self.count,
+            "fps": 1e9 * len(frames) / sum(frames) if frames else 0.0,
+            "frame_ms": percentile(frames, 50) * ms,
+            "frame_p99_ms": percentile(frames, 99) * ms,
+            "frame_max_ms": max(frames, default=0) * ms,
+            "render_p99_ms": percentile(render, 99) * ms,
+            "latency_ms": percentile(latency, 50) * ms,
+            "latency_max_ms": max(latency, default=0) * ms,
+            # キーを取り出したフレームの直前のフレーム間隔 = 打鍵時刻の遅れの上限
+            "queue_max_ms": max(
+                (f for f, k in zip(self.column("frame_ns"), self.column("keys")) if k),
+                default=0,
+            ) * ms,
+        }
+
+    def overlay_lines(self):
+        s = self.summary()
+        return [
+            f"{s['fps']:.0f} fps  frame {s['frame_ms']:.1f}/{s['frame_p99_ms']:.1f}/{s['frame_max_ms']:.1f} ms",
+            f"render p99 {s['render_p99_ms']:.2f} ms",
+            f"key->frame {s['latency_ms']:.2f} ms (max {s['latency_max_ms']:.2f})",
+            f"key queue <= {s['queue_max_ms']:.1f} ms",
+        ]
+
+    def dump(self, path):
+        """記録中のフレームを CSV に書き出してパスを返す"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(COLUMNS)
+            writer.writerows(zip(*(self.column(name) for name in COLUMNS)))
+        return path
+
+
+def dump_path(log_dir):
+    """log_dir/frames-YYYYmmdd-HHMMSS.csv のパスを返す"""
+    return Path(log_dir) / time.strftime("frames-%Y%m%d-%H%M%S.csv")
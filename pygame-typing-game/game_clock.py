@@ -0,0 +1,56 @@
+"""
+ゲームの時計。TypingGame は時刻の取得とフレーム待ちをすべてこのオブジェクト経由で行う。
+
+  - GameClock: 実時間（perf_counter と pygame.time.Clock）
+  - SimulatedClock: 仮想時間。tick で待たずに時刻を進めるので、ヘッドレス実行では実時間よりずっと速く回る
+"""
+import time
+
+import pygame
+
+
+class GameClock:
+    def __init__(self):
+        self._clock = pygame.time.Clock()
+
+    def now(self):
+        """秒（perf_counter 基準）"""
+        return time.perf_counter()
+
+    def now_ns(self):
+        return time.perf_counter_ns()
+
+    def tick(self, fps):
+        """次のフレームまで待つ"""
+        return self._clock.tick(fps)
+
+
+class SimulatedClock:
+    """
+    仮想時間の時計。tick(fps) は 1/fps 秒だけ時刻を進める。
+    wake_at で起こしてほしい時刻を指定すると、その時刻がフレームの途中にあれば tick はそこで止まる
+    （入力の再生で打鍵をフレーム単位に丸めずに済む）。
+    """
+
+    def __init__(self, start_ns=0):
+        self.t_ns = start_ns
+        self._wake_ns = None
+
+    def now(self):
+        return self.t_ns / 1e9
+
+    def now_ns(self):
+        return self.t_ns
+
+    def wake_at(self, t_ns):
+        if t_ns > self.t_ns and (self._wake_ns is None or t_ns < self._wake_ns):
+            self._wake_ns = t_ns
+
+    def tick(self, fps):
+        target = self.t_ns + 1_000_000_000 // fps
+        if self._wake_ns is not None and self._wake_ns < target:
+            target = self._wake_ns
+        self._wake_ns = None
+        elapsed = target - self.t_ns
+        self.t_ns = target
+        return elapsed // 1_000_000
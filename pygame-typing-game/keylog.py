@@ -0,0 +1,130 @@
+"""
+キー入力の高分解能ログ。
+
+KEYDOWN ごとに time.perf_counter_ns() のタイムスタンプと入力内容を記録する。
+メモリ上では列ごとの array に追記するだけ（辞書のリストは作らない）で、
+同時にセッションごとのファイルへ1件ずつ書き出す。ファイル形式は拡張子で決まる:
+
+  .keylog  バイナリ（ヘッダ 16 バイト + 固定長 24 バイトのレコード）
+  .csv     CSV（1行目はヘッダ行）
+
+バイナリ形式（リトルエンディアン）:
+  0   8 bytes  マジック b"KEYLOG1\\0"
+  8   int64    セッション開始時刻（time.time_ns、UNIX エポックからの ns）
+  16～         レコード（RECORD）
+    int64   t_ns      セッション開始からの経過時間（perf_counter_ns の差分）
+    uint32  key       pygame のキーコード
+    uint32  char      入力された文字のコードポイント（文字でなければ 0）
+    uint32  expected  その位置で期待される文字のコードポイント（範囲外なら 0）
+    uint8   kind      KIND_CHAR / KIND_BACKSPACE / KIND_ENTER / KIND_OTHER / KIND_TARGET
+    uint8   correct   char == expected なら 1
+    uint16  stage     ステージ番号
+
+出題文はステージ開始時に1文字1レコード（KIND_TARGET、char が出題文の文字、t_ns はすべて開始時刻）で記録する。
+これでログだけから出題文と開始時刻を復元して再生できる（simulate.py）。
+
+解析は keystats.py を参照。
+"""
+import csv
+import struct
+import time
+from array import array
+from pathlib import Path
+
+MAGIC = b"KEYLOG1\0"
+HEADER = struct.Struct("<8sq")
+RECORD = struct.Struct("<qIIIBBH")
+FIELDS = ("t_ns", "key", "char", "expected", "kind", "correct", "stage")
+
+KIND_CHAR = 0
+KIND_BACKSPACE = 1
+KIND_ENTER = 2
+KIND_OTHER = 3
+KIND_TARGET = 4
+
+
+class KeystrokeLog:
+    """
+    追記専用のキー入力ログ。path を渡すとそのファイルへも逐次書き出す。
+    タイムスタンプはすべて perf_counter_ns 基準（単調増加で、time.time のような時刻補正の影響を受けない）。
+    """
+
+    def __init__(self, path=None, clock=time.perf_counter_ns):
+        self.clock = clock
+        self.origin_ns = clock()
+        self.started_at_ns = time.time_ns()
+        self.t_ns = array("q")
+        self.key = array("I")
+        self.char = array("I")
+        self.expected = array("I")
+        self.kind = array("B")
+        self.correct = array("B")
+        self.stage = array("H")
+
+        self.path = Path(path) if path else None
+        self._file = None
+        self._csv = None
+        if self.path:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            if self.path.suffix.lower() == ".csv":
+                self._file = open(self.path, "w", newline="")
+                self._csv = csv.writer(self._file)
+                self._csv.writerow(FIELDS)
+            else:
+                self._file = open(self.path, "wb")
+                self._file.write(HEADER.pack(MAGIC, self.started_at_ns))
+
+    def __len__(self):
+        return len(self.t_ns)
+
+    def now_ns(self):
+        """セッション開始からの経過時間（ns）"""
+        return self.clock() - self.origin_ns
+
+    def record(self, key, char, expected, kind, stage, t_ns=None):
+        """
+        1件追記して、その経過時間（ns）を返す。
+        char / expected は1文字の文字列（なければ空文字）。
+        """
+        if t_ns is None:
+            t_ns = self.now_ns()
+        char_code = ord(char) if char else 0
+        expected_code = ord(expected) if expected else 0
+        correct = int(char_code != 0 and char_code == expected_code)
+        row = (t_ns, key, char_code, expected_code, kind, correct, stage)
+
+        self.t_ns.append(t_ns)
+        self.key.append(key)
+        self.char.append(char_code)
+        self.expected.append(expected_code)
+        self.kind.append(kind)
+        self.correct.append(correct)
+        self.stage.append(stage)
+
+        if self._csv is not None:
+            self._csv.writerow(row)
+        elif self._file is not None:
+            self._file.write(RECORD.pack(*row))
+        return t_ns
+
+    def record_target(self, text, stage):
+        """出題文を記録して、ステージ開始時刻（ns）を返す"""
+        t_ns = self.now_ns()
+        for ch in text:
+            self.record(0, ch, "", KIND_TARGET, stage, t_ns=t_ns)
+        return t_ns
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._csv = None
+
+
+def session_path(log_dir, log_format="keylog"):
+    """log_dir/session-YYYYmmdd-HHMMSS.<形式> のパスを返す"""
+    return Path(log_dir) / time.strftime(f"session-%Y%m%d-%H%M%S.{log_format}")
@@ -0,0 +1,166 @@
+"""
+keylog.py が書き出したキー入力ログの解析（NumPy によるベクトル化）。
+
+  - load_log: .keylog / .csv を構造化配列として読み込む
+  - inter_key_intervals / interval_histogram: 打鍵間隔（ms）とそのヒストグラム
+  - char_error_rates: 期待された文字ごとの打鍵数・誤打数・誤打率
+  - wpm_curve: 直近 window 打鍵の移動 WPM（5文字 = 1語）
+
+使い方:
+  uv run python keystats.py logs/session-20250101-120000.keylog
+  uv run python keystats.py logs/session-20250101-120000.csv --bins 20 --window 10 --json
+"""
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+
+from keylog import FIELDS, HEADER, KIND_BACKSPACE, KIND_CHAR, KIND_TARGET, MAGIC
+
+DTYPE = np.dtype(
+    [
+        ("t_ns", "<i8"),
+        ("key", "<u4"),
+        ("char", "<u4"),
+        ("expected", "<u4"),
+        ("kind", "u1"),
+        ("correct", "u1"),
+        ("stage", "<u2"),
+    ]
+)
+
+
+def load_log(path):
+    """ログを DTYPE の構造化配列として返す。形式が違えば ValueError"""
+    path = Path(path)
+    if path.suffix.lower() == ".csv":
+        data = np.loadtxt(path, dtype=np.int64, delimiter=",", skiprows=1, ndmin=2)
+        log = np.empty(len(data), dtype=DTYPE)
+        for i, name in enumerate(FIELDS):
+            log[name] = data[:, i]
+        return log
+
+    with open(path, "rb") as f:
+        header = f.read(HEADER.size)
+    if len(header) < HEADER.size or HEADER.unpack(header)[0] != MAGIC:
+        raise ValueError(f"{path}: not a keystroke log")
+    return np.fromfile(path, dtype=DTYPE, offset=HEADER.size)
+
+
+def char_events(log):
+    """文字入力のレコードだけを返す"""
+    return log[log["kind"] == KIND_CHAR]
+
+
+def inter_key_intervals(log):
+    """
+    連続する文字入力の間隔（ms）。ステージをまたぐ間隔（カウントダウンを含む）は除く。
+    """
+    chars = char_events(log)
+    intervals = np.diff(chars["t_ns"]) / 1e6
+    same_stage = chars["stage"][1:] == chars["stage"][:-1]
+    return intervals[same_stage]
+
+
+def interval_histogram(intervals, bins=20, range_ms=None):
+    """np.histogram と同じ (counts, edges) を返す"""
+    return np.histogram(intervals, bins=bins, range=range_ms)
+
+
+def char_error_rates(log):
+    """
+    期待された文字ごとの (文字, 打鍵数, 誤打数, 誤打率) のリスト。
+    期待文字のない位置（ターゲットより長く打った分）は集計しない。
+    """
+    chars = char_events(log)
+    chars = chars[chars["expected"] != 0]
+    if not len(chars):
+        return []
+    codes, inverse = np.unique(chars["expected"], return_inverse=True)
+    counts = np.bincount(inverse, minlength=len(codes))
+    errors = np.bincount(inverse, weights=1 - chars["correct"], minlength=len(codes)).astype(np.int64)
+    rates = errors / counts
+    return [(chr(code), int(n), int(e), float(r)) for code, n, e, r in zip(codes, counts, errors, rates)]
+
+
+def wpm_curve(log, window=10):
+    """
+    直近 window 打鍵ごとの WPM を (経過秒, WPM) の配列で返す。
+    正しく打った文字だけを数え、バックスペースはその区間の文字数から差し引く（ネット WPM）。
+    """
+    typed = log[(log["kind"] == KIND_CHAR) | (log["kind"] == KIND_BACKSPACE)]
+    if len(typed) <= window:
+        return np.empty(0), np.empty(0)
+    gain = np.where(typed["kind"] == KIND_CHAR, typed["correct"].astype(np.int64), -1)
+    net = np.concatenate([[0], np.cumsum(gain)])
+    chars = net[window + 1:] - net[1:-window]
+    minutes = (typed["t_ns"][window:] - typed["t_ns"][:-window]) / 6e10
+    wpm = np.where(minutes > 0, (chars / 5) / np.where(minutes > 0, minutes, 1), 0.0)
+    return typed["t_ns"][window:] / 1e9, wpm
+
+
+def summarize(log, bins=20, window=10):
+    """ログ全体の集計を辞書で返す（--json の出力）"""
+    chars = char_events(log)
+    intervals = inter_key_intervals(log)
+    counts, edges = interval_histogram(intervals, bins=bins) if len(intervals) else (np.empty(0), np.empty(0))
+    seconds, wpm = wpm_curve(log, window=window)
+    return {
+        "keystrokes": int((log["kind"] != KIND_TARGET).sum()),
+        "characters": int(len(chars)),
+        "accuracy": float(chars["correct"].mean()) if len(chars) else 0.0,
+        "interval_ms": {
+            "mean": float(intervals.mean()) if len(intervals) else 0.0,
+            "median": float(np.median(intervals)) if len(intervals) else 0.0,
+            "p95": float(np.percentile(intervals, 95)) if len(intervals) else 0.0,
+        },
+        "histogram": {"counts": counts.astype(int).tolist(), "edges_ms": edges.tolist()},
+        "errors": [
+            {"char": c, "count": n, "errors": e, "rate": r} for c, n, e, r in char_error_rates(log)
+        ],
+        "wpm": {
+            "window": window,
+            "peak": float(wpm.max()) if len(wpm) else 0.0,
+            "median": float(np.median(wpm)) if len(wpm) else 0.0,
+            "curve": [[float(s), float(w)] for s, w in zip(seconds, wpm)],
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="キー入力ログの解析")
+    parser.add_argument("path")
+    parser.add_argument("--bins", type=int, default=20, help="打鍵間隔ヒストグラムのビン数")
+    parser.add_argument("--window", type=int, default=10, help="移動 WPM の打鍵数")
+    parser.add_argument("--json", action="store_true", help="集計を JSON で出力する")
+    args = parser.parse_args(argv)
+
+    summary = summarize(load_log(args.path), bins=args.bins, window=args.window)
+    if args.json:
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+        return
+
+    interval = summary["interval_ms"]
+    print(
+        f"{summary['keystrokes']} keystrokes, {summary['characters']} characters, "
+        f"accuracy {summary['accuracy']:.1%}"
+    )
+    print(f"interval: mean {interval['mean']:.1f} ms, median {interval['median']:.1f} ms, p95 {interval['p95']:.1f} ms")
+    print(f"WPM (window {args.window}): peak {summary['wpm']['peak']:.1f}, median {summary['wpm']['median']:.1f}")
+
+    counts = summary["histogram"]["counts"]
+    edges = summary["histogram"]["edges_ms"]
+    peak = max(counts, default=0)
+    for count, low, high in zip(counts, edges, edges[1:]):
+        bar = "#" * (40 * count // peak if peak else 0)
+        print(f"{low:8.1f}-{high:8.1f} ms {count:6d} {bar}")
+
+    worst = sorted(summary["errors"], key=lambda e: (-e["rate"], -e["count"]))[:10]
+    for entry in worst:
+        if entry["errors"]:
+            print(f"  {entry['char']!r}: {entry['errors']}/{entry['count']} errors ({entry['rate']:.1%})")
+
+
+if __name__ == "__main__":
+    main()
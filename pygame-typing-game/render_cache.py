@@ -0,0 +1,47 @@
+from collections import OrderedDict
+
+import pygame
+
+
+class TextRenderer:
+    """
+    テキスト描画のキャッシュ。
+    (フォント名, サイズ, テキスト, 色) をキーに描画済みの Surface を保持し、
+    上限を超えたら最も古く使われたものから捨てる（LRU）。
+    フォントもサイズごとに一度だけ生成する。
+    """
+
+    def __init__(self, font_name=None, max_entries=256):
+        self.font_name = font_name
+        self.max_entries = max_entries
+        self._fonts = {}
+        self._surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def font(self, size):
+        font = self._fonts.get(size)
+        if font is None:
+            font = pygame.font.Font(self.font_name, size)
+            self._fonts[size] = font
+        return font
+
+    def preload(self, sizes):
+        """毎フレーム使うサイズのフォントを先に作っておく"""
+        for size in sizes:
+            self.font(size)
+
+    def render(self, size, text, color):
+        key = (self.font_name, size, text, color)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = self.font(size).render(text, True, color)
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.max_entries:
+            self._surfaces.popitem(last=False)
+        return surface
@@ -0,0 +1,302 @@
+"""
+TypingGame のヘッドレス再生・シミュレーション。
+
+SDL のダミービデオドライバと仮想時間の時計（game_clock.SimulatedClock）で、
+記録済みのキー入力ログや合成したタイピストの入力を状態遷移（stage_intro → playing → clear / failed）に流す。
+フレームを待たないので実時間よりずっと速く、ディスプレイのない CI でもスコア計算の回帰テストや
+多数セッションのベンチマークができる。
+
+  - replay: keylog.py のログを再生する。--check で再生中のログが元のログと一致するか確かめる
+  - synthetic: 平均速度・ばらつき・誤打率を指定した合成タイピストでセッションを回す
+
+使い方:
+  uv run python simulate.py replay logs/session-20250101-120000.keylog --check
+  uv run python simulate.py synthetic --sessions 100 --wpm 60 --error-rate 0.03 --seed 0
+  uv run python simulate.py synthetic --sessions 20 --corpus words.corpus --adaptive --json report.json
+"""
+import argparse
+import json
+import os
+import random
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+
+from corpus import CorpusIndex
+from game_clock import SimulatedClock
+from keylog import KIND_BACKSPACE, KIND_CHAR, KIND_ENTER, KIND_TARGET, KeystrokeLog
+from keystats import load_log
+from typing_game import TypingGame, create_screen
+
+# キーの種類ごとに再生する (キーコード, unicode)
+ENTER = (pygame.K_RETURN, "\r")
+BACKSPACE = (pygame.K_BACKSPACE, "\b")
+
+# 打ち切り（合成タイピストが同じステージで失敗し続ける場合など）
+MAX_ATTEMPTS = 50
+MAX_SECONDS = 3600
+
+
+def key_for(char):
+    return (ord(char.lower()) if char.isalpha() else ord(char)), char
+
+
+def attempts_from_log(log):
+    """
+    ログ（keystats.load_log の構造化配列）を挑戦ごとの (出題文, [(開始からの ns, キー, unicode)]) に分ける。
+    出題文のレコード（KIND_TARGET）が挑戦の区切り。
+    """
+    attempts = []
+    target, keys, start = None, None, 0
+    for record in log:
+        kind = record["kind"]
+        if kind == KIND_TARGET:
+            if keys is None or keys or record["t_ns"] != start:
+                target, keys, start = [], [], record["t_ns"]
+                attempts.append((target, keys))
+            target.append(chr(record["char"]))
+            continue
+        if keys is None:
+            continue  # 出題文の記録がない古いログ
+        offset = int(record["t_ns"] - start)
+        if kind == KIND_CHAR:
+            keys.append((offset, int(record["key"]), chr(record["char"])))
+        elif kind == KIND_BACKSPACE:
+            keys.append((offset, *BACKSPACE))
+        elif kind == KIND_ENTER:
+            keys.append((offset, *ENTER))
+        else:
+            keys.append((offset, int(record["key"]), ""))
+    return [("".join(target), keys) for target, keys in attempts]
+
+
+class SyntheticTypist:
+    """
+    平均 wpm（5文字 = 1語）で打つ合成タイピスト。
+    打鍵間隔は平均の jitter 倍の標準偏差でばらつき、error_rate の確率で隣の文字を打ってから
+    バックスペースで直す。最初の打鍵までは reaction 秒。
+    """
+
+    def __init__(self, wpm=60, jitter=0.3, error_rate=0.03, reaction=0.4, seed=None):
+        self.interval = 60 / (wpm * 5)
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.reaction = reaction
+        self.rng = random.Random(seed)
+
+    def next_interval(self):
+        return max(0.02, self.rng.gauss(self.interval, self.interval * self.jitter))
+
+    def keys_for(self, target):
+        keys = []
+        t = self.reaction
+        for ch in target:
+            if self.rng.random() < self.error_rate:
+                wrong = chr(ord(ch) + 1) if ch < "~" else "a"
+                keys.append((int(t * 1e9), *key_for(wrong)))
+                t += self.next_interval()
+                keys.append((int(t * 1e9), *BACKSPACE))
+                t += self.next_interval()
+            keys.append((int(t * 1e9), *key_for(ch)))
+            t += self.next_interval()
+        keys.append((int(t * 1e9), *ENTER))
+        return keys
+
+
+class ScriptedInput:
+    """
+    TypingGame に渡す入力源。target_source で出題文を決めると同時にその挑戦の打鍵を予約し、
+    event_source で時刻の来た打鍵をイベントとして返す。
+    attempts（記録済みの挑戦の列）か typist（SyntheticTypist）のどちらかを渡す。
+    """
+
+    def __init__(self, clock, attempts=None, typist=None):
+        self.clock = clock
+        self.attempts = list(attempts or [])
+        self.typist = typist
+        self.game = None
+        self.pending = []
+        self.started = 0
+
+    def bind(self, game):
+        self.game = game
+
+    def has_more(self):
+        if self.started >= MAX_ATTEMPTS or self.clock.now() >= MAX_SECONDS:
+            return False
+        return self.typist is not None or self.started < len(self.attempts)
+
+    def target_source(self, game):
+        if self.typist is not None:
+            target = game.generate_target_text()
+            keys = self.typist.keys_for(target)
+        else:
+            target, keys = self.attempts[self.started]
+        self.started += 1
+        start = self.clock.now_ns()
+        self.pending = [(start + offset, key, unicode) for offset, key, unicode in keys]
+        self.pending.reverse()  # 末尾から取り出す
+        if self.pending:
+            self.clock.wake_at(self.pending[-1][0])
+        return target
+
+    def event_source(self):
+        game = self.game
+        events = []
+        if game.game_state == "playing":
+            now = self.clock.now_ns()
+            while self.pending and self.pending[-1][0] <= now:
+                _, key, unicode = self.pending.pop()
+                events.append(pygame.event.Event(pygame.KEYDOWN, key=key, unicode=unicode, mod=0))
+            if self.pending:
+                self.clock.wake_at(self.pending[-1][0])
+        elif game.game_state == "failed":
+            if self.has_more():
+                pos = game.retry_button.center
+            else:
+                pos = game.quit_button.center
+            events.append(pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=1))
+        elif game.game_state == "clear" or not self.has_more():
+            # クリアしたか、記録された挑戦を使い切ったら（元のセッションがここで終わっている）終了
+            events.append(pygame.event.Event(pygame.QUIT))
+        return events
+
+
+def run_session(scripted, screen, render=False, keylog_path=None, corpus=None, adaptive=False):
+    """1セッション分を仮想時間で回し、結果の辞書を返す"""
+    clock = scripted.clock
+    keylog = KeystrokeLog(keylog_path, clock=clock.now_ns)
+    game = TypingGame(keylog=keylog, screen=screen, clock=clock, event_source=scripted.event_source,
+                      target_source=scripted.target_source, render=render,
+                      corpus=corpus, adaptive=adaptive)
+    scripted.bind(game)
+    began = time.perf_counter()
+    game.run()
+    return {
+        "final_state": game.game_state,
+        "stage": game.stage,
+        "results": [
+            {"stage": stage, "cleared": cleared, "typing_speed": speed, "elapsed": elapsed}
+            for stage, cleared, speed, elapsed in game.results
+        ],
+        "simulated_seconds": clock.now(),
+        "wall_seconds": time.perf_counter() - began,
+        "frames": game.frame_stats.frames,
+        "keylog": keylog,
+    }
+
+
+def compare_logs(original, replayed):
+    """
+    再生したログ（KeystrokeLog）が元のログと一致するか調べ、食い違いの説明のリストを返す。
+    時刻は各挑戦の開始（出題文のレコード）からの経過時間で比べる。
+    """
+    def rows(kinds, chars, expected, correct, times):
+        out, start = [], 0
+        for kind, char, exp, ok, t in zip(kinds, chars, expected, correct, times):
+            if kind == KIND_TARGET:
+                start = t
+            out.append((int(kind), int(char), int(exp), int(ok), int(t - start)))
+        return out
+
+    recorded = rows(*(original[name].tolist() for name in ("kind", "char", "expected", "correct", "t_ns")))
+    replay = rows(replayed.kind, replayed.char, replayed.expected, replayed.correct, replayed.t_ns)
+    problems = []
+    if len(recorded) != len(replay):
+        problems.append(f"records: {len(recorded)} recorded, {len(replay)} replayed")
+    for i, (a, b) in enumerate(zip(recorded, replay)):
+        if a != b:
+            problems.append(f"record {i}: recorded {a}, replayed {b}")
+            break
+    return problems
+
+
+def summarize_sessions(sessions):
+    speeds = [r["typing_speed"] for s in sessions for r in s["results"] if r["cleared"]]
+    simulated = sum(s["simulated_seconds"] for s in sessions)
+    wall = sum(s["wall_seconds"] for s in sessions)
+    return {
+        "sessions": len(sessions),
+        "cleared": sum(s["final_state"] == "clear" for s in sessions),
+        "mean_typing_speed": sum(speeds) / len(speeds) if speeds else 0.0,
+        "simulated_seconds": simulated,
+        "wall_seconds": wall,
+        "speedup": simulated / wall if wall else 0.0,
+        "frames": sum(s["frames"] for s in sessions),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TypingGame のヘッドレス再生・シミュレーション")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    replay = sub.add_parser("replay", help="記録したキー入力ログを再生する")
+    replay.add_argument("path")
+    replay.add_argument("--check", action="store_true", help="再生結果が元のログと一致しなければ終了コード 1")
+
+    synthetic = sub.add_parser("synthetic", help="合成タイピストでセッションを回す")
+    synthetic.add_argument("--sessions", type=int, default=10)
+    synthetic.add_argument("--wpm", type=float, default=60)
+    synthetic.add_argument("--jitter", type=float, default=0.3)
+    synthetic.add_argument("--error-rate", type=float, default=0.03)
+    synthetic.add_argument("--seed", type=int, default=0)
+    synthetic.add_argument("--corpus", help="corpus.py build で作ったインデックス")
+    synthetic.add_argument("--adaptive", action="store_true")
+
+    for sub_parser in (replay, synthetic):
+        sub_parser.add_argument("--render", action="store_true", help="ダミードライバ上で描画も行う（描画込みの計測用）")
+        sub_parser.add_argument("--json", help="結果を JSON で保存する")
+    args = parser.parse_args(argv)
+
+    screen = create_screen()
+    sessions = []
+    failed = False
+    if args.command == "replay":
+        original = load_log(args.path)
+        scripted = ScriptedInput(SimulatedClock(), attempts=attempts_from_log(original))
+        session = run_session(scripted, screen, render=args.render)
+        sessions.append(session)
+        if args.check:
+            problems = compare_logs(original, session["keylog"])
+            for problem in problems:
+                print(f"mismatch: {problem}")
+            failed = bool(problems)
+    else:
+        corpus = CorpusIndex(args.corpus) if args.corpus else None
+        for i in range(args.sessions):
+            # 出題文の乱数もセッションごとに固定する
+            random.seed(f"target-{args.seed}-{i}")
+            typist = SyntheticTypist(args.wpm, args.jitter, args.error_rate, seed=f"typist-{args.seed}-{i}")
+            scripted = ScriptedInput(SimulatedClock(), typist=typist)
+            sessions.append(run_session(scripted, screen, render=args.render, corpus=corpus, adaptive=args.adaptive))
+
+    summary = summarize_sessions(sessions)
+    for i, session in enumerate(sessions):
+        cleared = sum(r["cleared"] for r in session["results"])
+        print(
+            f"session {i}: {session['final_state']} at stage {session['stage']}, "
+            f"{cleared}/{len(session['results'])} attempts cleared, "
+            f"{session['simulated_seconds']:.1f}s simulated in {session['wall_seconds']:.2f}s"
+        )
+    print(
+        f"{summary['cleared']}/{summary['sessions']} sessions cleared, "
+        f"mean speed {summary['mean_typing_speed']:.1f} chars/min, {summary['speedup']:.0f}x real time"
+    )
+    if args.json:
+        report = {
+            "summary": summary,
+            "sessions": [{k: v for k, v in s.items() if k != "keylog"} for s in sessions],
+        }
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    pygame.quit()
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,429 @@
+import argparse
+import pygame
+import random
+import string
+
+from corpus import CorpusIndex, KeyErrorStats
+from frame_stats import FrameStats, dump_path
+from game_clock import GameClock
+from keylog import KIND_BACKSPACE, KIND_CHAR, KIND_ENTER, KIND_OTHER, KeystrokeLog, session_path
+from render_cache import TextRenderer
+
+# 画面設定
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 600
+
+# 色の定義
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+RED = (255, 0, 0)
+GRAY = (120, 120, 120)
+
+# フォントサイズ（フォントと描画済みテキストは TextRenderer がキャッシュする）
+FONT_LARGE = 74
+FONT_MEDIUM = 48
+FONT_SMALL = 36
+FONT_OVERLAY = 24
+
+# 残り3秒以下のパルス表示で使うフォントサイズ（拡大率 1.0～1.5 を 0.1 刻み）
+PULSE_STEPS = 5
+PULSE_SIZES = [int(FONT_MEDIUM * (1.0 + 0.1 * step)) for step in range(PULSE_STEPS + 1)]
+
+# 部分更新する領域
+TIMER_AREA = pygame.Rect(SCREEN_WIDTH//2 - 200, 0, SCREEN_WIDTH - (SCREEN_WIDTH//2 - 200), 80)
+INPUT_AREA = pygame.Rect(0, SCREEN_HEIGHT//2 + 40, SCREEN_WIDTH, 56)
+OVERLAY_AREA = pygame.Rect(10, SCREEN_HEIGHT - 100, 520, 90)
+
+# 計測用のホットキー（F3: オーバーレイ表示切り替え、F12: 計測値を CSV に保存）
+KEY_OVERLAY = pygame.K_F3
+KEY_DUMP = pygame.K_F12
+
+def create_screen():
+    # Pygameの初期化と画面の作成（ヘッドレス実行では SDL_VIDEODRIVER=dummy を先に設定しておく）
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("タイピングゲーム")
+    return screen
+
+class TypingGame:
+    def __init__(self, keylog=None, frame_stats=None, log_dir="logs", show_overlay=False,
+                 corpus=None, adaptive=False, screen=None, clock=None, event_source=None,
+                 target_source=None, render=True):
+        # 画面・時計・入力は差し替えられる（simulate.py のヘッドレス再生で使う）
+        self.screen = screen if screen is not None else create_screen()
+        self.clock = clock if clock is not None else GameClock()
+        self.event_source = event_source or pygame.event.get
+        self.target_source = target_source  # game を受け取り出題文を返す。None なら generate_target_text
+        self.render = render  # False なら描画と画面更新を省く
+
+        self.stage = 1
+        self.max_stages = 10
+        self.time_limit = 10
+        self.input_text = ""
+        self.target_text = ""
+        self.game_state = "stage_intro"  # stage_intro, playing, clear, failed
+        self.start_time = 0
+        self.countdown = 3
+        self.countdown_end = 0
+        self.typing_speed = 0  # 入力速度（文字/分）
+        self.last_input_ns = 0  # 最初の文字を入力した時刻（keylog 基準の ns）
+        self.results = []  # ステージごとの結果（stage, cleared, typing_speed, elapsed）
+
+        # キー入力ログ（時間計測はすべて self.clock 基準）
+        self.keylog = keylog if keylog is not None else KeystrokeLog(clock=self.clock.now_ns)
+
+        # フレーム時間・入力遅延の計測
+        self.frame_stats = frame_stats if frame_stats is not None else FrameStats(clock=self.clock.now_ns)
+        self.log_dir = log_dir
+        self.show_overlay = show_overlay
+
+        # 出題用コーパス（None ならランダムな英小文字）と adaptive 出題の状態
+        self.corpus = corpus
+        self.adaptive = adaptive
+        self.key_errors = KeyErrorStats()
+        self.level_offset = 0  # ステージから決まる難易度への補正
+        self.stage_errors = 0  # このステージでの誤打数
+        
+        # ボタンの設定を追加
+        self.retry_button = pygame.Rect(SCREEN_WIDTH//2 - 100, SCREEN_HEIGHT//2 + 50, 200, 50)
+        self.quit_button = pygame.Rect(SCREEN_WIDTH//2 - 100, SCREEN_HEIGHT//2 + 120, 200, 50)
+
+        # タイマーバーの設定を追加
+        self.timer_bar_width = 400
+        self.timer_bar_height = 30
+        self.timer_bar_x = SCREEN_WIDTH//2 - self.timer_bar_width//2
+        self.timer_bar_y = 20
+        self.pulse_scale = 1.0
+        self.pulse_step = 0
+        self.pulse_direction = 1
+
+        # テキスト描画のキャッシュとパルス用フォントの事前生成
+        self.text = TextRenderer()
+        self.text.preload([FONT_LARGE, FONT_MEDIUM, FONT_SMALL, FONT_OVERLAY, *PULSE_SIZES])
+
+        # 前フレームに描画した状態（変化がなければ描き直さない）
+        self.drawn_state = None
+        self.drawn_input = None
+        self.drawn_countdown = None
+
+    def generate_target_text(self):
+        if self.corpus is not None:
+            return self.corpus.sample(self.difficulty_level(),
+                                      key_weights=self.key_errors.weights() if self.adaptive else None)
+        # ステージに応じて文字数を増やす
+        length = self.stage * 3
+        return ''.join(random.choices(string.ascii_lowercase, k=length))
+
+    def difficulty_level(self):
+        # ステージをコーパスのバケットに割り当て、adaptive なら成績による補正を加える
+        level = (self.stage - 1) * self.corpus.buckets // self.max_stages
+        if self.adaptive:
+            level += self.level_offset
+        return min(max(level, 0), self.corpus.buckets - 1)
+
+    def adjust_level(self, cleared):
+        # 誤打なしでクリアしたら1段階上げ、時間切れなら1段階下げる
+        if not self.adaptive or self.corpus is None:
+            return
+        if not cleared:
+            self.level_offset -= 1
+        elif self.stage_errors == 0:
+            self.level_offset += 1
+        self.level_offset = min(max(self.level_offset, -self.corpus.buckets), self.corpus.buckets)
+
+    def start_countdown(self):
+        # 残り時間は終了時刻から求める（フレームごとの経過時間を積算すると遅いフレームでずれるため）
+        self.countdown = 3
+        self.countdown_end = self.clock.now() + self.countdown
+
+    def begin_frame(self):
+        # 画面の種類が変わったフレームだけ全体を描き直す
+        full = self.drawn_state != self.game_state
+        self.drawn_state = self.game_state
+        return full
+
+    def draw_stage_intro(self, full=True):
+        # カウントダウンの数字が変わったときだけ描き直す
+        countdown = int(self.countdown)
+        if not full and countdown == self.drawn_countdown:
+            return []
+        self.drawn_countdown = countdown
+
+        self.screen.fill(WHITE)
+        stage_text = self.text.render(FONT_LARGE, f"STAGE {self.stage}", BLACK)
+        countdown_text = self.text.render(FONT_LARGE, str(countdown), BLACK)
+        speed_text = self.text.render(FONT_SMALL, f"Previous Speed: {self.typing_speed:.1f} chars/min", BLACK)
+        
+        self.screen.blit(stage_text, (SCREEN_WIDTH//2 - stage_text.get_width()//2, SCREEN_HEIGHT//2 - 50))
+        self.screen.blit(countdown_text, (SCREEN_WIDTH//2 - countdown_text.get_width()//2, SCREEN_HEIGHT//2 + 50))
+        self.screen.blit(speed_text, (SCREEN_WIDTH//2 - speed_text.get_width()//2, SCREEN_HEIGHT//2 + 120))
+        return [self.screen.get_rect()]
+
+    def draw_timer(self, remaining_time):
+        # バーの背景
+        pygame.draw.rect(self.screen, (200, 200, 200), 
+                        (self.timer_bar_x, self.timer_bar_y, 
+                         self.timer_bar_width, self.timer_bar_height))
+        
+        # 残り時間に応じたバーの長さを計算
+        bar_length = (remaining_time / self.time_limit) * self.timer_bar_width
+        
+        # バーの色を設定（3秒以下で赤く）
+        bar_color = RED if remaining_time <= 3 else (0, 150, 0)
+        
+        # タイマーバーを描画
+        pygame.draw.rect(self.screen, bar_color,
+                        (self.timer_bar_x, self.timer_bar_y, 
+                         bar_length, self.timer_bar_height))
+        
+        # 残り時間のテキスト
+        if remaining_time <= 3:
+            # パルスエフェクトの更新（0.1 刻みの段階で持ち、浮動小数の誤差でサイズがずれないようにする）
+            self.pulse_step += self.pulse_direction
+            if self.pulse_step >= PULSE_STEPS:
+                self.pulse_direction = -1
+            elif self.pulse_step <= 0:
+                self.pulse_direction = 1
+            self.pulse_scale = 1.0 + 0.1 * self.pulse_step
+                
+            # パルスエフェクトを適用したフォントサイズ（事前生成済み）
+            time_text = self.text.render(PULSE_SIZES[self.pulse_step], f"{remaining_time:.1f}", RED)
+        else:
+            time_text = self.text.render(FONT_MEDIUM, f"{remaining_time:.1f}", BLACK)
+        
+        # テキストをバーの右側に表示
+        text_x = self.timer_bar_x + self.timer_bar_width + 20
+        text_y = self.timer_bar_y + (self.timer_bar_height - time_text.get_height())//2
+        self.screen.blit(time_text, (text_x, text_y))
+
+    def draw_game_screen(self, full=True):
+        # 毎フレーム描き直すのはタイマーと入力行だけ。それ以外は画面に入ったときに一度描く
+        dirty = []
+        if full:
+            self.screen.fill(WHITE)
+
+            # ステージ表示
+            stage_text = self.text.render(FONT_SMALL, f"Stage {self.stage}/{self.max_stages}", BLACK)
+            self.screen.blit(stage_text, (20, 20))
+
+            # ターゲットテキスト表示
+            target_surface = self.text.render(FONT_MEDIUM, self.target_text, BLACK)
+            self.screen.blit(target_surface, (SCREEN_WIDTH//2 - target_surface.get_width()//2, SCREEN_HEIGHT//2 - 50))
+
+            # 入力指示の表示
+            instruction_text = self.text.render(FONT_SMALL, "Press Enter when finished", BLACK)
+            self.screen.blit(instruction_text, (SCREEN_WIDTH//2 - instruction_text.get_width()//2, SCREEN_HEIGHT//2 + 100))
+            dirty.append(self.screen.get_rect())
+            self.drawn_input = None
+        
+        # タイマー表示を更新
+        remaining_time = max(0, self.time_limit - (self.clock.now() - self.start_time))
+        self.screen.fill(WHITE, TIMER_AREA)
+        self.draw_timer(remaining_time)
+        dirty.append(TIMER_AREA)
+
+        # 入力テキスト表示（変わったときだけ）
+        if self.input_text != self.drawn_input:
+            self.drawn_input = self.input_text
+            self.screen.fill(WHITE, INPUT_AREA)
+            input_surface = self.text.render(FONT_MEDIUM, self.input_text, BLACK)
+            self.screen.blit(input_surface, (SCREEN_WIDTH//2 - input_surface.get_width()//2, SCREEN_HEIGHT//2 + 50))
+            dirty.append(INPUT_AREA)
+        return dirty
+
+    def draw_clear_screen(self, full=True):
+        # 静止画面なので入ったときに一度だけ描く
+        if not full:
+            return []
+        self.screen.fill(WHITE)
+        clear_text = self.text.render(FONT_LARGE, "GAME CLEAR!", BLACK)
+        self.screen.blit(clear_text, (SCREEN_WIDTH//2 - clear_text.get_width()//2, SCREEN_HEIGHT//2))
+        return [self.screen.get_rect()]
+
+    def draw_failed_screen(self, full=True):
+        # 静止画面なので入ったときに一度だけ描く
+        if not full:
+            return []
+        self.screen.fill(WHITE)
+        # 失敗メッセージ
+        failed_text = self.text.render(FONT_LARGE, "TIME OVER!", RED)
+        self.screen.blit(failed_text, (SCREEN_WIDTH//2 - failed_text.get_width()//2, SCREEN_HEIGHT//2 - 50))
+        
+        # Retryボタン
+        pygame.draw.rect(self.screen, BLACK, self.retry_button)
+        retry_text = self.text.render(FONT_MEDIUM, "Retry", WHITE)
+        self.screen.blit(retry_text, (self.retry_button.centerx - retry_text.get_width()//2, 
+                                self.retry_button.centery - retry_text.get_height()//2))
+        
+        # Quitボタン
+        pygame.draw.rect(self.screen, BLACK, self.quit_button)
+        quit_text = self.text.render(FONT_MEDIUM, "Quit", WHITE)
+        self.screen.blit(quit_text, (self.quit_button.centerx - quit_text.get_width()//2, 
+                               self.quit_button.centery - quit_text.get_height()//2))
+        return [self.screen.get_rect()]
+
+    def draw_overlay(self):
+        # 計測値のオーバーレイ（表示中は毎フレーム描き直す）
+        self.screen.fill(WHITE, OVERLAY_AREA)
+        y = OVERLAY_AREA.y
+        for line in self.frame_stats.overlay_lines():
+            surface = self.text.render(FONT_OVERLAY, line, GRAY)
+            self.screen.blit(surface, (OVERLAY_AREA.x, y))
+            y += surface.get_height()
+        return [OVERLAY_AREA]
+
+    def handle_hotkey(self, key):
+        # 計測用のホットキーなら処理して True を返す
+        if key == KEY_OVERLAY:
+            self.show_overlay = not self.show_overlay
+            self.drawn_state = None  # 消すときは全体を描き直す
+            return True
+        if key == KEY_DUMP:
+            path = self.frame_stats.dump(dump_path(self.log_dir))
+            print(f"frame stats saved to {path}")
+            return True
+        return False
+
+    def run(self):
+        running = True
+        self.start_countdown()
+
+        while running:
+            self.frame_stats.begin_frame()
+            for event in self.event_source():
+                if event.type == pygame.QUIT:
+                    running = False
+
+                # ウィンドウが再表示されたら次のフレームで全体を描き直す
+                if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                    self.drawn_state = None
+
+                if event.type == pygame.MOUSEBUTTONDOWN and self.game_state == "failed":
+                    mouse_pos = event.pos
+                    if self.retry_button.collidepoint(mouse_pos):
+                        # リトライ処理
+                        self.game_state = "stage_intro"
+                        self.start_countdown()
+                        self.input_text = ""
+                    elif self.quit_button.collidepoint(mouse_pos):
+                        running = False
+
+                if event.type == pygame.KEYDOWN and self.handle_hotkey(event.key):
+                    continue
+
+                if event.type == pygame.KEYDOWN and self.game_state == "playing":
+                    self.frame_stats.key_event()
+                    now_ns = self.record_key(event)
+                    if event.key == pygame.K_RETURN:
+                        # 入力速度の計算
+                        elapsed_time = (now_ns - self.last_input_ns) / 1e9
+                        if elapsed_time > 0:
+                            self.typing_speed = (len(self.input_text) / elapsed_time) * 60
+                        
+                        if self.input_text == self.target_text:
+                            self.adjust_level(cleared=True)
+                            self.results.append((self.stage, True, self.typing_speed,
+                                                 self.clock.now() - self.start_time))
+                            if self.stage == self.max_stages:
+                                self.game_state = "clear"
+                            else:
+                                self.stage += 1
+                                self.game_state = "stage_intro"
+                                self.start_countdown()
+                        else:
+                            # 入力が間違っている場合、入力バーをクリア
+                            self.input_text = ""
+                            self.last_input_ns = now_ns
+                    elif event.key == pygame.K_BACKSPACE:
+                        self.input_text = self.input_text[:-1]
+                    else:
+                        if len(event.unicode.encode()) == 1:
+                            if self.input_text == "":  # 最初の文字入力時
+                                self.last_input_ns = now_ns
+                            self.input_text += event.unicode
+
+            self.frame_stats.events_done()
+            full = self.begin_frame()
+            dirty = []
+            if self.game_state == "stage_intro":
+                if self.render:
+                    dirty = self.draw_stage_intro(full)
+                self.countdown = self.countdown_end - self.clock.now()
+                if self.countdown <= 0:
+                    self.game_state = "playing"
+                    if self.target_source is not None:
+                        self.target_text = self.target_source(self)
+                    else:
+                        self.target_text = self.generate_target_text()
+                    self.input_text = ""
+                    self.start_time = self.clock.now()
+                    self.stage_errors = 0
+                    self.last_input_ns = self.keylog.record_target(self.target_text, self.stage)
+
+            elif self.game_state == "playing":
+                if self.render:
+                    dirty = self.draw_game_screen(full)
+                if self.clock.now() - self.start_time >= self.time_limit:
+                    self.game_state = "failed"  # 失敗画面に遷移
+                    self.adjust_level(cleared=False)
+                    self.results.append((self.stage, False, self.typing_speed, float(self.time_limit)))
+                    self.keylog.flush()
+
+            elif self.game_state == "clear":
+                if self.render:
+                    dirty = self.draw_clear_screen(full)
+                
+            elif self.game_state == "failed":
+                if self.render:
+                    dirty = self.draw_failed_screen(full)
+
+            if self.show_overlay and self.render:
+                dirty = dirty + self.draw_overlay()
+            self.frame_stats.render_done()
+
+            # 変化した領域だけ画面に反映
+            if dirty:
+                pygame.display.update(dirty)
+            self.frame_stats.presented()
+            self.clock.tick(60)
+
+        self.keylog.close()
+
+    def record_key(self, event):
+        # KEYDOWN を1件ログに追記し、その時刻（ns）を返す
+        if event.key == pygame.K_RETURN:
+            kind = KIND_ENTER
+        elif event.key == pygame.K_BACKSPACE:
+            kind = KIND_BACKSPACE
+        elif len(event.unicode.encode()) == 1:
+            kind = KIND_CHAR
+        else:
+            kind = KIND_OTHER
+        char = event.unicode if kind == KIND_CHAR else ""
+        position = len(self.input_text)
+        expected = self.target_text[position] if kind == KIND_CHAR and position < len(self.target_text) else ""
+        if expected:
+            self.key_errors.record(expected, char == expected)
+            if char != expected:
+                self.stage_errors += 1
+        return self.keylog.record(event.key, char, expected, kind, self.stage)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="タイピングゲーム")
+    parser.add_argument("--log-dir", default="logs", help="キー入力ログの保存先")
+    parser.add_argument("--log-format", choices=["keylog", "csv"], default="keylog",
+                        help="ログ形式（keylog はバイナリ）")
+    parser.add_argument("--no-log", action="store_true", help="キー入力ログをファイルに書き出さない")
+    parser.add_argument("--corpus", help="corpus.py build で作ったインデックス（省略時はランダムな英小文字）")
+    parser.add_argument("--adaptive", action="store_true", help="成績と苦手な文字に合わせて出題する（--corpus が必要）")
+    parser.add_argument("--overlay", action="store_true", help="フレーム時間・入力遅延のオーバーレイを表示する（F3 で切り替え）")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    path = None if args.no_log else session_path(args.log_dir, args.log_format)
+    corpus = CorpusIndex(args.corpus) if args.corpus else None
+    game = TypingGame(KeystrokeLog(path), log_dir=args.log_dir, show_overlay=args.overlay,
+                      corpus=corpus, adaptive=args.adaptive)
+    game.run()
+    pygame.quit()
@@ -0,0 +1,303 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import itertools
+import os
+import re
+import sys
+import time
+from collections import Counter, deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Executor
+from pathlib import Path
+
+from tokenization import (
+    JAPANESE_STOPWORDS,
+    LANG_AUTO,
+    LANG_EN,
+    LANG_JA,
+    contains_japanese,
+    start_pool,
+    tokenize_english,
+    tokenize_japanese,
+)
+
+
+# Chunks are whole paragraphs packed up to this many characters; only a
+# paragraph longer than this is cut, at a line or sentence end.
+CHUNK_CHARS = 4_000
+
+# Characters of chunks per worker task: enough that pickling and scheduling
+# are small next to tokenising (about a second of Janome per task).
+TASK_CHARS = 50_000
+
+# Corpora shorter than this are counted in this process; starting worker
+# processes would take longer than the work.
+PARALLEL_MIN_CHARS = 200_000
+
+DOCUMENT_SUFFIXES = {".txt", ".md", ".csv"}
+
+# Keys: min_len, include_pos, include_numbers, japanese_stopwords,
+# english_stopwords. Sent to the workers with every task.
+TokenRules = dict[str, object]
+
+# (is_japanese, text)
+Chunk = tuple[bool, str]
+
+_PARAGRAPH_BREAK = re.compile(r"\n[ \t　]*\n")
+_SENTENCE_ENDS = ("\n", "。", "！", "？", ". ", "! ", "? ")
+
+
+def split_paragraphs(text: str, max_chars: int = CHUNK_CHARS) -> Iterator[str]:
+    """
+    Chunks of whole paragraphs (separated by blank lines), packed up to
+    max_chars, so no word is cut in half by a chunk boundary.
+    """
+    pending: list[str] = []
+    size = 0
+    for paragraph in _PARAGRAPH_BREAK.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        for piece in _split_long(paragraph, max_chars):
+            if pending and size + len(piece) > max_chars:
+                yield "\n\n".join(pending)
+                pending, size = [], 0
+            pending.append(piece)
+            size += len(piece) + 2
+    if pending:
+        yield "\n\n".join(pending)
+
+
+def _split_long(paragraph: str, max_chars: int) -> Iterator[str]:
+    # A paragraph over max_chars is cut after the last line or sentence end
+    # that fits, and only at max_chars when there is none.
+    while len(paragraph) > max_chars:
+        window = paragraph[:max_chars]
+        cut = max((window.rfind(end) + len(end) for end in _SENTENCE_ENDS if end in window), default=max_chars)
+        yield paragraph[:cut]
+        paragraph = paragraph[cut:].lstrip()
+    if paragraph:
+        yield paragraph
+
+
+def iter_chunks(documents: Iterable[str], language: str, max_chars: int = CHUNK_CHARS) -> Iterator[Chunk]:
+    """Paragraph chunks of every document, each marked with its language (detected per document for Auto)."""
+    for document in documents:
+        japanese = contains_japanese(document) if language == LANG_AUTO else language == LANG_JA
+        for chunk in split_paragraphs(document, max_chars):
+            yield japanese, chunk
+
+
+def iter_tasks(chunks: Iterable[Chunk], task_chars: int = TASK_CHARS) -> Iterator[list[Chunk]]:
+    task: list[Chunk] = []
+    size = 0
+    for chunk in chunks:
+        task.append(chunk)
+        size += len(chunk[1])
+        if size >= task_chars:
+            yield task
+            task, size = [], 0
+    if task:
+        yield task
+
+
+def count_chunk(chunk: Chunk, rules: TokenRules) -> Counter[str]:
+    japanese, text = chunk
+    if japanese:
+        tokens = tokenize_japanese(text, rules["min_len"], rules["include_pos"], rules["japanese_stopwords"])
+    else:
+        tokens = tokenize_english(text, rules["min_len"], rules["include_numbers"], rules["english_stopwords"])
+    return Counter(tokens)
+
+
+def count_task(task: list[Chunk], rules: TokenRules) -> Counter[str]:
+    """Runs in a worker: the merged counts of one task's chunks."""
+    return merge_counters(count_chunk(chunk, rules) for chunk in task)
+
+
+def _merge_pair(left: Counter[str], right: Counter[str]) -> Counter[str]:
+    # Update the larger counter with the smaller one; the work is the size of the smaller.
+    if len(left) < len(right):
+        left, right = right, left
+    left.update(right)
+    return left
+
+
+def merge_counters(counters: Iterable[Counter[str]]) -> Counter[str]:
+    """
+    Sum counters as a binary tree: each new counter is merged with a partial
+    sum of the same height, like carries when counting in binary, so only
+    log2(n) partial sums are alive while a stream of counters is folded in.
+    The counters passed in are updated in place.
+    """
+    levels: list[Counter[str] | None] = []
+    for counter in counters:
+        height = 0
+        while height < len(levels) and levels[height] is not None:
+            counter = _merge_pair(levels[height], counter)
+            levels[height] = None
+            height += 1
+        if height == len(levels):
+            levels.append(counter)
+        else:
+            levels[height] = counter
+    total: Counter[str] = Counter()
+    for counter in levels:
+        if counter is not None:
+            total = _merge_pair(total, counter)
+    return total
+
+
+def _pooled_counts(
+    executor: Executor,
+    tasks: Iterable[list[Chunk]],
+    rules: TokenRules,
+    in_flight: int,
+) -> Iterator[Counter[str]]:
+    # At most in_flight tasks are queued, so a huge corpus is read as the
+    # workers get through it rather than all at once. Results come back in
+    # submission order, which keeps ties in most_common() stable between runs.
+    pending: deque = deque()
+    for task in tasks:
+        pending.append(executor.submit(count_task, task, rules))
+        if len(pending) >= in_flight:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def analyze_documents(
+    documents: Iterable[str],
+    language: str,
+    rules: TokenRules,
+    workers: int | None = None,
+    executor: Executor | None = None,
+    chunk_chars: int = CHUNK_CHARS,
+    task_chars: int = TASK_CHARS,
+) -> Counter[str]:
+    """
+    Token counts over many documents (or one huge one). Documents are split
+    into paragraph chunks, the chunks are grouped into tasks of about
+    task_chars, each task is counted in a worker process and the per-task
+    counters are merged with merge_counters.
+
+    Pass executor to reuse a running pool (such as tokenization.get_pool())
+    together with its size as workers, which bounds the tasks queued on it.
+    Otherwise a pool of `workers` processes (default: one per CPU) is started
+    for the call. With workers=1 and no executor, or a corpus under
+    PARALLEL_MIN_CHARS, it all runs in this process.
+    """
+    if executor is not None and not workers:
+        raise ValueError("Pass the executor's number of workers along with it.")
+    workers = workers or os.cpu_count() or 1
+    tasks = iter_tasks(iter_chunks(documents, language, chunk_chars), task_chars)
+
+    # Read just enough of the corpus to know whether a pool is worth it.
+    head: list[list[Chunk]] = []
+    head_chars = 0
+    for task in tasks:
+        head.append(task)
+        head_chars += sum(len(text) for _, text in task)
+        if head_chars >= PARALLEL_MIN_CHARS:
+            break
+    tasks = itertools.chain(head, tasks)
+
+    if executor is None and (workers == 1 or head_chars < PARALLEL_MIN_CHARS):
+        return merge_counters(count_task(task, rules) for task in tasks)
+
+    own_pool = executor is None
+    if own_pool:
+        executor = start_pool(workers)
+    try:
+        return merge_counters(_pooled_counts(executor, tasks, rules, in_flight=2 * workers))
+    finally:
+        if own_pool:
+            executor.shutdown(cancel_futures=True)
+
+
+def decode_text(data: bytes) -> str:
+    # Minutes exported on Japanese Windows are often Shift_JIS (cp932).
+    for encoding in ("utf-8-sig", "cp932"):
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return data.decode("utf-8", errors="replace")
+
+
+def documents_from_file(name: str, data: bytes) -> list[str]:
+    """A text file is one document; in a CSV each row is one, its cells as paragraphs."""
+    text = decode_text(data)
+    if Path(name).suffix.lower() != ".csv":
+        return [text]
+    documents = []
+    for row in csv.reader(io.StringIO(text)):
+        cells = [cell.strip() for cell in row if cell.strip()]
+        if cells:
+            documents.append("\n\n".join(cells))
+    return documents
+
+
+def iter_document_files(paths: Iterable[Path]) -> Iterator[Path]:
+    for path in paths:
+        if path.is_dir():
+            yield from sorted(
+                child for child in path.rglob("*") if child.is_file() and child.suffix.lower() in DOCUMENT_SUFFIXES
+            )
+        else:
+            yield path
+
+
+def main(argv: list[str] | None = None) -> int:
+    from wordcloud import STOPWORDS
+
+    parser = argparse.ArgumentParser(
+        description="Count keywords over many minutes files (.txt, .md, .csv) with a process pool."
+    )
+    parser.add_argument("paths", nargs="+", type=Path, help="files, or folders searched recursively")
+    parser.add_argument("--language", choices=[LANG_AUTO, LANG_JA, LANG_EN], default=LANG_AUTO)
+    parser.add_argument("--min-len", type=int, default=2)
+    parser.add_argument("--pos", nargs="+", default=["名詞", "形容詞"], help="Japanese parts of speech")
+    parser.add_argument("--include-numbers", action="store_true", help="keep numbers (English)")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--top", type=int, default=30)
+    parser.add_argument("--csv", type=Path, help="write every keyword and its count to this file")
+    args = parser.parse_args(argv)
+
+    rules: TokenRules = {
+        "min_len": args.min_len,
+        "include_pos": set(args.pos),
+        "include_numbers": args.include_numbers,
+        "japanese_stopwords": JAPANESE_STOPWORDS,
+        "english_stopwords": {word.lower() for word in STOPWORDS},
+    }
+    files = list(iter_document_files(args.paths))
+    characters = 0
+
+    def documents() -> Iterator[str]:
+        nonlocal characters
+        for path in files:
+            for document in documents_from_file(path.name, path.read_bytes()):
+                characters += len(document)
+                yield document
+
+    started = time.perf_counter()
+    counts = analyze_documents(documents(), args.language, rules, workers=args.workers)
+    elapsed = time.perf_counter() - started
+
+    for word, count in counts.most_common(args.top):
+        print(f"{count:8}  {word}")
+    print(f"{len(files)} files, {characters:,} characters in {elapsed:.2f}s", file=sys.stderr)
+    if args.csv is not None:
+        with args.csv.open("w", encoding="utf-8", newline="") as out:
+            writer = csv.writer(out)
+            writer.writerow(["keyword", "count"])
+            writer.writerows(counts.most_common())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
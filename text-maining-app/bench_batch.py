@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+from batch_analysis import TokenRules, analyze_documents
+from tokenization import JAPANESE_STOPWORDS, LANG_AUTO, get_tokenizer, janome_available, start_pool
+
+
+SENTENCES_JA = (
+    "昨日の定例会議では、新規プロジェクトの進め方を議論しました。",
+    "特に、要件定義の精度とレビューのタイミングが重要だという意見が多かったです。",
+    "オンライン会議のコメントでは、スケジュール調整とリスク管理に関する発言が目立ちました。",
+    "次回までに見積もりの前提条件と体制案を整理して共有します。",
+    "品質保証チームから、テスト計画の早期レビューについて提案がありました。",
+)
+SENTENCES_EN = (
+    "The weekly sync covered the migration plan and the open risks.",
+    "Reviewers asked for earlier design reviews and clearer acceptance criteria.",
+    "Action items: update the schedule, confirm the budget, share the test plan.",
+)
+TOPICS = ("予算", "採用", "監査", "移行", "障害", "顧客", "契約", "研修")
+
+
+def synthesise(documents: int, paragraphs: int, seed: int = 0) -> list[str]:
+    """Minutes-like documents, mostly Japanese with some English ones. Seeded, so every run counts the same text."""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(documents):
+        english = rng.random() < 0.2
+        blocks = []
+        for _ in range(paragraphs):
+            if english:
+                blocks.append(" ".join(rng.choice(SENTENCES_EN) for _ in range(3)))
+            else:
+                topic = rng.choice(TOPICS)
+                blocks.append(f"{topic}について。" + "".join(rng.choice(SENTENCES_JA) for _ in range(3)))
+        corpus.append("\n\n".join(blocks))
+    return corpus
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Throughput of the batch analysis engine on a synthesised corpus, by number of worker processes."
+    )
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument("--paragraphs", type=int, default=5, help="paragraphs per document (default: 5)")
+    parser.add_argument(
+        "--workers", type=int, nargs="+", help="worker counts to try (default: 1, 2, 4, ... up to the CPU count)"
+    )
+    parser.add_argument("--json", type=Path, help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    if not janome_available():
+        print("janome is not installed.", file=sys.stderr)
+        return 1
+    cpus = os.cpu_count() or 1
+    worker_counts = args.workers or sorted({1, cpus, *(2 ** n for n in range(1, 8) if 2 ** n < cpus)})
+    corpus = synthesise(args.documents, args.paragraphs)
+    characters = sum(len(document) for document in corpus)
+    rules: TokenRules = {
+        "min_len": 2,
+        "include_pos": {"名詞", "形容詞"},
+        "include_numbers": False,
+        "japanese_stopwords": JAPANESE_STOPWORDS,
+        "english_stopwords": set(),
+    }
+
+    # One worker runs in this process; load its tokenizer before the clock starts.
+    get_tokenizer()
+    results = []
+    reference = None
+    for workers in worker_counts:
+        startup = 0.0
+        executor = None
+        if workers > 1:
+            started = time.perf_counter()
+            executor = start_pool(workers)
+            # Wait for every worker to be up and warm.
+            for future in [executor.submit(os.getpid) for _ in range(workers)]:
+                future.result()
+            startup = time.perf_counter() - started
+        started = time.perf_counter()
+        counts = analyze_documents(corpus, LANG_AUTO, rules, workers=workers, executor=executor)
+        elapsed = time.perf_counter() - started
+        if executor is not None:
+            executor.shutdown()
+        if reference is None:
+            reference = counts
+        results.append(
+            {
+                "workers": workers,
+                "seconds": round(elapsed, 3),
+                "pool_startup_seconds": round(startup, 3),
+                "chars_per_second": round(characters / elapsed),
+                "speedup": round(results[0]["seconds"] / elapsed, 2) if results else 1.0,
+                "same_counts": counts == reference,
+            }
+        )
+        result = results[-1]
+        print(
+            f"{workers:3} workers  {elapsed:7.2f}s  {result['chars_per_second'] / 1000:8.0f}k chars/s  "
+            f"speedup {result['speedup']:5.2f}x  pool start {startup:5.2f}s"
+            + ("" if result["same_counts"] else "  COUNTS DIFFER"),
+            flush=True,
+        )
+
+    if args.json is not None:
+        report = {"documents": args.documents, "characters": characters, "cpus": cpus, "results": results}
+        args.json.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return 0 if all(result["same_counts"] for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
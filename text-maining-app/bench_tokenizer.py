@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+
+APP_DIR = Path(__file__).resolve().parent
+
+MODES = ("per-call", "shared", "pool")
+
+SENTENCES = (
+    "昨日の定例会議では、新規プロジェクトの進め方を議論しました。",
+    "特に、要件定義の精度とレビューのタイミングが重要だという意見が多かったです。",
+    "オンライン会議のコメントでは、スケジュール調整とリスク管理に関する発言が目立ちました。",
+)
+
+INCLUDE_POS = {"名詞", "形容詞"}
+
+
+def sample_text(chars: int) -> str:
+    text = ""
+    while len(text) < chars:
+        text += "\n".join(SENTENCES) + "\n"
+    return text[:chars]
+
+
+def per_call(text: str) -> list[str]:
+    """The old behaviour: a new Tokenizer for every Analyze."""
+    from janome.tokenizer import Tokenizer
+
+    tokenizer = Tokenizer()
+    return [token.base_form for token in tokenizer.tokenize(text) if token.part_of_speech.split(",")[0] in INCLUDE_POS]
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def child(mode: str, chars: int, requests: int, users: int, workers: int) -> dict[str, object]:
+    """
+    Latency of the first request in a fresh process (cold: imports, dictionary,
+    pool start-up), of the following ones one at a time (warm), and of
+    `users` sessions sending requests at the same time.
+    """
+    started = time.perf_counter()
+    import tokenization
+
+    text = sample_text(chars)
+    if mode == "per-call":
+        request = per_call
+    elif mode == "shared":
+        def request(text: str) -> list[str]:
+            return tokenization.tokenize_japanese(text, 1, INCLUDE_POS, set())
+    else:
+        pool = tokenization.get_pool(workers)
+
+        def request(text: str) -> list[str]:
+            return pool.submit(tokenization.tokenize_japanese, text, 1, INCLUDE_POS, set()).result()
+
+    request(text)
+    cold = time.perf_counter() - started
+
+    warm = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        request(text)
+        warm.append(time.perf_counter() - started)
+
+    concurrent: list[float] = []
+    lock = threading.Lock()
+
+    def session() -> None:
+        for _ in range(max(1, requests // users)):
+            started = time.perf_counter()
+            request(text)
+            with lock:
+                concurrent.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=session) for _ in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+    tokenization.shutdown_pool()
+
+    return {
+        "mode": mode,
+        "cold_seconds": round(cold, 4),
+        "warm_median_seconds": round(statistics.median(warm), 4),
+        "concurrent_p50_seconds": round(percentile(concurrent, 0.5), 4),
+        "concurrent_p95_seconds": round(percentile(concurrent, 0.95), 4),
+        "concurrent_requests_per_second": round(len(concurrent) / wall, 1) if wall > 0 else 0.0,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Cold vs. warm Japanese tokenisation latency: a Tokenizer per request, "
+        "the shared tokenizer, and the warm worker pool."
+    )
+    parser.add_argument("--chars", type=int, default=2000, help="characters per request (default: 2000)")
+    parser.add_argument("--requests", type=int, default=40, help="warm requests to time (default: 40)")
+    parser.add_argument("--users", type=int, default=8, help="concurrent sessions (default: 8)")
+    parser.add_argument("--workers", type=int, default=4, help="pool size for the pool mode (default: 4)")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--json", type=Path, help="also write the results to this file")
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(child(args.child, args.chars, args.requests, args.users, args.workers)))
+        return 0
+
+    results = []
+    for mode in args.modes:
+        # A fresh interpreter per mode, so the first request is really cold.
+        output = subprocess.run(
+            [
+                sys.executable, __file__, "--child", mode,
+                "--chars", str(args.chars), "--requests", str(args.requests),
+                "--users", str(args.users), "--workers", str(args.workers),
+            ],
+            cwd=APP_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        results.append(json.loads(output.stdout.strip().splitlines()[-1]))
+
+    if args.json is not None:
+        report = {"chars": args.chars, "users": args.users, "workers": args.workers, "results": results}
+        args.json.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    for result in results:
+        print(
+            f"{result['mode']:8} cold {result['cold_seconds'] * 1000:7.1f} ms  "
+            f"warm {result['warm_median_seconds'] * 1000:7.1f} ms  "
+            f"{args.users} users p50 {result['concurrent_p50_seconds'] * 1000:7.1f} ms "
+            f"p95 {result['concurrent_p95_seconds'] * 1000:7.1f} ms  "
+            f"{result['concurrent_requests_per_second']:6.1f} req/s"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
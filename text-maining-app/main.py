@@ -2,7 +2,6 @@ from __future__ import annotations
 
 import io
 import os
-import re
 import tempfile
 from collections import Counter
 from pathlib import Path
@@ -12,86 +11,26 @@ import pandas as pd
 import streamlit as st
 from wordcloud import STOPWORDS, WordCloud
 
-try:
-    from janome.tokenizer import Tokenizer
-except Exception:  # pragma: no cover - handled by dependency setup
-    Tokenizer = None
+from batch_analysis import analyze_documents, documents_from_file
+from tokenization import (
+    JAPANESE_STOPWORDS,
+    LANG_AUTO,
+    LANG_EN,
+    LANG_JA,
+    configured_workers,
+    contains_japanese,
+    get_pool,
+    janome_available,
+    tokenize_english,
+    tokenize_japanese_pooled,
+    warm_up,
+)
 
 
-JAPANESE_STOPWORDS = {
-    "これ",
-    "それ",
-    "あれ",
-    "この",
-    "その",
-    "あの",
-    "ため",
-    "よう",
-    "こと",
-    "もの",
-    "ところ",
-    "とき",
-    "さん",
-    "する",
-    "いる",
-    "なる",
-    "ある",
-    "ます",
-    "です",
-    "できる",
-}
-
 DEFAULT_SAMPLE = """昨日の定例会議では、新規プロジェクトの進め方を議論しました。
 特に、要件定義の精度とレビューのタイミングが重要だという意見が多かったです。
 オンライン会議のコメントでは、スケジュール調整とリスク管理に関する発言が目立ちました。"""
 
-LANG_AUTO = "Auto"
-LANG_JA = "Japanese"
-LANG_EN = "English"
-
-
-def contains_japanese(text: str) -> bool:
-    return bool(re.search(r"[ぁ-んァ-ン一-龥]", text))
-
-
-def tokenize_english(
-    text: str,
-    min_len: int,
-    include_numbers: bool,
-    stopwords: set[str],
-) -> list[str]:
-    if include_numbers:
-        pattern = r"[A-Za-z0-9][A-Za-z0-9'\-]*"
-    else:
-        pattern = r"[A-Za-z][A-Za-z'\-]*"
-    words = re.findall(pattern, text.lower())
-    return [word for word in words if len(word) >= min_len and word not in stopwords]
-
-
-def tokenize_japanese(
-    text: str,
-    min_len: int,
-    include_pos: set[str],
-    stopwords: set[str],
-) -> list[str]:
-    if Tokenizer is None:
-        return []
-    tokenizer = Tokenizer()
-    tokens: list[str] = []
-    for token in tokenizer.tokenize(text):
-        pos = token.part_of_speech.split(",")[0]
-        base = token.base_form
-        if base == "*":
-            base = token.surface
-        if pos not in include_pos:
-            continue
-        if len(base) < min_len:
-            continue
-        if base in stopwords:
-            continue
-        tokens.append(base)
-    return tokens
-
 
 def find_font_path(uploaded_font: bytes | None, filename: str | None) -> str | None:
     if uploaded_font and filename:
@@ -151,6 +90,7 @@ def build_wordcloud(
 
 
 def main() -> None:
+    warm_up()
     st.set_page_config(
         page_title="AI Text Mining Word Cloud",
         page_icon="🧠",
@@ -181,14 +121,26 @@ def main() -> None:
         uploaded_font = st.file_uploader("Font File (optional)", type=["ttf", "otf", "ttc"])
 
     text = st.text_area("Input Text", height=240, value=DEFAULT_SAMPLE)
+    uploaded_documents = st.file_uploader(
+        "Documents (optional, analysed instead of the text)",
+        type=["txt", "md", "csv"],
+        accept_multiple_files=True,
+    )
 
     if st.button("Analyze", type="primary"):
-        if not text.strip():
+        documents: list[str] = []
+        for uploaded in uploaded_documents or []:
+            documents.extend(documents_from_file(uploaded.name, uploaded.getvalue()))
+        if not documents and not text.strip():
             st.error("テキストを入力してください。")
             return
 
         if language == LANG_AUTO:
-            resolved_language = LANG_JA if contains_japanese(text) else LANG_EN
+            if documents:
+                has_japanese = any(contains_japanese(document) for document in documents)
+            else:
+                has_japanese = contains_japanese(text)
+            resolved_language = LANG_JA if has_japanese else LANG_EN
         else:
             resolved_language = language
 
@@ -197,29 +149,53 @@ def main() -> None:
             uploaded_font.name if uploaded_font else None,
         )
 
-        if resolved_language == LANG_JA:
-            if Tokenizer is None:
-                st.error("日本語解析には janome が必要です。依存関係を確認してください。")
-                return
-            tokens = tokenize_japanese(
-                text,
-                min_len=min_len,
-                include_pos=set(include_pos),
-                stopwords=JAPANESE_STOPWORDS,
+        if resolved_language == LANG_JA and not janome_available():
+            st.error("日本語解析には janome が必要です。依存関係を確認してください。")
+            return
+
+        english_stopwords = set(word.lower() for word in STOPWORDS)
+        if documents:
+            rules = {
+                "min_len": min_len,
+                "include_pos": set(include_pos),
+                "include_numbers": include_numbers,
+                "japanese_stopwords": JAPANESE_STOPWORDS,
+                "english_stopwords": english_stopwords,
+            }
+            # Only the shared pool is used: a pool per click would multiply
+            # processes (and dictionary loads) across sessions.
+            pool = get_pool()
+            with st.spinner(f"{len(documents)}件の文書を解析しています..."):
+                counts = analyze_documents(
+                    documents,
+                    language,
+                    rules,
+                    workers=configured_workers() if pool is not None else 1,
+                    executor=pool,
+                )
+        elif resolved_language == LANG_JA:
+            counts = Counter(
+                tokenize_japanese_pooled(
+                    text,
+                    min_len=min_len,
+                    include_pos=set(include_pos),
+                    stopwords=JAPANESE_STOPWORDS,
+                )
             )
         else:
-            tokens = tokenize_english(
-                text,
-                min_len=min_len,
-                include_numbers=include_numbers,
-                stopwords=set(word.lower() for word in STOPWORDS),
+            counts = Counter(
+                tokenize_english(
+                    text,
+                    min_len=min_len,
+                    include_numbers=include_numbers,
+                    stopwords=english_stopwords,
+                )
             )
 
-        if not tokens:
+        if not counts:
             st.warning("抽出された単語がありませんでした。設定を見直してください。")
             return
 
-        counts = Counter(tokens)
         top_counts = counts.most_common(max_words)
         frequencies = dict(top_counts)
 
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import atexit
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from janome.tokenizer import Tokenizer
+except Exception:  # pragma: no cover - handled by dependency setup
+    Tokenizer = None
+
+
+# Number of warm tokenizer processes for heavy texts; 0 (the default) keeps
+# all tokenisation in the Streamlit process.
+WORKERS_ENV = "TOKENIZER_WORKERS"
+
+# Texts at least this long go to a worker process when the pool is enabled.
+HEAVY_TEXT_CHARS = 20_000
+
+WARMUP_TEXT = "定例会議の議事録を確認しました。"
+
+JAPANESE_STOPWORDS = {
+    "これ",
+    "それ",
+    "あれ",
+    "この",
+    "その",
+    "あの",
+    "ため",
+    "よう",
+    "こと",
+    "もの",
+    "ところ",
+    "とき",
+    "さん",
+    "する",
+    "いる",
+    "なる",
+    "ある",
+    "ます",
+    "です",
+    "できる",
+}
+
+LANG_AUTO = "Auto"
+LANG_JA = "Japanese"
+LANG_EN = "English"
+
+_tokenizer = None
+_tokenizer_lock = threading.Lock()
+# Janome's matcher keeps an LRU cache that concurrent tokenize() calls can
+# corrupt, so sessions take turns on the shared tokenizer.
+_tokenize_lock = threading.Lock()
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+_warm_up_started = False
+
+
+def janome_available() -> bool:
+    return Tokenizer is not None
+
+
+def get_tokenizer():
+    """
+    The process-wide Janome tokenizer, built on first use. Streamlit imports
+    this module once per server process, so every session and rerun shares it
+    instead of loading the dictionary again.
+    """
+    global _tokenizer
+    if _tokenizer is None:
+        with _tokenizer_lock:
+            if _tokenizer is None:
+                _tokenizer = Tokenizer()
+    return _tokenizer
+
+
+def contains_japanese(text: str) -> bool:
+    return bool(re.search(r"[ぁ-んァ-ン一-龥]", text))
+
+
+def tokenize_english(
+    text: str,
+    min_len: int,
+    include_numbers: bool,
+    stopwords: set[str],
+) -> list[str]:
+    if include_numbers:
+        pattern = r"[A-Za-z0-9][A-Za-z0-9'\-]*"
+    else:
+        pattern = r"[A-Za-z][A-Za-z'\-]*"
+    words = re.findall(pattern, text.lower())
+    return [word for word in words if len(word) >= min_len and word not in stopwords]
+
+
+def tokenize_japanese(
+    text: str,
+    min_len: int,
+    include_pos: set[str],
+    stopwords: set[str],
+) -> list[str]:
+    if Tokenizer is None:
+        return []
+    tokenizer = get_tokenizer()
+    with _tokenize_lock:
+        morphemes = [
+            (token.part_of_speech.split(",")[0], token.base_form, token.surface)
+            for token in tokenizer.tokenize(text)
+        ]
+    tokens: list[str] = []
+    for pos, base, surface in morphemes:
+        if base == "*":
+            base = surface
+        if pos not in include_pos:
+            continue
+        if len(base) < min_len:
+            continue
+        if base in stopwords:
+            continue
+        tokens.append(base)
+    return tokens
+
+
+def configured_workers() -> int:
+    try:
+        return max(0, int(os.environ.get(WORKERS_ENV, "0")))
+    except ValueError:
+        return 0
+
+
+def _warm_worker() -> None:
+    # Load the dictionary and the lazily read parts of it before the first
+    # request reaches this process.
+    list(get_tokenizer().tokenize(WARMUP_TEXT))
+
+
+def start_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    A pool of `workers` processes that each load the tokenizer before taking
+    work. They are spawned rather than forked, since the Streamlit server is
+    multi-threaded.
+    """
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_warm_worker if Tokenizer is not None else None,
+    )
+    # The executor starts processes as work arrives; one task per worker
+    # starts (and warms) all of them now.
+    for _ in range(workers):
+        pool.submit(os.getpid)
+    return pool
+
+
+def get_pool(workers: int | None = None) -> ProcessPoolExecutor | None:
+    """
+    The process-wide pool of warm tokenizer processes, started on first use;
+    None when it is disabled or Janome is missing.
+    """
+    global _pool
+    workers = configured_workers() if workers is None else workers
+    if workers <= 0 or Tokenizer is None:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = start_pool(workers)
+    return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+atexit.register(shutdown_pool)
+
+
+def tokenize_japanese_pooled(
+    text: str,
+    min_len: int,
+    include_pos: set[str],
+    stopwords: set[str],
+) -> list[str]:
+    """tokenize_japanese, run in a warm worker process for heavy texts when the pool is enabled."""
+    pool = get_pool() if len(text) >= HEAVY_TEXT_CHARS else None
+    if pool is None:
+        return tokenize_japanese(text, min_len, include_pos, stopwords)
+    return pool.submit(tokenize_japanese, text, min_len, include_pos, stopwords).result()
+
+
+def warm_up() -> None:
+    """
+    Build the shared tokenizer (and start the pool) in the background so the
+    first Analyze is not cold. Only the first call in a process does anything;
+    Streamlit calls it on every rerun.
+    """
+    global _warm_up_started
+    with _tokenizer_lock:
+        if _warm_up_started:
+            return
+        _warm_up_started = True
+
+    def load() -> None:
+        if Tokenizer is not None:
+            with _tokenize_lock:
+                list(get_tokenizer().tokenize(WARMUP_TEXT))
+        get_pool()
+
+    threading.Thread(target=load, name="tokenizer-warmup", daemon=True).start()